@@ -387,7 +387,7 @@ if "multistate_df" in st.session_state and not st.session_state.multistate_df.em
     st.markdown('<div class="section-header">📊 Multi-State Performance</div>', unsafe_allow_html=True)
     
     # Revenue by state
-    state_revenue = df.groupby("State")["Total Revenue"].sum().sort_values(ascending=False)
+    state_revenue = df.groupby("State", observed=True)["Total Revenue"].sum().sort_values(ascending=False)
     
     col1, col2 = st.columns(2)
     
@@ -425,7 +425,7 @@ if "multistate_df" in st.session_state and not st.session_state.multistate_df.em
     st.markdown("### Monthly Performance Detail")
     
     # Summary metrics by state
-    summary_by_state = df.groupby("State").agg({
+    summary_by_state = df.groupby("State", observed=True).agg({
         "Total Patients": "last",
         "Total Revenue": "sum", 
         "EBITDA": "sum",
@@ -604,7 +604,7 @@ with tabs[4]:  # Export
             df.to_excel(writer, sheet_name='Multi_State_Projections', index=False)
             
             # State summary
-            state_summary = df.groupby("State").agg({
+            state_summary = df.groupby("State", observed=True).agg({
                 "Total Patients": "last",
                 "Total Revenue": "sum",
                 "EBITDA": "sum", 
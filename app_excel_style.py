@@ -683,7 +683,7 @@ with tabs[1]:  # Data Tables
         elif selected_table == "State Summary":
             st.markdown("**🏛️ State-by-State Performance Summary**")
             
-            state_summary = df.groupby("State").agg({
+            state_summary = df.groupby("State", observed=True).agg({
                 "Total Patients": ["first", "last"],
                 "Total Revenue": "sum",
                 "EBITDA": "sum",
@@ -913,7 +913,7 @@ with tabs[2]:  # Charts & Analysis
         elif selected_chart == "State Comparison":
             st.markdown("**🏛️ State-by-State Comparison**")
             
-            state_totals = df.groupby("State").agg({
+            state_totals = df.groupby("State", observed=True).agg({
                 "Total Revenue": "sum",
                 "EBITDA": "sum",
                 "Total Patients": "last"
@@ -1067,7 +1067,7 @@ with col1:
             df.to_excel(writer, sheet_name='Projections', index=False)
             
             # State summary
-            state_summary = df.groupby("State").agg({
+            state_summary = df.groupby("State", observed=True).agg({
                 "Total Patients": ["first", "last"],
                 "Total Revenue": "sum",
                 "EBITDA": "sum"
@@ -557,7 +557,7 @@ with tabs[2]:  # Financial Performance
         # State comparison
         st.markdown("### 🏛️ State-by-State Performance")
         
-        state_summary = df.groupby("State").agg({
+        state_summary = df.groupby("State", observed=True).agg({
             "Total Patients": "last",
             "Total Revenue": "sum",
             "EBITDA": "sum",
@@ -627,7 +627,7 @@ with tabs[4]:  # Export
                 monthly_revenue.to_excel(writer, sheet_name='Revenue_by_Code')
             
             # State summary
-            state_summary = df.groupby("State").agg({
+            state_summary = df.groupby("State", observed=True).agg({
                 "Total Patients": ["first", "last"],
                 "Total Revenue": "sum",
                 "EBITDA": "sum",
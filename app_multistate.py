@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import base64
 from pathlib import Path
 from model import (default_rates, default_util, default_settings, default_multi_state_config,
-                  run_model, run_projection, summarize)
+                  run_model, run_projection, run_projection_cached, summarize,
+                  IncrementalProjection, state_registry, revenue_categories, phase_intervals)
+from charts import cached_figure, chart_series
+from pnl_table import build_pnl_table, pnl_export, pnl_styler, results_fingerprint
 
 # Simple page config with blue theme
 st.set_page_config(
@@ -102,6 +106,10 @@ else:
 if "states_config" not in st.session_state:
     st.session_state.states_config = default_multi_state_config()
 
+# Remembers the last projection so slider changes only recompute affected months
+if "projection_session" not in st.session_state:
+    st.session_state.projection_session = IncrementalProjection()
+
 if "scenario" not in st.session_state:
     st.session_state.scenario = {
         "rates": default_rates(),
@@ -691,16 +699,16 @@ active_states_config = {k: v for k, v in st.session_state.states_config.items()
 
 # Run model with only active states
 try:
-    results = run_projection(
+    results = run_projection_cached(
         active_states_config,
-        {k: {"Virginia": 1.00, "Florida": 1.05, "Texas": 1.03, "New York": 1.08, "California": 1.10}[k] 
-         for k in active_states_config.keys()},
-        {k: {"Virginia": 40, "Florida": 60, "Texas": 80, "New York": 50, "California": 70}[k] 
-         for k in active_states_config.keys()},
+        state_registry().gpci_for(active_states_config),
+        state_registry().homes_for(active_states_config),
         st.session_state.scenario["rates"],
         st.session_state.scenario["util"],
-        st.session_state.scenario["settings"]
+        st.session_state.scenario["settings"],
+        session=st.session_state.projection_session,
     )
+    chart_key = results_fingerprint(results)  # see charts.cached_figure
     
     # Tabs for different views
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Dashboard", "📈 Analytics", "💰 Valuation", "📋 Data Tables", "📖 Model Overview"])
@@ -819,124 +827,19 @@ try:
         # Dynamic Monthly P&L Statement with horizontal scrolling
         st.subheader("📋 Dynamic P&L Statement - All Months")
         
-        # Create monthly aggregation for P&L
-        monthly_pnl = results.groupby('Month').agg({
-            'Total Revenue': 'sum',
-            'EBITDA': 'sum', 
-            'Total Patients': 'sum',
-            'Total Costs': 'sum',
-            'Cash Balance': 'first'  # Cash is company-wide
-        }).reset_index()
-        
-        # Create comprehensive P&L table
-        pnl_table = []
-        
-        # Revenue section
-        pnl_table.append(["💰 REVENUE", ""] + [f"${x:,.0f}" for x in monthly_pnl['Total Revenue']])
-        
-        # Add revenue breakdown if billing codes exist
-        revenue_codes = ['Rev_99454', 'Rev_99457', 'Rev_99458', 'Rev_99453', 'Rev_99490', 'Rev_99439', 'Rev_99495', 'Rev_99496', 'Rev_99091']
-        code_names = {
-            'Rev_99454': '📱 Device Supply (99454)',
-            'Rev_99457': '🩺 RPM Management (99457)', 
-            'Rev_99458': '⚕️ Additional RPM (99458)',
-            'Rev_99453': '🎯 Setup & Education (99453)',
-            'Rev_99490': '🏥 CCM Base (99490)',
-            'Rev_99439': '➕ Additional CCM (99439)',
-            'Rev_99495': '🔄 TCM Moderate (99495)',
-            'Rev_99496': '🔄 TCM High (99496)',
-            'Rev_99091': '📊 Data Review (99091)'
-        }
-        
-        for code in revenue_codes:
-            if code in results.columns:
-                # Sum by month across all states
-                monthly_values = results.groupby('Month')[code].sum()
-                # Align with monthly_pnl index
-                aligned_values = [monthly_values.get(month, 0) for month in monthly_pnl['Month']]
-                if sum(aligned_values) > 0:  # Only show if there's revenue
-                    pnl_table.append([code_names.get(code, code), ""] + [f"${x:,.0f}" if x > 0 else "-" for x in aligned_values])
-        
-        pnl_table.append(["", ""] + ["" for _ in monthly_pnl['Month']])  # Spacer
-        
-        # Expenses section
-        pnl_table.append(["💼 EXPENSES", ""] + [f"${x:,.0f}" for x in monthly_pnl['Total Costs'] if 'Total Costs' in monthly_pnl.columns])
-        
-        # Add expense breakdown if available
-        expense_codes = ['Staffing Cost', 'Platform Cost', 'Hardware Cost', 'Overhead']
-        expense_icons = {
-            'Staffing Cost': '👥 Staffing',
-            'Platform Cost': '💻 Platform/Tech',
-            'Hardware Cost': '📱 Hardware/Devices',
-            'Overhead': '🏢 Overhead'
-        }
+        pnl_df, monthly_pnl = build_pnl_table(results)
         
-        for expense in expense_codes:
-            if expense in results.columns:
-                monthly_values = results.groupby('Month')[expense].sum()
-                aligned_values = [monthly_values.get(month, 0) for month in monthly_pnl['Month']]
-                if sum(aligned_values) > 0:
-                    pnl_table.append([expense_icons.get(expense, expense), ""] + [f"${x:,.0f}" if x > 0 else "-" for x in aligned_values])
-        
-        pnl_table.append(["", ""] + ["" for _ in monthly_pnl['Month']])  # Spacer
-        
-        # EBITDA and metrics
-        pnl_table.append(["📊 EBITDA", ""] + [f"${x:,.0f}" for x in monthly_pnl['EBITDA']])
-        
-        # EBITDA Margin
-        ebitda_margins = []
-        for i, revenue in enumerate(monthly_pnl['Total Revenue']):
-            if revenue > 0:
-                margin = (monthly_pnl['EBITDA'].iloc[i] / revenue) * 100
-                ebitda_margins.append(f"{margin:.1f}%")
-            else:
-                ebitda_margins.append("-")
-        pnl_table.append(["   EBITDA Margin", ""] + ebitda_margins)
-        
-        pnl_table.append(["", ""] + ["" for _ in monthly_pnl['Month']])  # Spacer
-        
-        # Key Metrics
-        pnl_table.append(["🏥 METRICS", ""] + ["" for _ in monthly_pnl['Month']])
-        pnl_table.append(["   Total Patients", ""] + [f"{x:,.0f}" for x in monthly_pnl['Total Patients']])
-        
-        # Revenue per patient
-        rev_per_patient = []
-        for i, patients in enumerate(monthly_pnl['Total Patients']):
-            if patients > 0:
-                rpp = monthly_pnl['Total Revenue'].iloc[i] / patients
-                rev_per_patient.append(f"${rpp:.0f}")
-            else:
-                rev_per_patient.append("-")
-        pnl_table.append(["   Revenue/Patient", ""] + rev_per_patient)
+        # Display with horizontal scrolling (numbers formatted at render time)
+        st.dataframe(pnl_styler(pnl_df), use_container_width=True, hide_index=True, height=600)
         
-        # Create DataFrame with proper column headers
-        months = ["Line Item", "Type"] + [f"Month {int(m)}" for m in monthly_pnl['Month']]
-        pnl_df = pd.DataFrame(pnl_table, columns=months)
-        
-        # Display with horizontal scrolling
-        st.dataframe(pnl_df, use_container_width=True, hide_index=True, height=600)
-        
-        # Export functionality
+        # Export functionality: payloads are built on click and cached per result
         col1, col2, col3 = st.columns(3)
         
         with col1:
             # Export P&L to Excel
-            from io import BytesIO
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                # P&L Sheet
-                pnl_df.to_excel(writer, sheet_name='P&L Statement', index=False)
-                
-                # Raw Data Sheet
-                monthly_pnl.to_excel(writer, sheet_name='Monthly Summary', index=False)
-                
-                # Detailed Results Sheet  
-                results_export = results.copy()
-                results_export.to_excel(writer, sheet_name='Detailed Results', index=False)
-            
             st.download_button(
                 label="📊 Export P&L to Excel",
-                data=buffer.getvalue(),
+                data=lambda: pnl_export('xlsx', pnl_df, monthly_pnl, results),
                 file_name=f"ora_living_pnl_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 help="Download complete P&L and financial data in Excel format"
@@ -944,10 +847,9 @@ try:
         
         with col2:
             # Export just the P&L table as CSV
-            csv = pnl_df.to_csv(index=False)
             st.download_button(
                 label="📄 Export P&L to CSV",
-                data=csv,
+                data=lambda: pnl_export('pnl_csv', pnl_df, monthly_pnl, results),
                 file_name=f"ora_living_pnl_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
                 mime="text/csv",
                 help="Download P&L table in CSV format"
@@ -955,10 +857,9 @@ try:
             
         with col3:
             # Export monthly summary
-            summary_csv = monthly_pnl.to_csv(index=False)
             st.download_button(
                 label="📈 Export Monthly Data",
-                data=summary_csv,
+                data=lambda: pnl_export('monthly_csv', pnl_df, monthly_pnl, results),
                 file_name=f"ora_living_monthly_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
                 mime="text/csv",
                 help="Download monthly summary data"
@@ -994,178 +895,180 @@ try:
         with chart_col1:
             st.write("**Financial Performance Over Time**")
             import plotly.graph_objects as go
-            fig = go.Figure()
-            
-            # Add phase background colors for financial chart
-            if 'Phase' in results.columns:
-                phases = results[['Month', 'Phase']].drop_duplicates()
-                phase_colors = {
-                    'Pilot': 'rgba(255, 200, 0, 0.2)',           # Yellow for pilot
-                    'Ramp-up': 'rgba(0, 183, 216, 0.2)',         # Blue for ramp-up
-                    'Hill Valley Scale': 'rgba(78, 205, 196, 0.2)',  # Teal for Hill Valley
-                    'National Expansion': 'rgba(255, 107, 157, 0.2)', # Pink for expansion
-                    'Multi-State': 'rgba(69, 183, 209, 0.2)'    # Light blue for multi-state
-                }
+
+            def build_financial_chart():
+                # Line series, decimated on long horizons (see charts.CHART_POINTS)
+                revenue_line = chart_series(results, 'Total Revenue')
+                ebitda_line = chart_series(results, 'EBITDA')
+                fig = go.Figure()
+            
+                # Add phase background colors for financial chart
+                if 'Phase' in results.columns:
+                    phases = results[['Month', 'Phase']].drop_duplicates()
+                    phase_colors = {
+                        'Pilot': 'rgba(255, 200, 0, 0.2)',           # Yellow for pilot
+                        'Ramp-up': 'rgba(0, 183, 216, 0.2)',         # Blue for ramp-up
+                        'Hill Valley Scale': 'rgba(78, 205, 196, 0.2)',  # Teal for Hill Valley
+                        'National Expansion': 'rgba(255, 107, 157, 0.2)', # Pink for expansion
+                        'Multi-State': 'rgba(69, 183, 209, 0.2)'    # Light blue for multi-state
+                    }
                 
-                for phase_name, phase_color in phase_colors.items():
-                    phase_data = phases[phases['Phase'] == phase_name]
-                    if not phase_data.empty:
-                        min_month = phase_data['Month'].min()
-                        max_month = phase_data['Month'].max()
+                    for phase_name, phase_color in phase_colors.items():
+                        phase_data = phases[phases['Phase'] == phase_name]
+                        if not phase_data.empty:
+                            min_month = phase_data['Month'].min()
+                            max_month = phase_data['Month'].max()
                         
-                        fig.add_vrect(
-                            x0=min_month - 0.5,
-                            x1=max_month + 0.5,
-                            fillcolor=phase_color,
-                            layer="below",
-                            line_width=0,
-                            # Annotations disabled to prevent overlapping when multiple states are active
-                        )
-            fig.add_trace(go.Scatter(
-                x=monthly_aggregate['Month'], 
-                y=monthly_aggregate['Total Revenue'],
-                mode='lines+markers',
-                name='Total Revenue ($)',
-                line=dict(color='#00B7D8', width=3)
-            ))
-            fig.add_trace(go.Scatter(
-                x=monthly_aggregate['Month'], 
-                y=monthly_aggregate['EBITDA'],
-                mode='lines+markers', 
-                name='EBITDA ($)',
-                line=dict(color='#FF6B9D', width=3)
-            ))
-            
-            # Add phase annotations at the top of the chart
-            fig.add_annotation(x=3, y=1.15, xref="x", yref="paper",
-                             text="<b>Pilot</b>", showarrow=False,
-                             font=dict(size=10, color="rgba(255, 200, 0, 0.8)"),
-                             bgcolor="rgba(255, 200, 0, 0.2)",
-                             borderpad=4)
-            fig.add_annotation(x=9, y=1.15, xref="x", yref="paper", 
-                             text="<b>Ramp-up</b>", showarrow=False,
-                             font=dict(size=10, color="rgba(0, 183, 216, 0.8)"),
-                             bgcolor="rgba(0, 183, 216, 0.2)",
-                             borderpad=4)
-            fig.add_annotation(x=18, y=1.15, xref="x", yref="paper",
-                             text="<b>Hill Valley</b>", showarrow=False,
-                             font=dict(size=10, color="rgba(78, 205, 196, 0.8)"),
-                             bgcolor="rgba(78, 205, 196, 0.2)",
-                             borderpad=4)
-            fig.add_annotation(x=36, y=1.15, xref="x", yref="paper",
-                             text="<b>National</b>", showarrow=False,
-                             font=dict(size=10, color="rgba(255, 107, 157, 0.8)"),
-                             bgcolor="rgba(255, 107, 157, 0.2)",
-                             borderpad=4)
-            
-            fig.update_layout(
-                xaxis_title="Month",
-                yaxis_title="Amount ($)",
-                height=450,  # Increased height for phase labels
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="top",
-                    y=-0.15,  # Place legend below chart
-                    xanchor="center",
-                    x=0.5
-                ),
-                hovermode='x unified',
-                margin=dict(t=80)  # Add top margin for phase labels
-            )
+                            fig.add_vrect(
+                                x0=min_month - 0.5,
+                                x1=max_month + 0.5,
+                                fillcolor=phase_color,
+                                layer="below",
+                                line_width=0,
+                                # Annotations disabled to prevent overlapping when multiple states are active
+                            )
+                fig.add_trace(go.Scatter(
+                    x=revenue_line.index,
+                    y=revenue_line,
+                    mode='lines+markers',
+                    name='Total Revenue ($)',
+                    line=dict(color='#00B7D8', width=3)
+                ))
+                fig.add_trace(go.Scatter(
+                    x=ebitda_line.index,
+                    y=ebitda_line,
+                    mode='lines+markers', 
+                    name='EBITDA ($)',
+                    line=dict(color='#FF6B9D', width=3)
+                ))
+            
+                # Add phase annotations at the top of the chart
+                fig.add_annotation(x=3, y=1.15, xref="x", yref="paper",
+                                 text="<b>Pilot</b>", showarrow=False,
+                                 font=dict(size=10, color="rgba(255, 200, 0, 0.8)"),
+                                 bgcolor="rgba(255, 200, 0, 0.2)",
+                                 borderpad=4)
+                fig.add_annotation(x=9, y=1.15, xref="x", yref="paper", 
+                                 text="<b>Ramp-up</b>", showarrow=False,
+                                 font=dict(size=10, color="rgba(0, 183, 216, 0.8)"),
+                                 bgcolor="rgba(0, 183, 216, 0.2)",
+                                 borderpad=4)
+                fig.add_annotation(x=18, y=1.15, xref="x", yref="paper",
+                                 text="<b>Hill Valley</b>", showarrow=False,
+                                 font=dict(size=10, color="rgba(78, 205, 196, 0.8)"),
+                                 bgcolor="rgba(78, 205, 196, 0.2)",
+                                 borderpad=4)
+                fig.add_annotation(x=36, y=1.15, xref="x", yref="paper",
+                                 text="<b>National</b>", showarrow=False,
+                                 font=dict(size=10, color="rgba(255, 107, 157, 0.8)"),
+                                 bgcolor="rgba(255, 107, 157, 0.2)",
+                                 borderpad=4)
+            
+                fig.update_layout(
+                    xaxis_title="Month",
+                    yaxis_title="Amount ($)",
+                    height=450,  # Increased height for phase labels
+                    showlegend=True,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="top",
+                        y=-0.15,  # Place legend below chart
+                        xanchor="center",
+                        x=0.5
+                    ),
+                    hovermode='x unified',
+                    margin=dict(t=80)  # Add top margin for phase labels
+                )
+                return fig
+
+            fig = cached_figure(chart_key, 'financial_performance', build_financial_chart)
             st.plotly_chart(fig, use_container_width=True)
         
         with chart_col2:  
             st.write("**Patient Growth & Cash Position**")
-            fig2 = go.Figure()
-            
-            # Add phase background colors using monthly data
-            if 'Phase' in results.columns:
-                phases = results[['Month', 'Phase']].drop_duplicates()
-                phase_colors = {
-                    'Pilot': 'rgba(255, 200, 0, 0.2)',           # Yellow for pilot
-                    'Ramp-up': 'rgba(0, 183, 216, 0.2)',         # Blue for ramp-up
-                    'Hill Valley Scale': 'rgba(78, 205, 196, 0.2)',  # Teal for Hill Valley
-                    'National Expansion': 'rgba(255, 107, 157, 0.2)', # Pink for expansion
-                    'Multi-State': 'rgba(69, 183, 209, 0.2)'    # Light blue for multi-state
-                }
+
+            def build_growth_chart():
+                patients_line = chart_series(results, 'Total Patients')
+                cash_line = chart_series(results, 'Cash Balance')
+                fig2 = go.Figure()
+            
+                # Add phase background colors using monthly data
+                if 'Phase' in results.columns:
+                    phases = phase_intervals(results)
+                    phase_colors = {
+                        'Pilot': 'rgba(255, 200, 0, 0.2)',           # Yellow for pilot
+                        'Ramp-up': 'rgba(0, 183, 216, 0.2)',         # Blue for ramp-up
+                        'Hill Valley Scale': 'rgba(78, 205, 196, 0.2)',  # Teal for Hill Valley
+                        'National Expansion': 'rgba(255, 107, 157, 0.2)', # Pink for expansion
+                        'Multi-State': 'rgba(69, 183, 209, 0.2)'    # Light blue for multi-state
+                    }
                 
-                # Add phase regions
-                current_phase = None
-                start_month = 1
-                for _, row in phases.iterrows():
-                    if current_phase != row['Phase'] and current_phase is not None:
-                        fig2.add_vrect(x0=start_month-0.5, x1=row['Month']-0.5,
-                                     fillcolor=phase_colors.get(current_phase, 'rgba(200,200,200,0.1)'),
+                    # Add phase regions (one per run of the company phase)
+                    for phase, start, end in zip(phases['Phase'], phases['Start'], phases['End']):
+                        fig2.add_vrect(x0=start-0.5, x1=end+0.5,
+                                     fillcolor=phase_colors.get(phase, 'rgba(200,200,200,0.1)'),
                                      layer="below", line_width=0,
-                                     # annotation_text=current_phase, annotation_position="top"  # Disabled to prevent overlapping
+                                     # annotation_text=phase, annotation_position="top"  # Disabled to prevent overlapping
                                      )
-                    if current_phase != row['Phase']:
-                        current_phase = row['Phase']
-                        start_month = row['Month']
-                # Add last phase
-                if current_phase:
-                    fig2.add_vrect(x0=start_month-0.5, x1=phases['Month'].max()+0.5,
-                                 fillcolor=phase_colors.get(current_phase, 'rgba(200,200,200,0.1)'),
-                                 layer="below", line_width=0,
-                                 # annotation_text=current_phase, annotation_position="top"  # Disabled to prevent overlapping
-                                 )
-            
-            fig2.add_trace(go.Scatter(
-                x=monthly_aggregate['Month'], 
-                y=monthly_aggregate['Total Patients'],
-                mode='lines+markers',
-                name='Total Patients',
-                yaxis='y',
-                line=dict(color='#4ECDC4', width=3)
-            ))
-            fig2.add_trace(go.Scatter(
-                x=monthly_aggregate['Month'], 
-                y=monthly_aggregate['Cash Balance'],
-                mode='lines+markers',
-                name='Cash Balance ($)',
-                yaxis='y2',
-                line=dict(color='#45B7D1', width=3)
-            ))
-            
-            # Add phase annotations at the top of the chart
-            fig2.add_annotation(x=3, y=1.15, xref="x", yref="paper",
-                              text="<b>Pilot</b>", showarrow=False,
-                              font=dict(size=10, color="rgba(255, 200, 0, 0.8)"),
-                              bgcolor="rgba(255, 200, 0, 0.2)",
-                              borderpad=4)
-            fig2.add_annotation(x=9, y=1.15, xref="x", yref="paper",
-                              text="<b>Ramp-up</b>", showarrow=False,
-                              font=dict(size=10, color="rgba(0, 183, 216, 0.8)"),
-                              bgcolor="rgba(0, 183, 216, 0.2)",
-                              borderpad=4)
-            fig2.add_annotation(x=18, y=1.15, xref="x", yref="paper",
-                              text="<b>Hill Valley</b>", showarrow=False,
-                              font=dict(size=10, color="rgba(78, 205, 196, 0.8)"),
-                              bgcolor="rgba(78, 205, 196, 0.2)",
-                              borderpad=4)
-            fig2.add_annotation(x=36, y=1.15, xref="x", yref="paper",
-                              text="<b>National</b>", showarrow=False,
-                              font=dict(size=10, color="rgba(255, 107, 157, 0.8)"),
-                              bgcolor="rgba(255, 107, 157, 0.2)",
-                              borderpad=4)
-            
-            fig2.update_layout(
-                xaxis_title="Month",
-                yaxis=dict(title="Number of Patients", side="left"),
-                yaxis2=dict(title="Cash Balance ($)", side="right", overlaying="y"),
-                height=450,  # Increased height for phase labels
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="top",
-                    y=-0.15,  # Place legend below chart
-                    xanchor="center",
-                    x=0.5
-                ),
-                hovermode='x unified',
-                margin=dict(t=80)  # Add top margin for phase labels
-            )
+            
+                fig2.add_trace(go.Scatter(
+                    x=patients_line.index,
+                    y=patients_line,
+                    mode='lines+markers',
+                    name='Total Patients',
+                    yaxis='y',
+                    line=dict(color='#4ECDC4', width=3)
+                ))
+                fig2.add_trace(go.Scatter(
+                    x=cash_line.index,
+                    y=cash_line,
+                    mode='lines+markers',
+                    name='Cash Balance ($)',
+                    yaxis='y2',
+                    line=dict(color='#45B7D1', width=3)
+                ))
+            
+                # Add phase annotations at the top of the chart
+                fig2.add_annotation(x=3, y=1.15, xref="x", yref="paper",
+                                  text="<b>Pilot</b>", showarrow=False,
+                                  font=dict(size=10, color="rgba(255, 200, 0, 0.8)"),
+                                  bgcolor="rgba(255, 200, 0, 0.2)",
+                                  borderpad=4)
+                fig2.add_annotation(x=9, y=1.15, xref="x", yref="paper",
+                                  text="<b>Ramp-up</b>", showarrow=False,
+                                  font=dict(size=10, color="rgba(0, 183, 216, 0.8)"),
+                                  bgcolor="rgba(0, 183, 216, 0.2)",
+                                  borderpad=4)
+                fig2.add_annotation(x=18, y=1.15, xref="x", yref="paper",
+                                  text="<b>Hill Valley</b>", showarrow=False,
+                                  font=dict(size=10, color="rgba(78, 205, 196, 0.8)"),
+                                  bgcolor="rgba(78, 205, 196, 0.2)",
+                                  borderpad=4)
+                fig2.add_annotation(x=36, y=1.15, xref="x", yref="paper",
+                                  text="<b>National</b>", showarrow=False,
+                                  font=dict(size=10, color="rgba(255, 107, 157, 0.8)"),
+                                  bgcolor="rgba(255, 107, 157, 0.2)",
+                                  borderpad=4)
+            
+                fig2.update_layout(
+                    xaxis_title="Month",
+                    yaxis=dict(title="Number of Patients", side="left"),
+                    yaxis2=dict(title="Cash Balance ($)", side="right", overlaying="y"),
+                    height=450,  # Increased height for phase labels
+                    showlegend=True,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="top",
+                        y=-0.15,  # Place legend below chart
+                        xanchor="center",
+                        x=0.5
+                    ),
+                    hovermode='x unified',
+                    margin=dict(t=80)  # Add top margin for phase labels
+                )
+                return fig2
+
+            fig2 = cached_figure(chart_key, 'patient_growth_cash', build_growth_chart)
             st.plotly_chart(fig2, use_container_width=True)
     
     with tab2:
@@ -1175,61 +1078,62 @@ try:
         # Create monthly revenue breakdown for stacked bar chart
         import plotly.graph_objects as go
         
-        # Sample every 3 months for cleaner visualization
-        sampled_results = results[results['Month'] % 3 == 0].copy()
-        
-        # Categorize revenue streams
-        revenue_categories = {
-            'RPM Device & Management': ['Rev_99454', 'Rev_99457', 'Rev_99458'],
-            'CCM Services': ['Rev_99490', 'Rev_99439', 'Rev_99487', 'Rev_99489'],
-            'TCM Transition': ['Rev_99495', 'Rev_99496'],
-            'Setup & Education': ['Rev_99453'],
-            'Data Review': ['Rev_99091'],
-            'PCM Services': ['Rev_99426', 'Rev_99427']
-        }
-        
-        # Build data for stacked bar chart
-        fig_revenue = go.Figure()
-        
-        colors = {
-            'RPM Device & Management': '#00B7D8',
-            'CCM Services': '#4ECDC4', 
-            'TCM Transition': '#FF6B9D',
-            'Setup & Education': '#FFD93D',
-            'Data Review': '#95E1D3',
-            'PCM Services': '#C9B1FF'
-        }
+        def build_revenue_chart():
+            # Sample every 3 months for cleaner visualization
+            sampled_results = results[results['Month'] % 3 == 0].copy()
+        
+            # Revenue streams by category (see model.REVENUE_CATEGORIES)
+            category_revenue = revenue_categories(sampled_results)
+            category_labels = {
+                'RPM': 'RPM Device & Management',
+                'CCM': 'CCM Services',
+                'TCM': 'TCM Transition',
+                'Setup': 'Setup & Education',
+                'Data Review': 'Data Review',
+                'PCM': 'PCM Services'
+            }
         
-        for category, codes in revenue_categories.items():
-            category_values = []
-            for _, row in sampled_results.iterrows():
-                total = sum([row.get(code, 0) for code in codes])
-                category_values.append(total)
-            
-            if sum(category_values) > 0:  # Only show categories with revenue
-                fig_revenue.add_trace(go.Bar(
-                    name=category,
-                    x=sampled_results['Month'],
-                    y=category_values,
-                    marker_color=colors[category]
-                ))
+            # Build data for stacked bar chart
+            fig_revenue = go.Figure()
         
-        fig_revenue.update_layout(
-            barmode='stack',
-            xaxis_title='Month',
-            yaxis_title='Revenue ($)',
-            height=400,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5
-            ),
-            hovermode='x unified'
-        )
+            colors = {
+                'RPM Device & Management': '#00B7D8',
+                'CCM Services': '#4ECDC4', 
+                'TCM Transition': '#FF6B9D',
+                'Setup & Education': '#FFD93D',
+                'Data Review': '#95E1D3',
+                'PCM Services': '#C9B1FF'
+            }
         
+            for key, category in category_labels.items():
+                category_values = category_revenue[key]
+            
+                if category_values.sum() > 0:  # Only show categories with revenue
+                    fig_revenue.add_trace(go.Bar(
+                        name=category,
+                        x=sampled_results['Month'],
+                        y=category_values,
+                        marker_color=colors[category]
+                    ))
+        
+            fig_revenue.update_layout(
+                barmode='stack',
+                xaxis_title='Month',
+                yaxis_title='Revenue ($)',
+                height=400,
+                showlegend=True,
+                legend=dict(
+                    orientation="h",
+                    yanchor="bottom",
+                    y=1.02,
+                    xanchor="center",
+                    x=0.5
+                ),
+                hovermode='x unified'
+            )
+            return fig_revenue
+
+        fig_revenue = cached_figure(chart_key, 'revenue_composition', build_revenue_chart)
         st.plotly_chart(fig_revenue, use_container_width=True)
         
         # State-by-State Breakdown (using actual model data)
@@ -1244,7 +1148,7 @@ try:
             with col1:
                 st.write("**Revenue by State (Final Month)**")
                 # Get actual state revenue data
-                state_revenue = final_month_data.groupby('State')['Total Revenue'].sum()
+                state_revenue = final_month_data.groupby('State', observed=True)['Total Revenue'].sum()
                 if len(state_revenue) > 0:
                     st.bar_chart(state_revenue)
                 else:
@@ -1253,7 +1157,7 @@ try:
             with col2:
                 st.write("**Patients by State (Final Month)**")  
                 # Get actual state patient data
-                state_patients = final_month_data.groupby('State')['Total Patients'].sum()
+                state_patients = final_month_data.groupby('State', observed=True)['Total Patients'].sum()
                 if len(state_patients) > 0:
                     st.bar_chart(state_patients)
                 else:
@@ -1360,135 +1264,141 @@ try:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Create waterfall chart for unit economics
-            fig_unit = go.Figure()
-            
-            # Revenue bar
-            fig_unit.add_trace(go.Bar(
-                name='Revenue',
-                x=['Per Patient Economics'],
-                y=[revenue_per_patient],
-                marker_color='#00B7D8',
-                text=[f'${revenue_per_patient:.0f}'],
-                textposition='outside'
-            ))
-            
-            # Cost breakdown (stacked negative values)
-            fig_unit.add_trace(go.Bar(
-                name='Staffing',
-                x=['Per Patient Economics'],
-                y=[-staffing_per_patient],
-                marker_color='#FF6B9D',
-                text=[f'-${staffing_per_patient:.0f}'],
-                textposition='inside'
-            ))
-            
-            fig_unit.add_trace(go.Bar(
-                name='Platform/Tech',
-                x=['Per Patient Economics'],
-                y=[-platform_per_patient],
-                marker_color='#FFD93D',
-                text=[f'-${platform_per_patient:.0f}'],
-                textposition='inside'
-            ))
-            
-            fig_unit.add_trace(go.Bar(
-                name='Hardware',
-                x=['Per Patient Economics'],
-                y=[-hardware_per_patient],
-                marker_color='#95E1D3',
-                text=[f'-${hardware_per_patient:.0f}'],
-                textposition='inside'
-            ))
-            
-            fig_unit.add_trace(go.Bar(
-                name='Overhead',
-                x=['Per Patient Economics'],
-                y=[-overhead_per_patient],
-                marker_color='#C9B1FF',
-                text=[f'-${overhead_per_patient:.0f}'],
-                textposition='inside'
-            ))
-            
-            fig_unit.update_layout(
-                title=f"Unit Economics Breakdown (Month {int(current_month_data['Month'])})",
-                yaxis_title="$ per Patient per Month",
-                yaxis=dict(tickformat="$,.0f"),
-                barmode='relative',
-                height=400,
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=-0.3,
-                    xanchor="center",
-                    x=0.5
-                )
-            )
+            def build_unit_chart():
+                # Create waterfall chart for unit economics
+                fig_unit = go.Figure()
+            
+                # Revenue bar
+                fig_unit.add_trace(go.Bar(
+                    name='Revenue',
+                    x=['Per Patient Economics'],
+                    y=[revenue_per_patient],
+                    marker_color='#00B7D8',
+                    text=[f'${revenue_per_patient:.0f}'],
+                    textposition='outside'
+                ))
             
-            # Add profit annotation
-            fig_unit.add_annotation(
-                x=0,
-                y=profit_per_patient/2,
-                text=f"<b>Net Profit<br>${profit_per_patient:.0f}/patient</b>",
-                showarrow=False,
-                font=dict(size=14, color='green' if profit_per_patient > 0 else 'red')
-            )
+                # Cost breakdown (stacked negative values)
+                fig_unit.add_trace(go.Bar(
+                    name='Staffing',
+                    x=['Per Patient Economics'],
+                    y=[-staffing_per_patient],
+                    marker_color='#FF6B9D',
+                    text=[f'-${staffing_per_patient:.0f}'],
+                    textposition='inside'
+                ))
             
+                fig_unit.add_trace(go.Bar(
+                    name='Platform/Tech',
+                    x=['Per Patient Economics'],
+                    y=[-platform_per_patient],
+                    marker_color='#FFD93D',
+                    text=[f'-${platform_per_patient:.0f}'],
+                    textposition='inside'
+                ))
+            
+                fig_unit.add_trace(go.Bar(
+                    name='Hardware',
+                    x=['Per Patient Economics'],
+                    y=[-hardware_per_patient],
+                    marker_color='#95E1D3',
+                    text=[f'-${hardware_per_patient:.0f}'],
+                    textposition='inside'
+                ))
+            
+                fig_unit.add_trace(go.Bar(
+                    name='Overhead',
+                    x=['Per Patient Economics'],
+                    y=[-overhead_per_patient],
+                    marker_color='#C9B1FF',
+                    text=[f'-${overhead_per_patient:.0f}'],
+                    textposition='inside'
+                ))
+            
+                fig_unit.update_layout(
+                    title=f"Unit Economics Breakdown (Month {int(current_month_data['Month'])})",
+                    yaxis_title="$ per Patient per Month",
+                    yaxis=dict(tickformat="$,.0f"),
+                    barmode='relative',
+                    height=400,
+                    showlegend=True,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom",
+                        y=-0.3,
+                        xanchor="center",
+                        x=0.5
+                    )
+                )
+            
+                # Add profit annotation
+                fig_unit.add_annotation(
+                    x=0,
+                    y=profit_per_patient/2,
+                    text=f"<b>Net Profit<br>${profit_per_patient:.0f}/patient</b>",
+                    showarrow=False,
+                    font=dict(size=14, color='green' if profit_per_patient > 0 else 'red')
+                )
+                return fig_unit
+
+            fig_unit = cached_figure(chart_key, 'unit_economics', build_unit_chart)
             st.plotly_chart(fig_unit, use_container_width=True)
         
         with col2:
-            # Unit economics trend over time
-            fig_trend = go.Figure()
-            
             # Calculate monthly per-patient metrics
             results['Revenue_Per_Patient'] = results['Total Revenue'] / results['Total Patients']
             results['Cost_Per_Patient'] = results['Total Costs'] / results['Total Patients']
             results['Profit_Per_Patient'] = results['Revenue_Per_Patient'] - results['Cost_Per_Patient']
+
+            def build_trend_chart():
+                # Unit economics trend over time
+                fig_trend = go.Figure()
+            
+                fig_trend.add_trace(go.Scatter(
+                    x=results['Month'],
+                    y=results['Revenue_Per_Patient'],
+                    mode='lines',
+                    name='Revenue/Patient',
+                    line=dict(color='#00B7D8', width=3)
+                ))
             
-            fig_trend.add_trace(go.Scatter(
-                x=results['Month'],
-                y=results['Revenue_Per_Patient'],
-                mode='lines',
-                name='Revenue/Patient',
-                line=dict(color='#00B7D8', width=3)
-            ))
-            
-            fig_trend.add_trace(go.Scatter(
-                x=results['Month'],
-                y=results['Cost_Per_Patient'],
-                mode='lines',
-                name='Cost/Patient',
-                line=dict(color='#FF6B9D', width=3)
-            ))
-            
-            fig_trend.add_trace(go.Scatter(
-                x=results['Month'],
-                y=results['Profit_Per_Patient'],
-                mode='lines',
-                name='Profit/Patient',
-                line=dict(color='#4ECDC4', width=3),
-                fill='tozeroy',
-                fillcolor='rgba(78, 205, 196, 0.2)'
-            ))
-            
-            fig_trend.update_layout(
-                title="Unit Economics Trend Over Time",
-                xaxis_title="Month",
-                yaxis_title="$ per Patient per Month",
-                yaxis=dict(tickformat="$,.0f"),
-                height=400,
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=-0.3,
-                    xanchor="center",
-                    x=0.5
-                ),
-                hovermode='x unified'
-            )
+                fig_trend.add_trace(go.Scatter(
+                    x=results['Month'],
+                    y=results['Cost_Per_Patient'],
+                    mode='lines',
+                    name='Cost/Patient',
+                    line=dict(color='#FF6B9D', width=3)
+                ))
             
+                fig_trend.add_trace(go.Scatter(
+                    x=results['Month'],
+                    y=results['Profit_Per_Patient'],
+                    mode='lines',
+                    name='Profit/Patient',
+                    line=dict(color='#4ECDC4', width=3),
+                    fill='tozeroy',
+                    fillcolor='rgba(78, 205, 196, 0.2)'
+                ))
+            
+                fig_trend.update_layout(
+                    title="Unit Economics Trend Over Time",
+                    xaxis_title="Month",
+                    yaxis_title="$ per Patient per Month",
+                    yaxis=dict(tickformat="$,.0f"),
+                    height=400,
+                    showlegend=True,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom",
+                        y=-0.3,
+                        xanchor="center",
+                        x=0.5
+                    ),
+                    hovermode='x unified'
+                )
+                return fig_trend
+
+            fig_trend = cached_figure(chart_key, 'unit_economics_trend', build_trend_chart)
             st.plotly_chart(fig_trend, use_container_width=True)
         
         # New Patients from Hill Valley Partnership (Virginia Only)
@@ -1498,131 +1408,121 @@ try:
         virginia_results = results[results['State'] == 'Virginia'] if 'State' in results.columns else results
         
         if 'New Patients' in virginia_results.columns and not virginia_results.empty:
-            fig_patients = go.Figure()
-            
-            # Add phase background colors using Virginia data
-            if 'Phase' in virginia_results.columns:
-                phases = virginia_results[['Month', 'Phase']].drop_duplicates()
-                phase_colors = {
-                    'Pilot': 'rgba(255, 200, 0, 0.2)',
-                    'Ramp-up': 'rgba(0, 183, 216, 0.2)',
-                    'Hill Valley Scale': 'rgba(78, 205, 196, 0.2)',
-                    'National Expansion': 'rgba(255, 107, 157, 0.2)'
-                }
-                
-                for phase_name, phase_color in phase_colors.items():
-                    phase_data = phases[phases['Phase'] == phase_name]
-                    if not phase_data.empty:
-                        min_month = phase_data['Month'].min()
-                        max_month = phase_data['Month'].max()
-                        
-                        fig_patients.add_vrect(
-                            x0=min_month - 0.5,
-                            x1=max_month + 0.5,
-                            fillcolor=phase_color,
-                            layer="below",
-                            line_width=0,
-                            # Annotations disabled to prevent overlapping when multiple states are active
-                        )
-            
             # Calculate Hill Valley vs Additional Sources breakdown
-            hill_valley_base = []
-            additional_sources = []
+            month = virginia_results['Month'].to_numpy()
+            total_new = virginia_results['New Patients'].to_numpy()
             
-            for _, row in virginia_results.iterrows():
-                month = row['Month']
-                total_new = row['New Patients']
-                
-                # Get Hill Valley parameters
-                hill_valley_discharges = st.session_state.scenario["settings"].get("hill_valley_monthly_discharges", 500)
-                initial_capture = st.session_state.scenario["settings"].get("initial_capture_rate", 0.6)
-                target_capture = st.session_state.scenario["settings"].get("target_capture_rate", 1.0)
-                growth_mult = st.session_state.scenario["settings"].get("growth_multiplier", 1.3)
-                
-                # Calculate what should come from Hill Valley vs additional sources
-                if month <= 6:  # Pilot
-                    hill_valley_portion = min(total_new, 20)
-                    additional_portion = max(0, total_new - 20)
-                elif month <= 12:  # Ramp-up  
-                    max_hill_valley = int(hill_valley_discharges * initial_capture)
-                    hill_valley_portion = min(total_new, max_hill_valley)
-                    additional_portion = max(0, total_new - max_hill_valley)
-                elif month <= 24:  # Scaling
-                    max_hill_valley = int(hill_valley_discharges * target_capture)
-                    hill_valley_portion = min(total_new, max_hill_valley)
-                    additional_portion = max(0, total_new - max_hill_valley)
-                else:  # Growth phase - this is where we see additional sources
-                    hill_valley_base_capacity = int(hill_valley_discharges * target_capture)
-                    hill_valley_portion = hill_valley_base_capacity
-                    additional_portion = max(0, total_new - hill_valley_base_capacity)
-                
-                hill_valley_base.append(hill_valley_portion)
-                additional_sources.append(additional_portion)
-            
-            # Add Hill Valley bar (blue)
-            fig_patients.add_trace(go.Bar(
-                x=virginia_results['Month'],
-                y=hill_valley_base,
-                name='Hill Valley Partnership',
-                marker_color='#00B7D8',
-                text=[f'{x:.0f}' if x > 20 else '' for x in hill_valley_base],
-                textposition='inside',
-                textfont=dict(size=8, color='white')
-            ))
-            
-            # Add Additional Sources bar (pink)
-            fig_patients.add_trace(go.Bar(
-                x=virginia_results['Month'],
-                y=additional_sources,
-                name='Additional Nursing Homes',
-                marker_color='#FF6B9D',
-                text=[f'{x:.0f}' if x > 20 else '' for x in additional_sources],
-                textposition='inside',
-                textfont=dict(size=8, color='white')
-            ))
-            
-            # Add reference lines based on current settings
+            # Get Hill Valley parameters
             hill_valley_discharges = st.session_state.scenario["settings"].get("hill_valley_monthly_discharges", 500)
+            initial_capture = st.session_state.scenario["settings"].get("initial_capture_rate", 0.6)
             target_capture = st.session_state.scenario["settings"].get("target_capture_rate", 1.0)
+            growth_mult = st.session_state.scenario["settings"].get("growth_multiplier", 1.3)
+            
+            # Hill Valley capacity by phase: Pilot, Ramp-up, then Scaling and Growth
+            max_hill_valley = np.select([month <= 6, month <= 12],
+                                        [20, int(hill_valley_discharges * initial_capture)],
+                                        int(hill_valley_discharges * target_capture))
+            # Up to month 24 Hill Valley covers what it can; in the growth phase it
+            # runs at capacity and additional sources bring the rest
+            hill_valley_base = np.where(month <= 24, np.minimum(total_new, max_hill_valley), max_hill_valley)
+            additional_sources = np.maximum(0, total_new - max_hill_valley)
+            
+            def build_intake_chart(hill_valley_discharges,
+                                   initial_capture,
+                                   target_capture,
+                                   growth_mult,
+                                   target_capture_rate):
+                fig_patients = go.Figure()
+            
+                # Add phase background colors using Virginia data
+                if 'Phase' in virginia_results.columns:
+                    phases = phase_intervals(virginia_results)
+                    phase_colors = {
+                        'Pilot': 'rgba(255, 200, 0, 0.2)',
+                        'Ramp-up': 'rgba(0, 183, 216, 0.2)',
+                        'Hill Valley Scale': 'rgba(78, 205, 196, 0.2)',
+                        'National Expansion': 'rgba(255, 107, 157, 0.2)'
+                    }
+                
+                    for phase_name, min_month, max_month in zip(phases['Phase'], phases['Start'], phases['End']):
+                        if phase_name in phase_colors:
+                            fig_patients.add_vrect(
+                                x0=min_month - 0.5,
+                                x1=max_month + 0.5,
+                                fillcolor=phase_colors[phase_name],
+                                layer="below",
+                                line_width=0,
+                                # Annotations disabled to prevent overlapping when multiple states are active
+                            )
+            
+                # Add Hill Valley bar (blue)
+                fig_patients.add_trace(go.Bar(
+                    x=virginia_results['Month'],
+                    y=hill_valley_base,
+                    name='Hill Valley Partnership',
+                    marker_color='#00B7D8',
+                    text=np.where(hill_valley_base > 20, np.round(hill_valley_base).astype(int).astype(str), ''),
+                    textposition='inside',
+                    textfont=dict(size=8, color='white')
+                ))
             
-            # Hill Valley capacity line
-            hill_valley_max = int(hill_valley_discharges * target_capture)
-            fig_patients.add_hline(
-                y=hill_valley_max,
-                line_dash="dash", 
-                line_color="#00B7D8",
-                annotation_text=f"Hill Valley Max: {hill_valley_max}/month",
-                annotation_position="left"
-            )
+                # Add Additional Sources bar (pink)
+                fig_patients.add_trace(go.Bar(
+                    x=virginia_results['Month'],
+                    y=additional_sources,
+                    name='Additional Nursing Homes',
+                    marker_color='#FF6B9D',
+                    text=np.where(additional_sources > 20, np.round(additional_sources).astype(int).astype(str), ''),
+                    textposition='inside',
+                    textfont=dict(size=8, color='white')
+                ))
             
-            # Total capacity line (if non-HV capture > 0%)
-            if target_capture_rate > 0:
-                total_capacity = hill_valley_discharges * st.session_state.scenario["settings"].get("growth_multiplier", 1.3)
+                # Add reference lines based on current settings
+                # Hill Valley capacity line
+                hill_valley_max = int(hill_valley_discharges * target_capture)
                 fig_patients.add_hline(
-                    y=total_capacity,
-                    line_dash="dot",
-                    line_color="#FF6B9D", 
-                    annotation_text=f"Growth Target: {total_capacity:.0f}/month",
-                    annotation_position="right"
+                    y=hill_valley_max,
+                    line_dash="dash", 
+                    line_color="#00B7D8",
+                    annotation_text=f"Hill Valley Max: {hill_valley_max}/month",
+                    annotation_position="left"
                 )
             
-            fig_patients.update_layout(
-                title="Monthly New Patient Intake: Hill Valley vs Additional Sources",
-                xaxis_title="Month",
-                yaxis_title="Number of New Patients",
-                yaxis=dict(range=[0, max(700, hill_valley_discharges * 2)]),
-                barmode='stack',  # Stack the bars
-                height=400,
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom", 
-                    y=1.02,
-                    xanchor="center",
-                    x=0.5
+                # Total capacity line (if non-HV capture > 0%)
+                if target_capture_rate > 0:
+                    total_capacity = hill_valley_discharges * growth_mult
+                    fig_patients.add_hline(
+                        y=total_capacity,
+                        line_dash="dot",
+                        line_color="#FF6B9D", 
+                        annotation_text=f"Growth Target: {total_capacity:.0f}/month",
+                        annotation_position="right"
+                    )
+            
+                fig_patients.update_layout(
+                    title="Monthly New Patient Intake: Hill Valley vs Additional Sources",
+                    xaxis_title="Month",
+                    yaxis_title="Number of New Patients",
+                    yaxis=dict(range=[0, max(700, hill_valley_discharges * 2)]),
+                    barmode='stack',  # Stack the bars
+                    height=400,
+                    showlegend=True,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom", 
+                        y=1.02,
+                        xanchor="center",
+                        x=0.5
+                    )
                 )
-            )
-            
+                return fig_patients
+
+            fig_patients = cached_figure(chart_key, 'hill_valley_intake', build_intake_chart,
+                                         hill_valley_discharges=hill_valley_discharges,
+                                         initial_capture=initial_capture,
+                                         target_capture=target_capture,
+                                         growth_mult=growth_mult,
+                                         target_capture_rate=target_capture_rate)
             st.plotly_chart(fig_patients, use_container_width=True)
             
             # Show breakdown metrics
@@ -1706,7 +1606,7 @@ try:
             st.subheader(f"💼 Full P&L Statement (Month {final_month_number} - Year {final_year})")
             
             # Create comprehensive P&L using the same logic as dashboard
-            final_month_agg = final_month_data.sum()
+            final_month_agg = final_month_data.sum(numeric_only=True)
             
             def safe_get_rev(code):
                 return int(final_month_agg.get(f'Rev_{code}', 0))
@@ -7,8 +7,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from io import BytesIO
 import base64
+import copy
 from model import (default_rates, default_util, default_settings, default_multi_state_config,
-                  run_model, run_projection, summarize)
+                  run_model, run_projection, run_projection_cached, summarize)
 from valuation_tab import show_valuation_analysis
 
 # Ora Living Brand Colors
@@ -700,8 +701,13 @@ with tabs[0]:  # Dashboard
                         gpci_dict = {k: v["gpci"] for k, v in active_states_dict.items()}
                         homes_dict = {k: v.get("initial_homes", 40) for k, v in active_states_dict.items()}
                         
-                        df = run_projection(active_states_dict, gpci_dict, homes_dict, sc["rates"], sc["util"], sc["settings"])
+                        df = run_projection_cached(active_states_dict, gpci_dict, homes_dict, sc["rates"], sc["util"], sc["settings"])
                         st.session_state.multistate_df = df
+                        # the inputs behind df, kept apart from the widgets that edit them in place
+                        st.session_state.multistate_scenario = copy.deepcopy({
+                            "states": active_states_dict, "gpci": gpci_dict, "homes": homes_dict,
+                            "rates": sc["rates"], "util": sc["util"], "settings": sc["settings"],
+                        })
                         
                         st.success(f"✅ Model complete! Generated {len(df)} rows of projections.")
                         st.rerun()
@@ -822,7 +828,7 @@ with tabs[1]:  # Data Tables
         elif selected_table == "State Summary":
             st.markdown("**🏛️ State Performance Summary**")
             
-            state_summary = df.groupby("State").agg({
+            state_summary = df.groupby("State", observed=True).agg({
                 "Total Patients": ["first", "last"],
                 "Total Revenue": "sum",
                 "EBITDA": "sum",
@@ -1033,7 +1039,7 @@ with tabs[2]:  # Charts & Analysis
         elif selected_chart == "State Comparison":
             st.markdown("**🏛️ State Performance Analysis**")
             
-            state_totals = df.groupby("State").agg({
+            state_totals = df.groupby("State", observed=True).agg({
                 "Total Revenue": "sum",
                 "EBITDA": "sum",
                 "Total Patients": "last"
@@ -1143,7 +1149,7 @@ with tabs[3]:  # Valuation
     
     if "multistate_df" in st.session_state and not st.session_state.multistate_df.empty:
         df = st.session_state.multistate_df
-        show_valuation_analysis(df)
+        show_valuation_analysis(df, scenario=st.session_state.get("multistate_scenario"))
     else:
         st.info("👆 **Please run the model first** to see valuation analysis")
         
@@ -1285,7 +1291,7 @@ with col1:
             df.to_excel(writer, sheet_name='Monthly_Projections', index=False)
             
             # State summary
-            state_summary = df.groupby("State").agg({
+            state_summary = df.groupby("State", observed=True).agg({
                 "Total Patients": ["first", "last"],
                 "Total Revenue": "sum",
                 "EBITDA": "sum"
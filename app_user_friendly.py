@@ -633,7 +633,7 @@ with tab3:
         # State comparison
         st.markdown("### 🏛️ Performance by State")
         
-        state_summary = df.groupby("State").agg({
+        state_summary = df.groupby("State", observed=True).agg({
             "Total Patients": "last",
             "Total Revenue": "sum",
             "EBITDA": "sum"
@@ -52,7 +52,7 @@ else:
     
 # Check growth phases
 if 'Phase' in results.columns:
-    phases = results.groupby('Phase')['Month'].agg(['min', 'max'])
+    phases = results.groupby('Phase', observed=True)['Month'].agg(['min', 'max'])
     print(f"\n📈 GROWTH PHASES:")
     for phase, row in phases.iterrows():
         print(f"  {phase}: Months {row['min']}-{row['max']}")
@@ -0,0 +1,170 @@
+"""
+Benchmark suite for the projection engine and the reporting paths built on it
+
+Cases:
+  - run_projection, both engines, at 12/60/120/240 months x 1/5/25/50 states,
+    plus the numpy engine with its per-state phase on a thread pool (one
+    worker per core, so compare these cases on like-for-like machines)
+  - summarize, the app_multistate P&L table and its Excel export, and the
+    cohort / device lifecycle view, on the 120-month / 50-state projection
+  - pdf_generator.generate_model_overview_pdf
+
+Every case records the best-of-REPEATS wall time (a single run for the
+Excel export), plus one extra run under tracemalloc for peak traced memory
+and allocated blocks (memory blocks still held when the call returns: its
+result and anything it cached).
+
+    python benchmark_projection.py                  # run and print
+    python benchmark_projection.py --save           # also write the JSON baseline
+    python benchmark_projection.py --compare        # diff against the baseline
+
+The baseline is committed, so a change that slows a case down or makes it
+allocate more shows up in the --compare report and as a diff of the JSON.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import cohorts
+import model
+from pdf_generator import generate_model_overview_pdf
+from pnl_table import build_pnl_table, pnl_excel_bytes
+
+HORIZONS = [12, 60, 120, 240]
+STATE_COUNTS = [1, 5, 25, 50]
+ENGINES = ["numpy", "python"]
+REPEATS = 3
+BASELINE = Path(__file__).with_name("benchmark_baseline.json")
+# --compare flags a case whose wall time or peak memory grew by more than this
+REGRESSION_TOLERANCE = 0.25
+
+
+def national_rollout(n_states):
+    """Virginia plus n_states-1 synthetic states launching over the first 40 months."""
+    states = {"Virginia": {"start_month": 1, "initial_patients": 100}}
+    for i in range(1, n_states):
+        states[f"State {i:02d}"] = {"start_month": 1 + (i % 40), "initial_patients": 500}
+    gpci = {s: 1.0 + (i % 10) / 100 for i, s in enumerate(states)}
+    homes = {s: 50 for s in states}
+    return states, gpci, homes
+
+
+def projection_args(months, n_states):
+    states, gpci, homes = national_rollout(n_states)
+    settings = model.default_settings()
+    settings["months"] = months
+    return states, gpci, homes, model.default_rates(), model.default_util(), settings
+
+
+def measure(fn, repeats=REPEATS):
+    """Wall time (best of `repeats`), then peak memory and allocated blocks of one traced run."""
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return {"wall_ms": round(1000 * best, 2), "peak_kib": round(peak / 1024, 1), "allocated_blocks": blocks}
+
+
+def run_suite():
+    results = {}
+    for engine in ENGINES:
+        for months in HORIZONS:
+            for n_states in STATE_COUNTS:
+                args = projection_args(months, n_states)
+                results[f"run_projection/{engine}/{months}m/{n_states}s"] = measure(
+                    lambda: model.run_projection(*args, engine=engine))
+
+    with ThreadPoolExecutor(os.cpu_count()) as pool:
+        for months in HORIZONS[2:]:
+            args = projection_args(months, 50)
+            results[f"run_projection/numpy-threads/{months}m/50s"] = measure(
+                lambda: model.run_projection(*args, executor=pool, workers=os.cpu_count()))
+
+    args = projection_args(120, 50)
+    df = model.run_projection(*args)
+    pnl_df, monthly_pnl = build_pnl_table(df)
+    results["summarize/120m/50s"] = measure(lambda: model.summarize(df))
+    results["pnl_table/120m/50s"] = measure(lambda: build_pnl_table(df))
+    # seconds per call; one timed run is enough
+    results["excel_export/120m/50s"] = measure(lambda: pnl_excel_bytes(pnl_df, monthly_pnl, df), repeats=1)
+    results["cohorts/120m/50s"] = measure(lambda: cohorts.cohort_projection_from_results(df, args[-1]))
+    results["model_overview_pdf"] = measure(generate_model_overview_pdf)
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "pandas": pd.__version__, "machine": platform.machine()}
+
+
+def print_results(results, baseline=None):
+    print(f"{'Case':<36} {'Wall (ms)':>10} {'Peak (KiB)':>11} {'Blocks':>8}" +
+          (f" {'Wall vs base':>13} {'Peak vs base':>13}" if baseline else ""))
+    print("-" * (68 + (28 if baseline else 0)))
+    regressions = []
+    for case, r in results.items():
+        line = f"{case:<36} {r['wall_ms']:>10.1f} {r['peak_kib']:>11.1f} {r['allocated_blocks']:>8}"
+        base = (baseline or {}).get(case)
+        if base:
+            wall = r["wall_ms"] / base["wall_ms"] - 1 if base["wall_ms"] else 0.0
+            peak = r["peak_kib"] / base["peak_kib"] - 1 if base["peak_kib"] else 0.0
+            line += f" {wall:>+12.0%} {peak:>+12.0%}"
+            if wall > REGRESSION_TOLERANCE or peak > REGRESSION_TOLERANCE:
+                regressions.append(case)
+                line += "  ⚠️"
+        elif baseline is not None:
+            line += f" {'(new)':>13}"
+        print(line)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE.name}")
+    parser.add_argument("--compare", action="store_true", help=f"compare against {BASELINE.name}")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="baseline JSON path")
+    opts = parser.parse_args()
+
+    baseline = None
+    if opts.compare:
+        saved = json.loads(opts.baseline.read_text())
+        baseline = saved["results"]
+        print(f"Baseline: {opts.baseline.name} ({saved['environment']})")
+
+    print(f"PROJECTION BENCHMARKS (best of {REPEATS})")
+    print("=" * 70)
+    results = run_suite()
+    regressions = print_results(results, baseline)
+
+    if opts.compare:
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} case(s) regressed more than {REGRESSION_TOLERANCE:.0%}")
+        else:
+            print(f"\n✅ No case regressed more than {REGRESSION_TOLERANCE:.0%}")
+    if opts.save:
+        payload = {"environment": environment(), "results": results}
+        opts.baseline.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"\nSaved {len(results)} cases to {opts.baseline}")
@@ -0,0 +1,84 @@
+"""
+Dashboard figures and their chart-ready series, shared across Streamlit reruns
+"""
+
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+from model import ProjectionCube
+from pnl_table import results_fingerprint
+
+# Most months a dashboard line trace sends to the browser; longer horizons
+# are decimated by ProjectionCube.series (min/max buckets by default).
+CHART_POINTS = 120
+
+# Cubes per projection result. Streamlit reruns the app on every
+# interaction; keeping the cube at module level keeps its memoized series.
+_CUBE_CACHE = OrderedDict()
+_CUBE_CACHE_SIZE = 8
+_CUBE_LOCK = threading.Lock()
+
+
+def chart_cube(results):
+    """ProjectionCube over a run_projection frame, built once per result."""
+    key = results_fingerprint(results)
+    with _CUBE_LOCK:
+        if key in _CUBE_CACHE:
+            _CUBE_CACHE.move_to_end(key)
+            return _CUBE_CACHE[key]
+    cube = ProjectionCube.from_frame(results)
+    with _CUBE_LOCK:
+        _CUBE_CACHE[key] = cube
+        while len(_CUBE_CACHE) > _CUBE_CACHE_SIZE:
+            _CUBE_CACHE.popitem(last=False)
+    return cube
+
+
+def chart_series(results, metric, points=CHART_POINTS, state=None, method="minmax"):
+    """Monthly `metric` (company-wide, or one state's) decimated to `points` months."""
+    return chart_cube(results).series(metric, points, state=state, method=method)
+
+
+# Traces with more points than this are drawn with WebGL (Scattergl)
+# instead of SVG.
+WEBGL_POINTS = 1000
+
+# Built figures per (results fingerprint, chart id, options). Streamlit
+# serializes the figure on every rerun; what this saves is rebuilding it.
+_FIGURE_CACHE = OrderedDict()
+_FIGURE_CACHE_SIZE = 64
+_FIGURE_LOCK = threading.Lock()
+
+
+def _is_dense(trace):
+    return trace.type == 'scatter' and trace.x is not None and len(trace.x) > WEBGL_POINTS
+
+
+def _with_webgl(fig):
+    """fig with scatter traces longer than WEBGL_POINTS swapped for Scattergl."""
+    if not any(_is_dense(trace) for trace in fig.data):
+        return fig
+    data = [go.Scattergl(trace.to_plotly_json(), skip_invalid=True) if _is_dense(trace) else trace
+            for trace in fig.data]
+    return go.Figure(data=data, layout=fig.layout)
+
+
+def cached_figure(fingerprint, chart_id, build, **options):
+    """
+    Figure `chart_id` for the result with `fingerprint` (results_fingerprint),
+    built by build(**options) on the first call for those options and shared
+    afterwards, so treat it as read-only. Dense scatter traces switch to WebGL.
+    """
+    key = (fingerprint, chart_id, tuple(sorted(options.items())))
+    with _FIGURE_LOCK:
+        if key in _FIGURE_CACHE:
+            _FIGURE_CACHE.move_to_end(key)
+            return _FIGURE_CACHE[key]
+    fig = _with_webgl(build(**options))
+    with _FIGURE_LOCK:
+        _FIGURE_CACHE[key] = fig
+        while len(_FIGURE_CACHE) > _FIGURE_CACHE_SIZE:
+            _FIGURE_CACHE.popitem(last=False)
+    return fig
@@ -0,0 +1,203 @@
+"""
+Cohort (vintage) view of patients and their devices.
+
+run_projection keeps one patient total per state with a flat monthly
+attrition rate. Here each month's intake is followed as its own cohort in a
+(states, intake month, month) triangle, so attrition can depend on how long
+a patient has been enrolled, and devices can be tracked by age: every
+surviving patient's device is replaced at the end of its useful life, and
+device purchases are depreciated straight-line.
+
+Every cohort shares the same age profile, so each output is the intake
+series convolved with an age kernel: one (months x months) Toeplitz matrix
+product per quantity, for all states at once.
+
+cohort_projection_from_results follows the patients a run actually
+enrolled (after its market caps) instead, losing the run's whole-patient
+attrition each month, spread over the cohorts in proportion to their size,
+so its Active Patients are the run's Total Patients.
+
+    results = model.run_projection(...)
+    view = cohort_projection_from_results(results, settings)
+    view.to_frame()
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+import model
+
+COHORT_COLUMNS = ["Month", "State", "New Patients", "Active Patients", "Leaving Patients",
+                  "Device Replacements", "Devices Purchased", "Device Capex",
+                  "Device Depreciation", "Device Net Book Value"]
+
+
+def survival_curve(hazard, months):
+    """
+    Share of a cohort still enrolled at ages 0..months-1 (age 0 = intake month).
+
+    hazard is the monthly attrition rate by age: a scalar, a model.Schedule
+    or a per-month list, where entry a-1 applies when a patient turns a
+    months old.
+    """
+    if isinstance(hazard, model.Schedule):
+        h = hazard.values(months)
+    elif np.isscalar(hazard):
+        h = np.full(months, float(hazard))
+    else:
+        h = model.Schedule.array(hazard).values(months)
+    if np.any((h < 0) | (h > 1)):
+        raise ValueError(f"attrition hazard must be in [0, 1], got {hazard!r}")
+    survival = np.ones(months)
+    survival[1:] = np.cumprod(1 - h[:months-1])
+    return survival
+
+
+def _ages(months):
+    """(intake month x month) age of each cohort, negative before its intake."""
+    return np.arange(months)[None, :] - np.arange(months)[:, None]
+
+
+def _age_matrix(kernel):
+    """Toeplitz (intake month x month) matrix with kernel[t - c] on and above the diagonal."""
+    age = _ages(len(kernel))
+    return np.where(age >= 0, kernel[np.clip(age, 0, None)], 0.0)
+
+
+def _calendar_survival(retention):
+    """
+    (states, intake month, month) share of a cohort still enrolled when every
+    cohort keeps retention[state, t] of its patients in month t: the product
+    of retention over months c+1..t, taken as a difference of log sums.
+    """
+    # a month that loses every patient (retention 0) stays finite in log space
+    log_kept = np.cumsum(np.log(np.maximum(retention, np.finfo(float).tiny)), axis=1)
+    kept = log_kept[:, None, :] - log_kept[:, :, None]
+    np.minimum(kept, 0.0, out=kept)
+    np.exp(kept, out=kept)
+    kept *= _ages(retention.shape[1]) >= 0
+    return kept
+
+
+@dataclass
+class CohortProjection:
+    """
+    Cohort triangle and device lifecycle, every array indexed [state, month].
+
+    cohorts is [state, intake month, month]; the rest are per-month totals.
+    """
+    state_names: List[str]
+    new: np.ndarray
+    cohorts: np.ndarray
+    active: np.ndarray
+    leaving: np.ndarray
+    replacements: np.ndarray
+    purchases: np.ndarray
+    capex: np.ndarray
+    depreciation: np.ndarray
+    net_book_value: np.ndarray
+
+    def to_frame(self):
+        """One row per (Month, State) with an active cohort, in run_projection row order."""
+        n_states, months = self.new.shape
+        month_idx, state_idx = np.nonzero((self.active > 0).T)
+        rows = (state_idx, month_idx)
+        values = [self.new, self.active, self.leaving, self.replacements, self.purchases,
+                  self.capex, self.depreciation, self.net_book_value]
+        return pd.DataFrame(dict(zip(COHORT_COLUMNS, [
+            month_idx + 1,
+            pd.Categorical.from_codes(state_idx, categories=self.state_names),
+            *(v[rows] for v in values),
+        ])))
+
+
+def cohort_projection(new_patients, hazard, device_life, depreciation_months,
+                      unit_cost, recovery_rate=0.0, state_names=None):
+    """
+    Follow each month's intake as a cohort.
+
+    new_patients is (states, months) intake, or a 1-D series for one state.
+    hazard: attrition by age (see survival_curve). device_life: months until
+    a device is replaced; depreciation_months: straight-line schedule of
+    each purchase. unit_cost and recovery_rate are scalars or per-month
+    arrays. Recovered devices of leaving patients are refurbished and
+    reissued to new patients before new devices are bought, as in
+    run_projection. A reissued device starts a fresh useful life.
+    """
+    new = np.atleast_2d(np.asarray(new_patients, dtype=float))
+    survival = survival_curve(hazard, new.shape[1])
+    return _lifecycle(new, _age_matrix(survival)[None], device_life, depreciation_months,
+                      unit_cost, recovery_rate, state_names)
+
+
+def _lifecycle(new, enrolled, device_life, depreciation_months, unit_cost, recovery_rate,
+               state_names):
+    """cohort_projection for (states, months) intake and an enrolled share by (intake month, month)."""
+    n_states, months = new.shape
+    if device_life < 1 or depreciation_months < 1:
+        raise ValueError("device_life and depreciation_months must be at least 1 month")
+
+    ages = np.arange(months)
+    straight_line = _age_matrix(np.where(ages < depreciation_months, 1.0 / depreciation_months, 0.0))
+
+    cohorts = new[:, :, None] * enrolled
+    active = np.matmul(new[:, None, :], enrolled)[:, 0]
+    opening = np.concatenate([np.zeros((n_states, 1)), active[:, :-1]], axis=1)
+    leaving = opening + new - active
+    # devices are replaced on the diagonals where a cohort's age is a multiple of device_life
+    replacements = np.zeros((n_states, months))
+    for age in range(device_life, months, device_life):
+        replacements[:, age:] += np.diagonal(cohorts, offset=age, axis1=1, axis2=2)
+
+    recovered = leaving * recovery_rate
+    purchases = np.maximum(0.0, new - recovered) + replacements
+    capex = purchases * unit_cost
+    depreciation = capex @ straight_line
+    net_book_value = np.cumsum(capex - depreciation, axis=1)
+
+    if state_names is None:
+        state_names = [f"State {k+1}" for k in range(n_states)]
+    return CohortProjection(list(state_names), new, cohorts, active, leaving, replacements,
+                            purchases, capex, depreciation, net_book_value)
+
+
+def cohort_projection_from_results(results, settings, hazard=None):
+    """
+    Cohort view of a run_projection result and the device settings of the
+    same run: device_useful_life, device_depreciation_months, the initial
+    vendor's selected kit and device_recovery_rate.
+
+    Intake is the patients the run enrolled each month: its New Patients,
+    less any intake a state's cap turned away. By default each month's
+    departures are the run's own (whole-patient) attrition, shared across
+    the cohorts in proportion to their size, so Active Patients equals the
+    run's Total Patients. With an age-dependent hazard (see survival_curve)
+    the cohorts age on that instead, and Active Patients is a what-if that
+    no longer matches the run.
+    """
+    months = int(settings["months"])
+    prm = model.compile_params(settings, {}, {})
+    totals = (results.pivot_table(index="State", columns="Month", values="Total Patients",
+                                  aggfunc="sum", observed=True)
+              .reindex(columns=range(1, months+1), fill_value=0).fillna(0))
+    total = totals.to_numpy(dtype=float)
+    opening = np.concatenate([np.zeros((len(total), 1)), total[:, :-1]], axis=1)
+    # run_projection drops int(total * rate) patients a month (see _patient_steps_numpy)
+    attrition = np.floor(opening * prm.attrition[:months])
+    enrolled = total - opening + attrition
+    if hazard is None:
+        retention = 1 - np.divide(attrition, opening, out=np.zeros_like(opening), where=opening > 0)
+        survival = _calendar_survival(retention)
+    else:
+        survival = _age_matrix(survival_curve(hazard, months))[None]
+    return _lifecycle(
+        enrolled, survival,
+        device_life=settings["device_useful_life"],
+        depreciation_months=settings["device_depreciation_months"],
+        unit_cost=prm.kit_cost[prm.initial_vendor],
+        recovery_rate=prm.recovery_rate,
+        state_names=[str(s) for s in totals.index],
+    )
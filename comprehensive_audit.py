@@ -238,7 +238,7 @@ results_multi = model.run_projection(
 )
 
 # Check state aggregation
-state_summary = results_multi[results_multi['Month'] == 48].groupby('State')['Total Patients'].sum()
+state_summary = results_multi[results_multi['Month'] == 48].groupby('State', observed=True)['Total Patients'].sum()
 total_multi = state_summary.sum()
 
 print(f"\n🗺️ Multi-State Results (Month 48):")
@@ -1,7 +1,16 @@
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Optional
 
 # Vendor config structure
 @dataclass
@@ -47,23 +56,38 @@ def default_vendor_presets():
         ),
     }
 
-def _pmpm_for_vendor(vcfg: VendorConfig, active_patients: int) -> float:
+@dataclass(frozen=True)
+class PmpmTable:
     """
-    Resolve PMPM given a vendor config and current active patient count.
-    - If tiers provided (Impilo), pick the highest min threshold <= patients.
-    - Else use flat pmpm (CareSimple/Ora).
+    Compiled PMPM lookup for one vendor: sorted tier thresholds and the PMPM
+    charged from each threshold up. Flat pricing is a single tier from 0.
+    Immutable and hashable, so scenarios with identical pricing share one.
     """
-    if vcfg.tiers:
-        # sort tiers by min threshold
-        tiers = sorted(vcfg.tiers, key=lambda x: x[0])
-        pmpm = tiers[0][1]
-        for min_n, tier_pmpm in tiers:
-            if active_patients >= min_n:
-                pmpm = tier_pmpm
-            else:
-                break
-        return pmpm
-    return float(vcfg.flat_pmpm or 0.0)
+    thresholds: Tuple[int, ...]
+    pmpm: Tuple[float, ...]
+
+    def __post_init__(self):
+        for name in ("thresholds", "pmpm"):
+            arr = np.array(getattr(self, name))
+            arr.flags.writeable = False
+            object.__setattr__(self, "_" + name, arr)
+
+    @classmethod
+    def from_vendor(cls, vcfg: VendorConfig) -> "PmpmTable":
+        if vcfg.tiers:
+            tiers = sorted(vcfg.tiers, key=lambda x: x[0])
+            return cls(tuple(t[0] for t in tiers), tuple(float(t[1]) for t in tiers))
+        return cls((0,), (float(vcfg.flat_pmpm or 0.0),))
+
+    def lookup(self, active_patients):
+        """
+        PMPM for a patient count or an array of them: the highest threshold
+        <= patients wins; counts below every threshold get the first tier.
+        """
+        if isinstance(active_patients, (int, np.integer)):
+            return self.pmpm[max(bisect_right(self.thresholds, active_patients) - 1, 0)]
+        idx = np.searchsorted(self._thresholds, active_patients, side="right") - 1
+        return self._pmpm[np.maximum(idx, 0)]
 
 def default_rates():
     """
@@ -152,6 +176,65 @@ def default_multi_state_config():
         "California": {"start_month": 42, "initial_patients": 500, "initial_homes": 70, "gpci": 1.10, "active": False},  # West coast expansion
     }
 
+# State registry: per-state market data the engines and apps look up by
+# integer state id instead of branching on state names.
+#   (state, start month, initial patients, homes, GPCI, market cap, steady-state intake)
+# The home market's cap is settings["max_patients"]; it also has its own
+# growth phases and no launch setup cost. Unlisted states use _STATE_DEFAULTS.
+HOME_MARKET = "Virginia"
+_STATE_TABLE = [
+    ("Virginia",    1, 100, 40, 1.00, 19965, 300),
+    ("Florida",    25, 500, 60, 1.05, 25000, 400),   # larger retiree population
+    ("Texas",      30, 500, 80, 1.03, 30000, 350),
+    ("New York",   36, 500, 50, 1.08, 20000, 300),
+    ("California", 42, 500, 70, 1.10, 25000, 400),
+]
+_STATE_DEFAULTS = (None, 1, 500, 50, 1.00, 20000, 300)
+
+@dataclass(frozen=True)
+class StateRegistry:
+    """
+    Column arrays over the registry states; position i is state id i and the
+    extra last position holds the defaults, so id -1 (unknown state) resolves
+    to them with plain indexing.
+    """
+    names: Tuple[str, ...]
+    start_month: np.ndarray
+    initial_patients: np.ndarray
+    homes: np.ndarray
+    gpci: np.ndarray
+    market_cap: np.ndarray
+    intake: np.ndarray
+    home_market: np.ndarray
+
+    def ids(self, states):
+        """Integer ids for state names (-1 for states not in the registry)."""
+        index = {name: i for i, name in enumerate(self.names)}
+        return np.array([index.get(s, -1) for s in states], dtype=np.int64)
+
+    def gpci_for(self, states):
+        return dict(zip(states, self.gpci[self.ids(states)].tolist()))
+
+    def homes_for(self, states):
+        return dict(zip(states, self.homes[self.ids(states)].tolist()))
+
+    def market_caps(self, states, home_cap):
+        """Per-state patient caps as a list; the home market's is home_cap (settings["max_patients"])."""
+        ids = self.ids(states)
+        return [home_cap if home else cap
+                for home, cap in zip(self.home_market[ids].tolist(), self.market_cap[ids].tolist())]
+
+@lru_cache(maxsize=1)
+def state_registry() -> StateRegistry:
+    """The compiled state registry (built once, shared; arrays are read-only)."""
+    rows = _STATE_TABLE + [_STATE_DEFAULTS]
+    columns = list(zip(*rows))
+    arrays = [np.array(col) for col in columns[1:]]
+    arrays.append(np.array([name == HOME_MARKET for name in columns[0]]))
+    for arr in arrays:
+        arr.flags.writeable = False
+    return StateRegistry(tuple(columns[0][:-1]), *arrays)
+
 def default_settings():
     """
     Model settings including growth, costs, and working capital assumptions.
@@ -172,6 +255,7 @@ def default_settings():
         "target_capture_rate": 1.0,    # Target 100% capture of eligible patients
         "post_pilot_monthly_intake": 840,  # Calculated: 1200 * 0.70
         "monthly_attrition": 0.03, # 3% monthly attrition (realistic for post-discharge patients)
+        "variation_seed": 42,      # Seed for the ±10% steady-state intake variation (reproducible runs)
         "initial_homes": 40,
         "home_growth_per_year": 1,
         "patients_per_home_growth": 0.05,
@@ -252,10 +336,387 @@ def _merge_vendor_overrides(base: VendorConfig, ov: dict | None) -> VendorConfig
     capex = ov.get("dev_capex", base.dev_capex)
     return VendorConfig(base.name, tiers, flat, fee, kits, capex)
 
+_VENDOR_CACHE_SIZE = 64
+_vendor_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_vendor_cache_lock = threading.Lock()
+
+def compiled_vendors(vendor_overrides: dict | None = None):
+    """
+    (presets, tables): vendor presets with overrides applied and their
+    PmpmTables, keyed by vendor name.
+
+    Compiled once per distinct overrides content and shared across runs, so
+    treat both dicts and the VendorConfigs in them as read-only.
+    """
+    key = json.dumps(_canonical(vendor_overrides or {}), sort_keys=True, default=str)
+    with _vendor_cache_lock:
+        hit = _vendor_cache.get(key)
+        if hit is not None:
+            _vendor_cache.move_to_end(key)
+            return hit
+
+    presets = default_vendor_presets()
+    for k, v in (vendor_overrides or {}).items():
+        if k in presets:
+            presets[k] = _merge_vendor_overrides(presets[k], v)
+    compiled = (presets, {k: PmpmTable.from_vendor(v) for k, v in presets.items()})
+
+    with _vendor_cache_lock:
+        _vendor_cache[key] = compiled
+        while len(_vendor_cache) > _VENDOR_CACHE_SIZE:
+            _vendor_cache.popitem(last=False)
+    return compiled
+
+@dataclass(frozen=True)
+class Schedule:
+    """
+    A month-indexed parameter value, accepted wherever a scheduled setting,
+    utilization rate or billing rate / multiplier takes a number (see
+    _SCHEDULED_SETTINGS):
+
+      Schedule.step({1: 52.50, 13: 53.90})        # value from each month on
+      Schedule.ramp({1: 0.55, 24: 0.70})           # linear between months
+      Schedule.annual(52.50, 0.02)                 # compounding yearly update
+      Schedule.array([...])                        # explicit; a plain list works too
+
+    Before the first point (and after the last) the nearest value holds; an
+    explicit array shorter than the horizon keeps its last value.
+    """
+    kind: str
+    points: Tuple[Tuple[float, float], ...]
+
+    @classmethod
+    def step(cls, steps):
+        return cls("step", tuple(sorted((int(m), float(v)) for m, v in dict(steps).items())))
+
+    @classmethod
+    def ramp(cls, points):
+        return cls("ramp", tuple(sorted((int(m), float(v)) for m, v in dict(points).items())))
+
+    @classmethod
+    def annual(cls, value, growth):
+        return cls("annual", ((float(value), float(growth)),))
+
+    @classmethod
+    def array(cls, values):
+        return cls("array", tuple(enumerate(np.asarray(values, dtype=float).tolist(), start=1)))
+
+    def values(self, months):
+        """Per-month values for months 1..months as a float array."""
+        month_idx = np.arange(1, months+1)
+        pts = np.array(self.points, dtype=float).reshape(-1, 2)
+        if self.kind == "step":
+            at = np.searchsorted(pts[:, 0], month_idx, side="right") - 1
+            return pts[np.maximum(at, 0), 1]
+        if self.kind == "ramp":
+            return np.interp(month_idx, pts[:, 0], pts[:, 1])
+        if self.kind == "annual":
+            (value, growth), = self.points
+            return value * (1 + growth) ** ((month_idx - 1) // 12)
+        if self.kind == "array":
+            return pts[np.minimum(month_idx, len(pts)) - 1, 1]
+        raise ValueError(f"Unknown schedule kind: {self.kind!r}")
+
+# Values taken as a schedule rather than a scalar: a Schedule or an explicit per-month sequence
+_SCHEDULE_TYPES = (Schedule, list, tuple, np.ndarray)
+
+def _month_values(value, months):
+    """A scalar, Schedule or per-month sequence as a read-only months-long array."""
+    if isinstance(value, Schedule):
+        return _read_only(value.values(months))
+    if isinstance(value, _SCHEDULE_TYPES):
+        return _read_only(Schedule.array(value).values(months))
+    return _constant_months(value, type(value), months)
+
+@lru_cache(maxsize=1024)
+def _constant_months(value, value_type, months):
+    # shared read-only arrays: most scenarios repeat the same scalar settings
+    return _read_only(np.full(months, value))
+
+def _read_only(a):
+    a.setflags(write=False)
+    return a
+
+# One value per month, index m-1 (see ModelParams)
+Monthly = np.ndarray
+
+# Settings that may be a Schedule (besides every utilization rate and each
+# billing code's rate and multiplier). Everything else is one value per run.
+_SCHEDULED_SETTINGS = [
+    "monthly_attrition",
+    "device_recovery_rate", "device_refurb_cost", "device_logistics_cost",
+    "own_it_annual_cost", "own_hardware_unit_cost",
+    "overhead_base", "overhead_per_patient", "marketing_budget_percent", "overhead_cap",
+    "clinical_staff_pmpm", "family_care_liaisons_pmpm", "admin_staff_pmpm",
+    "medical_director_base_salary", "medical_director_additional_state", "ai_efficiency_factor",
+    "head_of_state_salary", "manager_salary", "state_licensing_annual", "state_setup_cost",
+]
+
+# Engine settings that default_settings() leaves out, with their defaults
+_EXTRA_SETTING_DEFAULTS = {
+    "max_patients": 19965,
+    "growth_multiplier": 1.3,
+    "enhanced_billing": False,
+    "states_per_medical_director": 3,
+}
+
+# Utilization key of each billing code; codes not listed here (the
+# theoretical ones) use their own name as the key.
+_CODE_UTIL = {"99453": "rpm_setup", "99454": "rpm_16day", "99457": "rpm_20min",
+              "99458": "rpm_40min", "99091": "md_99091", "99490": "ccm_99490",
+              "99439": "ccm_99439", "99487": "ccm_99487", "99489": "ccm_99489",
+              "99426": "pcm_99426", "99427": "pcm_99427",
+              "99495": "tcm_99495", "99496": "tcm_99496"}
+# Complex CCM codes, billed only with settings["enhanced_billing"]
+_ENHANCED_CODES = ("99487", "99489")
+# Billing codes reported as their own Rev_<code> column
+_REPORTED_CODES = ["99453", "99454", "99457", "99458", "99091",
+                   "99490", "99439", "99495", "99496"]
+
+@dataclass(frozen=True, slots=True)
+class ModelParams:
+    """
+    One run's settings/util/rates with every default resolved and derived
+    constants precomputed (see compile_params). Immutable, so engines can
+    share it across threads and batch scenarios.
+
+    Monthly fields are read-only arrays with one value per month (index
+    m-1), whether or not the input was a Schedule, so engines never branch
+    on it.
+    """
+    months: int
+    initial_cash: float
+    variation_seed: int
+    # patient growth
+    attrition: Monthly
+    pilot_months: int
+    initial_intake: int
+    target_intake: int
+    growth_mult: float
+    market_target: float
+    pph_growth: float
+    homes_per_year: float
+    # revenue, one entry per billing code (see _billing_terms)
+    billing_codes: Tuple[str, ...]
+    billing_coef: np.ndarray   # (months, codes)
+    billing_per_active: Tuple[bool, ...]
+    collection: Monthly
+    rpm_minutes_per_patient: Monthly
+    ar_months: float
+    # vendors and infrastructure
+    presets: Mapping[str, VendorConfig]
+    pmpm_tables: Mapping[str, PmpmTable]
+    kit_cost: Mapping[str, float]
+    initial_vendor: str
+    migration_month: Optional[int]
+    own_infra_month: int
+    own_platform: Monthly
+    own_hardware_unit_cost: Monthly
+    infrastructure_capex: float
+    recovery_rate: Monthly
+    refurb_cost: Monthly
+    logistics_cost: Monthly
+    # overhead
+    overhead_base: Monthly
+    overhead_per_patient: Monthly
+    marketing_pct: Monthly
+    overhead_cap: Monthly
+    # staffing
+    staff_fte: float
+    staff_fte_growth: float
+    staff_minutes: float
+    clinical_pmpm: Monthly
+    family_pmpm: Monthly
+    admin_pmpm: Monthly
+    states_per_director: int
+    director_base: Monthly
+    director_additional: Monthly
+    ai_efficiency: Monthly
+    # regional management
+    head_of_state_salary: Monthly
+    patients_per_manager: int
+    manager_salary: Monthly
+    licensing_monthly: Monthly
+    state_setup_cost: Monthly
+
+def _check(ok, key, value, requirement):
+    if not ok:
+        raise ValueError(f"{key} must be {requirement}, got {value!r}")
+
+def _holds(value, values, test):
+    """test on a scalar setting, or on every month of a scheduled one."""
+    if isinstance(value, _SCHEDULE_TYPES):
+        return bool(np.all(test(values)))
+    return test(value)
+
+def _billing_terms(rates, util, settings, months):
+    """
+    The revenue code vector: (codes, coef, per_active) in rates order, with
+    coef a read-only (months, codes) array.
+
+    coef is rate * multiplier * utilization, any of which may be a Schedule,
+    or 0 for codes switched off (complex CCM without enhanced_billing,
+    theoretical codes without include_theoretical) and for codes with no
+    utilization rate in util, which are skipped. Monthly codes (per_active)
+    bill GPCI-adjusted active patients; setup and one-time codes bill new
+    patients.
+    """
+    codes, per_active, constant, scheduled = [], [], [], {}
+    for k, (code, r) in enumerate(rates.items()):
+        key = _CODE_UTIL.get(code, code)
+        if code in _ENHANCED_CODES:
+            billed = settings["enhanced_billing"]
+        else:
+            billed = settings["include_theoretical"] or not r.get("theoretical", False)
+        billed = billed and key in util
+        rate, mult, use = r["rate"], r["multiplier"], util.get(key, 0.0)
+        if billed and (isinstance(rate, _SCHEDULE_TYPES) or isinstance(mult, _SCHEDULE_TYPES)
+                       or isinstance(use, _SCHEDULE_TYPES)):
+            scheduled[k] = (_month_values(rate, months) * _month_values(mult, months)
+                            * _month_values(use, months))
+        constant.append(rate * mult * use if billed and k not in scheduled else 0.0)
+        codes.append(code)
+        per_active.append(r["type"] == "monthly")
+    coef = np.broadcast_to(np.array(constant), (months, len(constant)))
+    if scheduled:
+        coef = coef.copy()
+        for k, values in scheduled.items():
+            coef[:, k] = values
+    return tuple(codes), _read_only(coef), tuple(per_active)
+
+def _revenue_by_code(coef, per_active, gpci, total, new):
+    """
+    Gross revenue of every billing code, shaped (codes, scenarios, months, states).
+
+    coef is (scenarios, months, codes), per_active (codes,), gpci
+    (scenarios, states) and total / new patients (scenarios, months, states).
+    One einsum weighs the two patient bases (GPCI-adjusted active, new) with
+    each month's code vector.
+    """
+    weights = np.zeros(coef.shape[:2] + (2, coef.shape[2]))
+    weights[:, :, 0] = np.where(per_active, coef, 0.0)
+    weights[:, :, 1] = np.where(per_active, 0.0, coef)
+    basis = np.stack([gpci[:, None, :] * total, new], axis=-1)
+    return np.einsum("nmsb,nmbk->knms", basis, weights, order="C", optimize=True)
+
+def compile_params(settings, util, rates) -> ModelParams:
+    """
+    Resolve a run's inputs into ModelParams.
+
+    Missing settings fall back to default_settings() (or _EXTRA_SETTING_DEFAULTS)
+    and missing utilization rates to default_util(), so each default is
+    defined in one place. Raises ValueError for values the engines can't use.
+    """
+    s = {**default_settings(), **_EXTRA_SETTING_DEFAULTS, **settings}
+    u = {**default_util(), **util}
+
+    months = s["months"]
+    _check(isinstance(months, (int, np.integer)) and months >= 1, "months", months, "a positive integer")
+    # default_settings() spells the medical director salaries medical_directors_*
+    s.setdefault("medical_director_base_salary", s["medical_directors_base"])
+    s.setdefault("medical_director_additional_state", s["medical_directors_per_state"])
+    monthly = {key: _month_values(s[key], months) for key in _SCHEDULED_SETTINGS}
+    monthly.update({key: _month_values(u[key], months) for key in ("collection_rate", "rpm_20min", "rpm_40min")})
+
+    attrition = monthly["monthly_attrition"]
+    _check(_holds(s["monthly_attrition"], attrition, lambda a: (0 <= a) & (a < 1)),
+           "monthly_attrition", s["monthly_attrition"], "in [0, 1)")
+    collection = monthly["collection_rate"]
+    _check(_holds(u["collection_rate"], collection, lambda c: (0 <= c) & (c <= 1)),
+           "collection_rate", u["collection_rate"], "in [0, 1]")
+    _check(_holds(s["ai_efficiency_factor"], monthly["ai_efficiency_factor"], lambda e: e > 0),
+           "ai_efficiency_factor", s["ai_efficiency_factor"], "positive")
+    _check(s["states_per_medical_director"] >= 1, "states_per_medical_director",
+           s["states_per_medical_director"], ">= 1")
+    _check(s["patients_per_manager"] > 0, "patients_per_manager", s["patients_per_manager"], "positive")
+    migration_month = s["migration_month"]
+    _check(migration_month is None or migration_month >= 1, "migration_month", migration_month, "None or >= 1")
+
+    presets, tables = compiled_vendors(s["vendor_overrides"])
+    _check(s["initial_vendor"] in presets, "initial_vendor", s["initial_vendor"], f"one of {list(presets)}")
+    selected = s["vendor_selected_kit"]
+    kit_cost = {v: (vcfg.hardware_kits or {}).get(selected.get(v), 0.0) for v, vcfg in presets.items()}
+
+    billing_codes, billing_coef, billing_per_active = _billing_terms({**default_rates(), **rates}, u, s, months)
+
+    medicare_pct = s["payer_mix_medicare"]
+    blended_dso = (medicare_pct * s["dso_medicare"]) + ((1 - medicare_pct) * s["dso_commercial"])
+    discharges = s["hill_valley_monthly_discharges"]
+
+    return ModelParams(
+        months=months,
+        initial_cash=s["initial_cash"],
+        variation_seed=s["variation_seed"],
+        attrition=attrition,
+        pilot_months=s["pilot_months"],
+        initial_intake=int(discharges * s["initial_capture_rate"]),
+        target_intake=int(discharges * s["target_capture_rate"]),
+        growth_mult=s["growth_multiplier"],
+        market_target=s["max_patients"],
+        pph_growth=s["patients_per_home_growth"],
+        homes_per_year=s["home_growth_per_year"],
+        billing_codes=billing_codes,
+        billing_coef=billing_coef,
+        billing_per_active=billing_per_active,
+        collection=collection,
+        rpm_minutes_per_patient=_read_only(20*monthly["rpm_20min"] + 20*monthly["rpm_40min"]),
+        ar_months=min(blended_dso / 45, 1.0),
+        presets=MappingProxyType(presets),
+        pmpm_tables=MappingProxyType(tables),
+        kit_cost=MappingProxyType(kit_cost),
+        initial_vendor=s["initial_vendor"],
+        migration_month=None if migration_month is None else int(migration_month),
+        own_infra_month=s["own_infrastructure_month"],
+        own_platform=_read_only(monthly["own_it_annual_cost"] / 12),
+        own_hardware_unit_cost=monthly["own_hardware_unit_cost"],
+        infrastructure_capex=s["infrastructure_capex"],
+        recovery_rate=monthly["device_recovery_rate"],
+        refurb_cost=monthly["device_refurb_cost"],
+        logistics_cost=monthly["device_logistics_cost"],
+        overhead_base=monthly["overhead_base"],
+        overhead_per_patient=monthly["overhead_per_patient"],
+        marketing_pct=monthly["marketing_budget_percent"],
+        overhead_cap=monthly["overhead_cap"],
+        staff_fte=s["staff_fte"],
+        staff_fte_growth=s["staff_fte_growth_every_12m"],
+        staff_minutes=s["staff_minutes_available_per_month"],
+        clinical_pmpm=monthly["clinical_staff_pmpm"],
+        family_pmpm=monthly["family_care_liaisons_pmpm"],
+        admin_pmpm=monthly["admin_staff_pmpm"],
+        states_per_director=s["states_per_medical_director"],
+        director_base=monthly["medical_director_base_salary"],
+        director_additional=monthly["medical_director_additional_state"],
+        ai_efficiency=monthly["ai_efficiency_factor"],
+        head_of_state_salary=monthly["head_of_state_salary"],
+        patients_per_manager=s["patients_per_manager"],
+        manager_salary=monthly["manager_salary"],
+        licensing_monthly=_read_only(monthly["state_licensing_annual"] / 12),
+        state_setup_cost=monthly["state_setup_cost"],
+    )
+
+@lru_cache(maxsize=4096)
+def _state_variation(seed, months, state):
+    """One state's ±10% intake variation over `months` (read-only, shared)."""
+    key = int.from_bytes(hashlib.sha256(state.encode()).digest()[:8], "little")
+    return _read_only(np.random.default_rng([seed, key]).uniform(0.9, 1.1, size=months))
+
+def _intake_variation(seed, months, state_names):
+    """
+    ±10% steady-state intake variation as a (months x states) array.
+
+    Each state draws from its own Generator seeded with
+    (settings["variation_seed"], state name): the same seed reproduces the
+    same run, a state's draws don't depend on which other states are in the
+    scenario or their order, and batch / Monte Carlo scenarios with different
+    seeds get independent streams.
+    """
+    columns = [_state_variation(seed, months, state) for state in state_names]
+    return np.column_stack(columns) if columns else np.empty((months, 0))
+
 def _patients_per_home(month, annual_growth):
     return 20 * (1+annual_growth) ** ((month-1)//12)
 
-def _calculate_enhanced_staffing_costs(active_patients, active_states, settings):
+def _calculate_enhanced_staffing_costs(active_patients, active_states, params, month):
     """
     Enhanced staffing model with specialized roles and AI efficiency gains.
     
@@ -268,20 +729,20 @@ def _calculate_enhanced_staffing_costs(active_patients, active_states, settings)
     # Core clinical staffing - Use actual settings values
     # With software: 1 RN per 350 patients. RN cost ~$90k/year = $7500/month
     # So PMPM = $7500 / 350 = ~$21.43 PMPM
-    clinical_cost = settings.get("clinical_staff_pmpm", 21.43) * active_patients
+    clinical_cost = params.clinical_pmpm[month-1] * active_patients
     
     # Family Care Liaisons for patient/family engagement
-    family_liaison_cost = settings.get("family_care_liaisons_pmpm", 10.0) * active_patients
+    family_liaison_cost = params.family_pmpm[month-1] * active_patients
     
     # Administrative support with AI automation (1:150 ratio)
-    admin_cost = settings.get("admin_staff_pmpm", 15.0) * active_patients
+    admin_cost = params.admin_pmpm[month-1] * active_patients
     
     # Medical Directors (1 per 3 states, base + additional)
-    states_per_director = settings.get("states_per_medical_director", 3)
+    states_per_director = params.states_per_director
     directors_needed = max(1, (len(active_states) + states_per_director - 1) // states_per_director)
     
-    base_director_salary = settings.get("medical_director_base_salary", 70000)
-    additional_state_cost = settings.get("medical_director_additional_state", 15000)
+    base_director_salary = params.director_base[month-1]
+    additional_state_cost = params.director_additional[month-1]
     
     # Calculate medical director costs: base for first 3 states, additional for excess
     excess_states = max(0, len(active_states) - 3 * directors_needed)
@@ -290,30 +751,22 @@ def _calculate_enhanced_staffing_costs(active_patients, active_states, settings)
     director_monthly_cost = director_annual_cost / 12
     
     # Apply AI efficiency factor (15% reduction through automation)
-    ai_efficiency = settings.get("ai_efficiency_factor", 0.85)
+    ai_efficiency = params.ai_efficiency[month-1]
     total_before_ai = clinical_cost + family_liaison_cost + admin_cost + director_monthly_cost
     total_after_ai = total_before_ai * ai_efficiency
     
     return total_after_ai
 
-def _calculate_working_capital(monthly_revenue, monthly_costs, settings):
+def _calculate_working_capital(monthly_revenue, monthly_costs, params):
     """
     Realistic RPM/CCM working capital for established healthcare business.
     
     Returns dict with A/R, Inventory, A/P, and Net Working Capital
     """
-    # Conservative working capital for established RPM business
-    medicare_pct = settings.get("payer_mix_medicare", 0.65)  
-    commercial_pct = 1 - medicare_pct
-    dso_medicare = settings.get("dso_medicare", 45)
-    dso_commercial = settings.get("dso_commercial", 75)
-    
-    blended_dso = (medicare_pct * dso_medicare) + (commercial_pct * dso_commercial)
-    
-    # More conservative A/R calculation for established business
-    # RPM payments are more predictable than typical healthcare
-    ar_months = min(blended_dso / 45, 1.0)  # Cap at 1 month, use 45-day divisor
-    accounts_receivable = monthly_revenue * ar_months
+    # Conservative working capital for established RPM business: A/R is
+    # params.ar_months of revenue, the blended Medicare/commercial DSO over a
+    # 45-day divisor, capped at 1 month (see compile_params)
+    accounts_receivable = monthly_revenue * params.ar_months
     
     # RPM businesses have minimal other working capital needs
     inventory = 0  # Devices shipped direct, no inventory holding
@@ -331,55 +784,125 @@ def _calculate_working_capital(monthly_revenue, monthly_costs, settings):
     }
 
 def run_projection(
+    states, gpci, homes, rates, util, settings, engine="numpy", output="frame",
+    exact=True, executor=None, columns=None, workers=None,
+):
+    """
+    Multi-state monthly projection.
+
+    engine="numpy" (default) evaluates whole state-by-month arrays at once;
+    engine="python" runs the original month x state loop. Both return the
+    same result (identical values, same rows and column order).
+
+    output="frame" (default) returns a DataFrame; output="columns" returns the
+    underlying ProjectionColumns buffers for callers that don't need pandas;
+    output="cube" returns a ProjectionCube with memoized monthly, state,
+    yearly and quarterly rollups.
+
+    exact=False (numpy engine only) solves the patient recurrence in closed
+    form instead of month by month: faster on long horizons, and patient
+    counts land within a few patients of the exact result (see
+    _patient_arrays_relaxed).
+
+    executor (numpy engine only): a concurrent.futures thread or process
+    pool to run the per-state phase on, one chunk of states per worker (see
+    _projection_grids); results are unchanged. Worth it for large state counts.
+    workers: how many state chunks to split into for the executor (default
+    os.cpu_count()); match it to the pool size.
+
+    columns: output columns to compute (names from PROJECTION_COLUMNS);
+    the result keeps Month, State and Year alongside them, in
+    PROJECTION_COLUMNS order. The numpy engine evaluates only what those
+    columns depend on (see _GRID_NODES); the python engine computes
+    everything and drops the rest.
+    """
+    if output not in ("frame", "columns", "cube"):
+        raise ValueError(f"Unknown projection output: {output!r}")
+    if columns is not None:
+        unknown = [name for name in columns if name not in PROJECTION_COLUMNS + ["Year"]]
+        if unknown:
+            raise ValueError(f"Unknown projection columns: {unknown}")
+        columns = [name for name in columns if name not in ("Month", "State", "Year")]
+    if engine == "numpy":
+        cols = _run_projection_numpy(states, gpci, homes, rates, util, settings, exact, executor, columns,
+                                     workers)
+    elif engine == "python":
+        if not exact:
+            raise ValueError("exact=False requires engine='numpy'")
+        cols = _run_projection_loop(states, gpci, homes, rates, util, settings)
+        if columns is not None:
+            cols = _projection_columns({name: cols.columns[name] for name in ["Month", "State"] + columns},
+                                       cols.categories["State"])
+    else:
+        raise ValueError(f"Unknown projection engine: {engine!r}")
+    if output == "cube":
+        return ProjectionCube(cols)
+    return cols if output == "columns" else cols.to_frame()
+
+def _run_projection_loop(
     states, gpci, homes, rates, util, settings,
 ):
     """
+    Reference month x state loop.
+
     Uses vendor pricing with:
       - Impilo: tiered PMPM + monthly software fee + chosen kit per new patient, NO CAPEX
       - CareSimple: flat PMPM + monthly software fee + chosen kit per new, NO CAPEX
       - Ora: flat PMPM + chosen kit per new + ONE-TIME dev CAPEX when Ora becomes active
     """
-    months = settings["months"]
-    pph_growth = settings["patients_per_home_growth"]
-    homes_per_year = settings["home_growth_per_year"]
-    cash = settings["initial_cash"]
-    overhead_base = settings["overhead_base"]
-    overhead_cap = settings["overhead_cap"]
-
-    include_pcm = bool(settings.get("include_pcm", False))
+    # Every setting resolved once, defaults included (see compile_params)
+    prm = compile_params(settings, util, rates)
+    months = prm.months
+    pph_growth = prm.pph_growth
+    homes_per_year = prm.homes_per_year
+    cash = prm.initial_cash
+    # each month's revenue code vector as (code, coef, per_active) terms
+    billing = [tuple(zip(prm.billing_codes, row, prm.billing_per_active))
+               for row in prm.billing_coef.tolist()]
 
     # Vendor presets + overrides
-    _presets = default_vendor_presets()
-    if settings.get("vendor_overrides"):
-        for k,v in settings["vendor_overrides"].items():
-            if k in _presets:
-                _presets[k] = _merge_vendor_overrides(_presets[k], v)
+    _presets, _pmpm_tables = prm.presets, prm.pmpm_tables
 
-    initial_vendor = settings.get("initial_vendor", "Impilo")
-    migration_month = settings.get("migration_month", None)
+    initial_vendor = prm.initial_vendor
+    migration_month = prm.migration_month
 
     total_patients = {s: 0 for s in states}
-    rows = []
 
-    staff_fte = settings["staff_fte"]
-    staff_minutes_available = settings["staff_minutes_available_per_month"]
-    staffing_pmpm = settings.get("staffing_pmpm", 66.0)
+    # Per-state registry lookups, resolved once instead of by name each month
+    registry = state_registry()
+    state_ids = registry.ids(states)
+    home_market = registry.home_market[state_ids].tolist()
+    market_caps = registry.market_caps(states, prm.market_target)
+    steady_intake = registry.intake[state_ids].tolist()
+
+    # Output buffers, one row per active (month, state); at most months x states rows
+    capacity = months * len(states)
+    int_rows = np.empty((len(_LOOP_INT_COLUMNS), capacity), dtype=np.int64)
+    value_rows = np.empty((len(_VALUE_COLUMNS), capacity))
+    n_rows = 0
+
+    staff_fte = prm.staff_fte
+    staff_minutes_available = prm.staff_minutes
     
     # Track working capital properly (cumulative, company-wide)
     prev_total_nwc = 0
 
     dev_capex_done = False
+
+    # Steady-state intake variation, drawn once for every (month, state)
+    intake_variation = _intake_variation(prm.variation_seed, months, list(states))
     
     # Company-wide cash tracking
     month_cash_flows = {}  # Track cash flows by month to avoid double-counting
+    cash_ledger = np.zeros(months)  # Closing cash per month, joined onto rows at the end
 
     for m in range(1, months+1):
         # staff ramp yearly
         if m > 1 and (m-1) % 12 == 0:
-            staff_fte += settings["staff_fte_growth_every_12m"]
+            staff_fte += prm.staff_fte_growth
 
         # Which vendor is active this month?
-        if migration_month is not None and m >= int(migration_month):
+        if migration_month is not None and m >= migration_month:
             vcfg = _presets["Ora"]
             vendor_name = "Ora"
             dev_capex = (0 if dev_capex_done else vcfg.dev_capex)
@@ -401,7 +924,7 @@ def run_projection(
 
         # Iterate states
         active_states = [s for s,conf in states.items() if m >= conf["start_month"]]
-        for state, conf in states.items():
+        for state_idx, (state, conf) in enumerate(states.items()):
             if m < conf["start_month"]:
                 continue
 
@@ -410,7 +933,7 @@ def run_projection(
             pph = 20 * (1+pph_growth)**((m-1)//12)
             # Set realistic max capacity - hard cap for Virginia
             theoretical_capacity = int(homes_now * pph)
-            if state == "Virginia":
+            if home_market[state_idx]:
                 max_patients = min(25000, theoretical_capacity + 20000)  # Virginia capped at 25K patients
             else:
                 max_patients = max(theoretical_capacity, 50000)  # Other states capped at 50K
@@ -422,23 +945,17 @@ def run_projection(
                 total_patients[state] = new_pts
             else:
                 # REFUA MODEL - Hill Valley Partnership Growth Logic
-                monthly_attrition = settings.get("monthly_attrition", 0.03)
-                attrition_pts = int(total_patients[state] * monthly_attrition)
+                attrition_pts = int(total_patients[state] * prm.attrition[m-1])
                 
                 # Different growth phases
-                pilot_months = settings.get("pilot_months", 6)
-                post_pilot_intake = settings.get("post_pilot_monthly_intake", 400)
+                pilot_months = prm.pilot_months
                 
                 # Growth logic applies to all states now (not just Virginia)
                 if True:  # All states use discharge-based growth model
                     # PARTNERSHIP CONTINUOUS FLOW MODEL (each state has nursing home partnerships)
-                    hill_valley_discharges = settings.get("hill_valley_monthly_discharges", 1200)  # Base discharge rate
-                    initial_capture = settings.get("initial_capture_rate", 0.70)  # Higher initial capture
-                    target_capture = settings.get("target_capture_rate", 1.0)
-                    
-                    # Calculate intake rates based on capture percentages
-                    initial_intake = int(hill_valley_discharges * initial_capture)  # 840
-                    target_intake = int(hill_valley_discharges * target_capture)    # 1200
+                    # Intake rates from Hill Valley discharges x capture rates (840 / 1200 by default)
+                    initial_intake = prm.initial_intake
+                    target_intake = prm.target_intake
                     
                     if m <= pilot_months:
                         # Pilot phase: stronger start to build momentum
@@ -455,20 +972,17 @@ def run_projection(
                     elif m <= 36:
                         # Growth phase: capturing full discharge volume plus expansion
                         # Use configurable multiplier to reach target
-                        growth_mult = settings.get("growth_multiplier", 1.3)
-                        new_pts = int(target_intake * growth_mult)
+                        new_pts = int(target_intake * prm.growth_mult)
                     else:
                         # STEADY STATE: Capturing target percentage of Hill Valley discharges
                         base_intake = target_intake
                         
                         # Add some realistic variation (±10%)
-                        import random
-                        random.seed(m)  # Consistent randomness based on month
-                        monthly_variation = random.uniform(0.9, 1.1)
+                        monthly_variation = intake_variation[m-1, state_idx]
                         
                         # CONTINUOUS FLOW MODEL - Cap at market target
                         # Virginia has 100 nursing homes continuously discharging patients
-                        market_target = settings.get("max_patients", 19965)  # Allow override
+                        market_target = prm.market_target  # Allow override
                         
                         if total_patients[state] >= market_target:
                             # At target - just maintain patient base
@@ -499,20 +1013,11 @@ def run_projection(
                         new_pts = max(100, int(state_intake * ramp_factor))
                     else:
                         # STEADY STATE: Every state has continuous SNF/ALF discharge flow!
-                        state_intake = 300  # Base intake per state from partnerships
+                        # Intake scales with state size (see _STATE_TABLE)
+                        state_intake = steady_intake[state_idx]
                         
                         # Add realistic variation
-                        import random
-                        random.seed(m + hash(state))  # Unique randomness per state
-                        monthly_variation = random.uniform(0.9, 1.1)
-                        
-                        # Scale based on state size
-                        if state == "Florida":
-                            state_intake = 400  # Larger retiree population
-                        elif state == "Texas":
-                            state_intake = 350  # Big state
-                        elif state == "California":
-                            state_intake = 400  # Huge market
+                        monthly_variation = intake_variation[m-1, state_idx]
                         
                         # As state matures, find equilibrium
                         if total_patients[state] > 5000:
@@ -529,26 +1034,8 @@ def run_projection(
                 new_total = total_patients[state] - attrition_pts + new_pts
                 
                 # Cap at market target if specified 
-                # Each state has its own market cap
-                if state == "Virginia":
-                    market_cap = settings.get("max_patients", 19965)
-                    new_total = min(new_total, market_cap)
-                elif state == "Florida":
-                    # Florida can grow to its market potential
-                    florida_cap = 25000  # Florida market cap
-                    new_total = min(new_total, florida_cap)
-                elif state == "Texas":
-                    texas_cap = 30000  # Texas is huge
-                    new_total = min(new_total, texas_cap)
-                elif state == "New York":
-                    ny_cap = 20000  # NY market cap
-                    new_total = min(new_total, ny_cap)
-                elif state == "California":
-                    ca_cap = 25000  # CA market cap
-                    new_total = min(new_total, ca_cap)
-                else:
-                    # Default cap for other states
-                    new_total = min(new_total, 20000)
+                # Each state has its own market cap (see _STATE_TABLE)
+                new_total = min(new_total, market_caps[state_idx])
                 
                 total_patients[state] = max(0, new_total)
             
@@ -559,70 +1046,40 @@ def run_projection(
             
             active_pts = total_patients[state]
 
-            # --- revenue calculation with multipliers ---
-            include_theoretical = settings.get("include_theoretical", False)
-            
-            # CORE RPM REVENUE (Standard billing per CMS guidelines)
-            rev_setup = rates["99453"]["rate"] * rates["99453"]["multiplier"] * util["rpm_setup"] * new_pts
-            rev_99454 = g * rates["99454"]["rate"] * rates["99454"]["multiplier"] * util["rpm_16day"] * active_pts  
-            rev_99457 = g * rates["99457"]["rate"] * rates["99457"]["multiplier"] * util["rpm_20min"] * active_pts
-            rev_99458 = g * rates["99458"]["rate"] * rates["99458"]["multiplier"] * util["rpm_40min"] * active_pts  # Uses 1.35x multiplier
-            rev_99091 = g * rates["99091"]["rate"] * rates["99091"]["multiplier"] * util["md_99091"] * active_pts
-            
-            # CORE CCM & PCM REVENUE (Standard billing per CMS guidelines)
-            rev_99490 = g * rates["99490"]["rate"] * rates["99490"]["multiplier"] * util["ccm_99490"] * active_pts
-            rev_99439 = g * rates["99439"]["rate"] * rates["99439"]["multiplier"] * util["ccm_99439"] * active_pts  # Uses 1.2x multiplier
-            
-            # PCM REVENUE (Principal Care Management - standard for single chronic conditions)
-            rev_99426 = g * rates["99426"]["rate"] * rates["99426"]["multiplier"] * util.get("pcm_99426", 0.15) * active_pts
-            rev_99427 = g * rates["99427"]["rate"] * rates["99427"]["multiplier"] * util.get("pcm_99427", 0.08) * active_pts
-            
-            # ENHANCED BILLING (Complex CCM for high-acuity patients - if enabled)
-            enhanced_billing = settings.get("enhanced_billing", False)
-            if enhanced_billing:
-                # Complex CCM for patients with multiple chronic conditions requiring intensive management
-                rev_99487 = g * rates["99487"]["rate"] * rates["99487"]["multiplier"] * util.get("ccm_99487", 0.25) * active_pts
-                rev_99489 = g * rates["99489"]["rate"] * rates["99489"]["multiplier"] * util.get("ccm_99489", 0.15) * active_pts
-            else:
-                rev_99487 = rev_99489 = 0
-            
-            # TCM REVENUE (One-time for new patient transitions) 
-            rev_99495 = rates["99495"]["rate"] * rates["99495"]["multiplier"] * util["tcm_99495"] * new_pts
-            rev_99496 = rates["99496"]["rate"] * rates["99496"]["multiplier"] * util["tcm_99496"] * new_pts
-
-            # REVENUE TOTAL (Core + Enhanced if enabled)
-            gross = (rev_setup + rev_99454 + rev_99457 + rev_99458 + rev_99091 +
-                     rev_99490 + rev_99439 + rev_99487 + rev_99489 + 
-                     rev_99426 + rev_99427 + rev_99495 + rev_99496)
-            net = gross * util["collection_rate"]
+            # --- revenue: one term per billing code (see _billing_terms) ---
+            # monthly codes bill GPCI-adjusted active patients, the rest new patients
+            rev = {code: coef * (g * active_pts) if per_active else coef * new_pts
+                   for code, coef, per_active in billing[m-1]}
+            gross = sum(rev.values())
+            collection_rate = prm.collection[m-1]
+            net = gross * collection_rate
 
             # --- costs: Handle 60+ month infrastructure transition ---
-            own_infra_month = settings.get("own_infrastructure_month", 61)
+            own_infra_month = prm.own_infra_month
             infrastructure_capex = 0.0
             
             if m >= own_infra_month:
                 # Post-60 month: Own IT infrastructure  
-                platform = settings.get("own_it_annual_cost", 500_000) / 12  # Monthly IT cost
-                kit_cost = settings.get("own_hardware_unit_cost", 120)  # Own manufacturing cost
+                platform = prm.own_platform[m-1]  # Monthly IT cost
+                kit_cost = prm.own_hardware_unit_cost[m-1]  # Own manufacturing cost
                 hardware = kit_cost * new_pts
                 software_fee = 0.0  # No vendor software fees
                 
                 # One-time infrastructure capex in transition month
                 if m == own_infra_month:
-                    infrastructure_capex = settings.get("infrastructure_capex", 2_000_000)
+                    infrastructure_capex = prm.infrastructure_capex
                     
             else:
                 # Pre-60 month: Vendor-based costs
-                pmpm = _pmpm_for_vendor(vcfg, active_pts)
+                pmpm = _pmpm_tables[vendor_name].lookup(active_pts)
                 platform = pmpm * active_pts
                 
-                chosen = settings["vendor_selected_kit"].get(vendor_name)
-                kit_cost = (vcfg.hardware_kits or {}).get(chosen, 0.0)
+                kit_cost = prm.kit_cost[vendor_name]  # selected kit for this vendor
                 
                 # Smart device management with recovery
-                recovery_rate = settings.get("device_recovery_rate", 0.85)
-                refurb_cost = settings.get("device_refurb_cost", 50)
-                logistics_cost = settings.get("device_logistics_cost", 25)
+                recovery_rate = prm.recovery_rate[m-1]
+                refurb_cost = prm.refurb_cost[m-1]
+                logistics_cost = prm.logistics_cost[m-1]
                 
                 # Calculate recovered devices from attrition
                 recovered_devices = int(attrition_pts * recovery_rate)
@@ -643,7 +1100,7 @@ def run_projection(
                 
                 # TCM offset calculation (billed in revenue, offset here for unit economics)
                 # 60% get $192.50 (99495) + 30% get $260 (99496) = avg $193.50 per new patient
-                tcm_offset = new_pts * 193.50 * util["collection_rate"]  # TCM revenue offsets device cost
+                tcm_offset = new_pts * 193.50 * collection_rate  # TCM revenue offsets device cost
                 
                 # Net hardware cost after TCM offset
                 hardware_gross = new_device_cost + refurb_costs + logistics_costs
@@ -656,8 +1113,8 @@ def run_projection(
                     software_fee_charged = True
 
             # Realistic overhead scaling
-            base_overhead = settings.get("overhead_base", 25000)
-            per_patient_overhead = settings.get("overhead_per_patient", 2.0)
+            base_overhead = prm.overhead_base[m-1]
+            per_patient_overhead = prm.overhead_per_patient[m-1]
             
             # Add executive team costs at specific milestones
             executive_costs = 0
@@ -672,46 +1129,46 @@ def run_projection(
                 executive_costs += 18000  # $216K annual
             
             # Marketing budget as percentage of revenue
-            marketing_percent = settings.get("marketing_budget_percent", 0.08)
+            marketing_percent = prm.marketing_pct[m-1]
             marketing_budget = net * marketing_percent
             
             # Apply overhead cap for economies of scale
-            overhead_cap = settings.get("overhead_cap", 150000)
+            overhead_cap = prm.overhead_cap[m-1]
             overhead_before_cap = base_overhead + (per_patient_overhead * active_pts) + executive_costs + marketing_budget
             overhead = min(overhead_before_cap, overhead_cap)
             # Enhanced staffing model with specialized roles and AI efficiency
-            staffing = _calculate_enhanced_staffing_costs(active_pts, active_states, settings)
+            staffing = _calculate_enhanced_staffing_costs(active_pts, active_states, prm, m)
 
             # State expansion costs with management hierarchy
             regional_costs = 0
             state_setup_costs = 0
             
             # Head of State for each active state
-            head_of_state_monthly = settings.get("head_of_state_salary", 12000) * len(active_states)
+            head_of_state_monthly = prm.head_of_state_salary[m-1] * len(active_states)
             
             # Managers based on patient count (1 per 2,500 patients)
-            patients_per_manager = settings.get("patients_per_manager", 2500)
-            manager_salary = settings.get("manager_salary", 7500)
+            patients_per_manager = prm.patients_per_manager
+            manager_salary = prm.manager_salary[m-1]
             managers_needed = max(1, (active_pts + patients_per_manager - 1) // patients_per_manager)  # Round up
             manager_monthly = manager_salary * managers_needed
             
             # Annual licensing/compliance costs per state
-            licensing_monthly = (settings.get("state_licensing_annual", 25000) / 12) * len(active_states)
+            licensing_monthly = prm.licensing_monthly[m-1] * len(active_states)
             
             # One-time state setup costs (charged in the launch month)
-            if m == conf["start_month"] and state != "Virginia":  # No setup cost for first state
-                state_setup_costs = settings.get("state_setup_cost", 50000)
+            if m == conf["start_month"] and not home_market[state_idx]:  # No setup cost for first state
+                state_setup_costs = prm.state_setup_cost[m-1]
             
             regional_costs = head_of_state_monthly + manager_monthly + licensing_monthly
             
-            rpm_minutes_demand = active_pts * (20*util["rpm_20min"] + 20*util["rpm_40min"])
+            rpm_minutes_demand = active_pts * prm.rpm_minutes_per_patient[m-1]
             staff_minutes_capacity = staff_fte * staff_minutes_available
 
             total_costs = platform + hardware + software_fee + overhead + staffing + regional_costs + state_setup_costs + dev_capex + infrastructure_capex
             ebitda = net - total_costs
             
             # Working Capital calculation with proper tracking
-            wc = _calculate_working_capital(net, total_costs, settings)
+            wc = _calculate_working_capital(net, total_costs, prm)
             
             # Calculate CHANGE in working capital (not absolute amount)
             current_total_nwc = wc["net_working_capital"]
@@ -731,7 +1188,7 @@ def run_projection(
             per_margin = per_rev - per_cost
 
             # Determine growth phase for tracking
-            if state == "Virginia":
+            if home_market[state_idx]:
                 if m <= 6:
                     phase = "Pilot"
                 elif m <= 12:
@@ -743,37 +1200,1451 @@ def run_projection(
             else:
                 phase = "Multi-State"
             
-            rows.append({
-                "Month": m, "State": state, "VendorActive": vendor_name, "Phase": phase,
-                "New Patients": new_pts, "Total Patients": active_pts,
-                "Total Revenue": net, "Total Costs": total_costs, "EBITDA": ebitda, 
-                "Free Cash Flow": free_cash_flow, "Cash Balance": 0,  # Updated later at company level
-                "Platform Cost": platform, "Hardware Cost": hardware, "Software Fee": software_fee,
-                "Overhead": overhead, "Staffing Cost": staffing, 
-                "Dev Capex": dev_capex, "Infrastructure Capex": infrastructure_capex,
-                "Accounts Receivable": wc["accounts_receivable"], "Inventory": wc["inventory"],
-                "Accounts Payable": wc["accounts_payable"], "Net Working Capital": wc["net_working_capital"],
-                "Change in NWC": change_in_nwc,
-                "Per-Patient Revenue": per_rev, "Per-Patient Cost": per_cost, "Per-Patient Margin": per_margin,
-                "RPM_Minutes_Demand": rpm_minutes_demand, "Staff_Minutes_Capacity": staff_minutes_capacity,
+            # Month, State, VendorActive, Phase (as category codes), New / Total Patients
+            int_rows[:, n_rows] = (m, state_idx, VENDOR_NAMES.index(vendor_name), PHASE_NAMES.index(phase),
+                                   new_pts, active_pts)
+            # remaining columns in PROJECTION_COLUMNS order
+            value_rows[:, n_rows] = (
+                net, total_costs, ebitda,
+                free_cash_flow, 0,  # Cash Balance: updated later at company level
+                platform, hardware, software_fee,
+                overhead, staffing,
+                dev_capex, infrastructure_capex,
+                wc["accounts_receivable"], wc["inventory"],
+                wc["accounts_payable"], wc["net_working_capital"],
+                change_in_nwc,
+                per_rev, per_cost, per_margin,
+                rpm_minutes_demand, staff_minutes_capacity,
                 # Individual billing code revenues for analysis (Core services only)
-                "Rev_99453": rev_setup * util["collection_rate"], "Rev_99454": rev_99454 * util["collection_rate"],
-                "Rev_99457": rev_99457 * util["collection_rate"], "Rev_99458": rev_99458 * util["collection_rate"],
-                "Rev_99091": rev_99091 * util["collection_rate"], "Rev_99490": rev_99490 * util["collection_rate"],
-                "Rev_99439": rev_99439 * util["collection_rate"], "Rev_99495": rev_99495 * util["collection_rate"],
-                "Rev_99496": rev_99496 * util["collection_rate"],
-            })
+                *(rev[code] * collection_rate for code in _REPORTED_CODES),
+            )
+            n_rows += 1
         
         # Update company-wide cash balance once per month
         cash += month_cash_flows[m]["total_free_cash_flow"]
-        
-        # Update all rows for this month with the same cash balance
-        for i, row in enumerate(rows):
-            if row["Month"] == m:
-                rows[i]["Cash Balance"] = cash
+        cash_ledger[m-1] = cash
+
+    data = dict(zip(_LOOP_INT_COLUMNS, int_rows[:, :n_rows]))
+    data.update(zip(_VALUE_COLUMNS, value_rows[:, :n_rows]))
+    # Every row of a month shares the company-wide closing cash balance
+    data["Cash Balance"][:] = cash_ledger[data["Month"] - 1]
+    return _projection_columns(data, list(states))
+
+# ---------------------------------------------------------------------------
+# Vectorized engine
+#
+# Same arithmetic as _run_projection_loop, evaluated on (scenarios x months x
+# states) arrays. Only the patient recurrence still steps month by month (each
+# month depends on last month's total), and that step is vectorized across
+# scenarios and states. Expressions keep the loop's operand order so results
+# match bit for bit. A single run_projection call is a batch of one.
+# ---------------------------------------------------------------------------
+
+PROJECTION_COLUMNS = [
+    "Month", "State", "VendorActive", "Phase",
+    "New Patients", "Total Patients",
+    "Total Revenue", "Total Costs", "EBITDA",
+    "Free Cash Flow", "Cash Balance",
+    "Platform Cost", "Hardware Cost", "Software Fee",
+    "Overhead", "Staffing Cost",
+    "Dev Capex", "Infrastructure Capex",
+    "Accounts Receivable", "Inventory",
+    "Accounts Payable", "Net Working Capital",
+    "Change in NWC",
+    "Per-Patient Revenue", "Per-Patient Cost", "Per-Patient Margin",
+    "RPM_Minutes_Demand", "Staff_Minutes_Capacity",
+] + ["Rev_" + code for code in _REPORTED_CODES]
+
+# Column store: categorical columns hold integer codes into these labels,
+# patient counts are int32 and every other column except Month is float64.
+VENDOR_NAMES = ["Impilo", "CareSimple", "Ora"]
+PHASE_NAMES = ["Pilot", "Ramp-up", "Hill Valley Scale", "National Expansion", "Multi-State"]
+_CODE_COLUMNS = ["State", "VendorActive", "Phase"]
+_COUNT_COLUMNS = ["New Patients", "Total Patients"]
+_VALUE_COLUMNS = [c for c in PROJECTION_COLUMNS if c not in ["Month"] + _CODE_COLUMNS + _COUNT_COLUMNS]
+_LOOP_INT_COLUMNS = ["Month"] + _CODE_COLUMNS + _COUNT_COLUMNS
+
+@dataclass
+class ProjectionColumns:
+    """
+    Typed column buffers of a projection (run_projection(output="columns")).
+
+    columns maps every output column name to a 1-D array, in DataFrame order.
+    State / VendorActive / Phase hold integer codes into categories[name].
+    """
+    columns: Dict[str, np.ndarray]
+    categories: Dict[str, List[str]]
+
+    def __len__(self):
+        return len(self.columns["Month"])
+
+    def labels(self, name):
+        """Decoded values of a categorical column."""
+        return np.asarray(self.categories[name], dtype=object)[self.columns[name]]
+
+    def to_frame(self):
+        """DataFrame over the buffers (no copy); categorical columns become pd.Categorical."""
+        data = {}
+        for name, values in self.columns.items():
+            if name in self.categories:
+                values = pd.Categorical.from_codes(values, categories=self.categories[name])
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+def _projection_columns(data, state_names, scenario_ids=None):
+    """Order and type raw output columns (see _CODE_COLUMNS etc.) and add Year."""
+    columns = {}
+    if scenario_ids is not None:
+        columns["Scenario"] = scenario_ids
+    for name in PROJECTION_COLUMNS:
+        if name not in data:
+            continue
+        if name in _CODE_COLUMNS:
+            dtype = np.int16
+        elif name in _COUNT_COLUMNS:
+            dtype = np.int32
+        elif name == "Month":
+            dtype = np.int64
+        else:
+            dtype = np.float64
+        columns[name] = np.asarray(data[name]).astype(dtype, copy=False)
+    columns["Year"] = (columns["Month"] - 1)//12 + 1
+    categories = {"State": list(state_names), "VendorActive": VENDOR_NAMES, "Phase": PHASE_NAMES}
+    return ProjectionColumns(columns, categories)
+
+# ProjectionCube rollup rules. Company-wide metrics repeat the same value on
+# every state row of a month; stock metrics are balances, so a period keeps
+# its last month; per-patient ratios don't add up and are left out.
+_COMPANY_METRICS = ["Cash Balance", "Staff_Minutes_Capacity"]
+_STOCK_METRICS = ["Total Patients", "Cash Balance", "Accounts Receivable", "Inventory",
+                  "Accounts Payable", "Net Working Capital"]
+_RATIO_METRICS = ["Per-Patient Revenue", "Per-Patient Cost", "Per-Patient Margin"]
+
+class ProjectionCube:
+    """
+    A projection as a metric x month x state array (run_projection(output="cube")).
+
+    values[k, m, s] holds metrics[k] for month m+1 and states[s]; state-months
+    without a row are zero and flagged False in `active`. by_month(),
+    by_state(), by_year() and by_quarter() roll the cube up with reshapes and
+    sums and are memoized: repeated calls return the same DataFrame, so
+    treat it as read-only. to_frame() gives the usual run_projection frame.
+    """
+
+    def __init__(self, cols: ProjectionColumns):
+        self.columns = cols
+        self.states = list(cols.categories["State"])
+        self.metrics = [name for name in PROJECTION_COLUMNS
+                        if name in cols.columns and name not in ["Month"] + _CODE_COLUMNS]
+        month_idx = cols.columns["Month"] - 1
+        state_idx = cols.columns["State"]
+        self.months = np.arange(1, month_idx.max() + 2 if len(month_idx) else 1)
+        self.active = np.zeros((len(self.months), len(self.states)), dtype=bool)
+        self.active[month_idx, state_idx] = True
+        self.values = np.zeros((len(self.metrics), len(self.months), len(self.states)))
+        for k, name in enumerate(self.metrics):
+            self.values[k, month_idx, state_idx] = cols.columns[name]
+        self._rollups = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Cube over an existing run_projection DataFrame (one scenario)."""
+        state = pd.Categorical(df["State"])
+        data = {name: df[name].to_numpy() for name in PROJECTION_COLUMNS
+                if name in df.columns and name not in _CODE_COLUMNS}
+        data["State"] = state.codes
+        for name, labels in [("VendorActive", VENDOR_NAMES), ("Phase", PHASE_NAMES)]:
+            if name in df.columns:
+                data[name] = pd.Categorical(df[name], categories=labels).codes
+        return cls(_projection_columns(data, list(state.categories)))
+
+    def __getitem__(self, metric):
+        """(months, states) array of one metric."""
+        return self.values[self.metrics.index(metric)]
+
+    def to_frame(self):
+        return self.columns.to_frame()
+
+    def _memo(self, key, build):
+        if key not in self._rollups:
+            self._rollups[key] = build()
+        return self._rollups[key]
+
+    def _monthly(self):
+        """(metrics, months) company-wide monthly values, months with any row only."""
+        def build():
+            has_rows = self.active.any(axis=1)
+            monthly = self.values.sum(axis=2)
+            first_state = self.active.argmax(axis=1)
+            for name in _COMPANY_METRICS:
+                if name in self.metrics:
+                    k = self.metrics.index(name)
+                    monthly[k] = self.values[k, np.arange(len(self.months)), first_state]
+            return monthly[:, has_rows], self.months[has_rows]
+        return self._memo("monthly", build)
+
+    def _rollup_metrics(self, exclude=()):
+        return [(k, name) for k, name in enumerate(self.metrics)
+                if name not in _RATIO_METRICS and name not in exclude]
+
+    def by_month(self):
+        """One row per month: state totals, company-wide metrics taken once."""
+        def build():
+            monthly, months = self._monthly()
+            return pd.DataFrame({name: monthly[k] for k, name in self._rollup_metrics()},
+                                index=pd.Index(months, name="Month"))
+        return self._memo("month", build)
+
+    def by_state(self, month=None):
+        """
+        One row per state: totals over the horizon, with stock metrics at
+        the final month; or, given `month`, that month's values. Company-wide
+        metrics are left out.
+        """
+        def build():
+            active = self.active.any(axis=0) if month is None else self.active[month - 1]
+            final = self.values[:, -1] if len(self.months) else self.values.sum(axis=1)
+            out = {}
+            for k, name in self._rollup_metrics(exclude=_COMPANY_METRICS):
+                if month is not None:
+                    out[name] = self.values[k, month - 1]
+                elif name in _STOCK_METRICS:
+                    out[name] = final[k]
+                else:
+                    out[name] = self.values[k].sum(axis=0)
+            index = pd.CategoricalIndex(np.asarray(self.states, dtype=object), categories=self.states, name="State")
+            return pd.DataFrame(out, index=index)[active]
+        return self._memo(("state", month), build)
+
+    def _by_period(self, key, length, label):
+        def build():
+            monthly, months = self._monthly()
+            period = (months - 1) // length + 1
+            starts = np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+            ends = np.r_[starts[1:], len(period)] - 1
+            out = {}
+            for k, name in self._rollup_metrics():
+                if name in _STOCK_METRICS:
+                    out[name] = monthly[k, ends]
+                else:
+                    out[name] = np.add.reduceat(monthly[k], starts) if len(starts) else monthly[k, :0]
+            return pd.DataFrame(out, index=pd.Index(period[starts], name=label))
+        return self._memo(key, build)
+
+    def by_year(self):
+        """One row per model year (months 1-12 = year 1): flows summed, stocks at year end."""
+        return self._by_period("year", 12, "Year")
+
+    def by_quarter(self):
+        """One row per model quarter (months 1-3 = quarter 1), like by_year."""
+        return self._by_period("quarter", 3, "Quarter")
+
+    def series(self, metric, points=None, state=None, method="minmax"):
+        """
+        Chart-ready monthly series of one metric, indexed by Month: the
+        company-wide by_month() column, or `state`'s own months. Given
+        `points`, longer series are decimated to at most that many months
+        with `method` ("minmax" keeps each bucket's low and high, so troughs
+        and peaks survive; "lttb" is largest-triangle-three-buckets). The
+        first and last month are always kept. Memoized like the rollups.
+        """
+        if method not in _DECIMATORS:
+            raise ValueError(f"Unknown decimation method: {method!r}")
+        _check(points is None or points >= 4, "points", points, "at least 4")
+
+        def build():
+            if state is None:
+                full = self.by_month()[metric]
+            else:
+                s = self.states.index(state)
+                rows = self.active[:, s]
+                full = pd.Series(self[metric][rows, s], index=pd.Index(self.months[rows], name="Month"),
+                                 name=metric)
+            if points is None or len(full) <= points:
+                return full
+            keep = _DECIMATORS[method](full.index.to_numpy(dtype=float), full.to_numpy(), points)
+            return full.iloc[keep]
+        return self._memo(("series", metric, points, state, method), build)
+
+def _minmax_indices(x, y, points):
+    """Positions of each bucket's min and max plus both ends, at most `points`."""
+    n = len(y)
+    buckets = (points - 2) // 2
+    bucket = np.arange(n - 2) * buckets // (n - 2)     # interior points 1..n-2
+    order = np.lexsort((y[1:-1], bucket))              # by bucket, then value
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n - 2] - 1
+    return np.unique(np.r_[0, order[starts] + 1, order[ends] + 1, n - 1])
+
+def _lttb_indices(x, y, points):
+    """Largest-triangle-three-buckets: positions of `points` representative points."""
+    n = len(y)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)   # points - 2 buckets
+    keep = np.zeros(points, dtype=int)
+    keep[-1] = n - 1
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            next_x, next_y = x[hi:edges[b + 2]].mean(), y[hi:edges[b + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        a = keep[b]
+        area = np.abs((x[a] - next_x)*(y[lo:hi] - y[a]) - (x[a] - x[lo:hi])*(next_y - y[a]))
+        keep[b + 1] = lo + area.argmax()
+    return keep
+
+_DECIMATORS = {"minmax": _minmax_indices, "lttb": _lttb_indices}
+
+# Company-wide monthly metrics returned by run_projection_batch(output="array")
+BATCH_ARRAY_METRICS = [
+    "New Patients", "Total Patients", "Total Revenue", "Total Costs",
+    "EBITDA", "Free Cash Flow", "Cash Balance",
+]
+
+def _vendor_schedule(prm):
+    """Per-month active vendor name and one-time dev capex."""
+    months, presets = prm.months, prm.presets
+    initial_vendor = prm.initial_vendor
+    migration_month = prm.migration_month
+    names = []
+    dev_capex = np.zeros(months)
+    dev_capex_done = False
+    for m in range(1, months+1):
+        if migration_month is not None and m >= migration_month:
+            vcfg = presets["Ora"]
+            names.append("Ora")
+            capex = (0 if dev_capex_done else vcfg.dev_capex)
+            if capex > 0:
+                dev_capex_done = True
+        else:
+            vcfg = presets[initial_vendor]
+            names.append(initial_vendor)
+            capex = 0.0
+            if initial_vendor == "Ora" and not dev_capex_done and m == 1:
+                capex = vcfg.dev_capex
+                dev_capex_done = True
+        dev_capex[m-1] = capex
+    return names, dev_capex
+
+def _intake_schedule(prm):
+    """
+    Month-level intake terms of the Refua growth model.
+
+    Returns (fixed, steady): before steady state `fixed` is the intake for
+    every state; in steady-state months (`steady` True) intake is
+    prm.target_intake scaled by each state's variation draw.
+    The arrays are shared between calls with the same inputs; do not mutate.
+    """
+    return _intake_schedule_for(prm.months, prm.pilot_months, prm.initial_intake,
+                                prm.target_intake, prm.growth_mult)
+
+@lru_cache(maxsize=1024)
+def _intake_schedule_for(months, pilot_months, initial_intake, target_intake, growth_mult):
+    """Monthly intake plan: `fixed` new patients through month 36, then `steady` (varied target intake)."""
+    fixed = np.zeros(months, dtype=np.int64)
+    steady = np.zeros(months, dtype=bool)
+    for m in range(1, months+1):
+        i = m - 1
+        if m <= pilot_months:
+            fixed[i] = max(0, 100 + (m * 50))
+        elif m <= 12:
+            ramp_factor = (m - pilot_months) / (12 - pilot_months)
+            fixed[i] = max(0, int(initial_intake * (0.5 + ramp_factor * 0.5)))
+        elif m <= 24:
+            scale_factor = (m - 12) / 12
+            fixed[i] = int(initial_intake + (target_intake - initial_intake) * scale_factor * 1.5)
+        elif m <= 36:
+            fixed[i] = int(target_intake * growth_mult)
+        else:
+            steady[i] = True
+    return fixed, steady
+
+def _compile_scenario(states, gpci, rates, util, settings):
+    """
+    Resolve one scenario's inputs into the scalars, per-state vectors and
+    per-month vectors the batched engine consumes (see _STATE_KEYS/_MONTH_KEYS).
+    """
+    prm = compile_params(settings, util, rates)
+    months = prm.months
+
+    names = list(states.keys())
+    registry = state_registry()
+    g = np.array([float(gpci[s]) for s in names])
+    p = {
+        "months": months,
+        "state_names": names,
+        # per state
+        "start": [states[s]["start_month"] for s in names],
+        "initial": [states[s]["initial_patients"] for s in names],
+        "cap": registry.market_caps(names, prm.market_target),
+        "home_market": registry.home_market[registry.ids(names)],
+        "gpci": g,
+        # revenue code vector (see _billing_terms)
+        "billing_codes": prm.billing_codes,
+        "billing_coef": prm.billing_coef,
+        "billing_per_active": prm.billing_per_active,
+    }
+
+    # per month
+    vendor_names, dev_capex = _vendor_schedule(prm)
+    month_idx = np.arange(1, months+1)
+    own_infra_month = prm.own_infra_month
+    p["vendor"] = vendor_names
+    p["pricing"] = {v: prm.pmpm_tables[v] for v in set(vendor_names)}
+    p["kit"] = [prm.kit_cost[v] for v in vendor_names]
+    p["fee"] = [prm.presets[v].monthly_software_fee for v in vendor_names]
+    p["dev_capex"] = dev_capex
+    p["own"] = month_idx >= own_infra_month
+    p["infra_capex"] = np.where(month_idx == own_infra_month, float(prm.infrastructure_capex), 0.0)
+    p["fixed"], p["steady"] = _intake_schedule(prm)
+    # per month and state: steady-state intake at full and near-target capture
+    variation = _intake_variation(prm.variation_seed, months, names)
+    p["full"] = (prm.target_intake * variation).astype(np.int64)
+    p["near_target"] = (prm.target_intake * 0.9 * variation).astype(np.int64)
+    p["staff_fte"] = prm.staff_fte + prm.staff_fte_growth * ((month_idx - 1) // 12)
+
+    # scalars and monthly parameters (same names as the ModelParams fields)
+    p.update({key: getattr(prm, key) for key in _SCALAR_KEYS + _MONTHLY_PARAM_KEYS})
+    return p
+
+_STATE_KEYS = ["start", "initial", "cap", "home_market", "gpci"]
+# ModelParams fields holding one value per month (possibly from a Schedule)
+_MONTHLY_PARAM_KEYS = ["attrition", "collection", "recovery_rate", "refurb_cost", "logistics_cost",
+                       "own_platform", "own_hardware_unit_cost", "overhead_base",
+                       "overhead_per_patient", "marketing_pct", "overhead_cap", "director_base",
+                       "director_additional", "clinical_pmpm", "family_pmpm", "admin_pmpm",
+                       "ai_efficiency", "head_of_state_salary", "manager_salary",
+                       "licensing_monthly", "state_setup_cost", "rpm_minutes_per_patient"]
+_MONTH_KEYS = ["kit", "fee", "dev_capex", "own", "infra_capex",
+               "fixed", "steady", "staff_fte"] + _MONTHLY_PARAM_KEYS
+_MONTH_STATE_KEYS = ["full", "near_target"]
+_SCALAR_KEYS = ["initial_cash", "market_target", "states_per_director",
+                "patients_per_manager", "staff_minutes", "ar_months"]
+
+def _stack_scenarios(compiled):
+    """
+    Stack compiled scenarios along a leading axis.
+
+    Scalars become (N, 1, 1), per-month vectors (N, M, 1), per-state
+    vectors (N, 1, S) and month x state arrays (N, M, S), padded to the
+    longest horizon / largest state list.
+    States keep their input order, so slot k is each scenario's k-th state.
+    """
+    n = len(compiled)
+    months = max(p["months"] for p in compiled)
+    n_states = max(len(p["state_names"]) for p in compiled)
+
+    def stack(key, length, pad):
+        # dtype follows the inputs: all-int settings stay integer arithmetic
+        values = [np.asarray(p[key]) for p in compiled]
+        if all(len(v) == length for v in values):
+            return np.array(values)
+        out = np.full((n, length), pad, dtype=np.result_type(*values))
+        for i, v in enumerate(values):
+            out[i, :len(v)] = v
+        return out
+
+    P = {"n": n, "months": months, "n_states": n_states}
+    P["horizon"] = np.array([p["months"] for p in compiled])
+    for key in _SCALAR_KEYS:
+        P[key] = np.array([p[key] for p in compiled])[:, None, None]
+    for key in _MONTH_KEYS:
+        P[key] = stack(key, months, 0)[:, :, None]
+    for key in _STATE_KEYS:
+        # padded slots never launch: start beyond every horizon
+        P[key] = stack(key, n_states, months + 1 if key == "start" else 0)[:, None, :]
+    for key in _MONTH_STATE_KEYS:
+        values = [np.asarray(p[key]) for p in compiled]
+        out = np.zeros((n, months, n_states), dtype=np.result_type(*values))
+        for i, v in enumerate(values):
+            out[i, :v.shape[0], :v.shape[1]] = v
+        P[key] = out
+
+    # billing codes: the union over scenarios, zero coef where a scenario lacks one
+    codes = list(dict.fromkeys(code for p in compiled for code in p["billing_codes"]))
+    per_active = {}
+    P["billing_codes"] = codes
+    P["billing_coef"] = np.zeros((n, months, len(codes)))
+    for i, p in enumerate(compiled):
+        P["billing_coef"][i, :p["months"]][:, [codes.index(code) for code in p["billing_codes"]]] = p["billing_coef"]
+        per_active.update(zip(p["billing_codes"], p["billing_per_active"]))
+    P["billing_per_active"] = np.array([per_active[code] for code in codes])
+
+    P["state_names"] = np.full((n, n_states), None, dtype=object)
+    P["vendor"] = np.full((n, months), None, dtype=object)
+    P["pricing_id"] = np.full((n, months), -1, dtype=np.int64)
+    pricing, pricing_ids = [], {}
+    for i, p in enumerate(compiled):
+        P["state_names"][i, :len(p["state_names"])] = p["state_names"]
+        vendors = np.array(p["vendor"], dtype=object)
+        P["vendor"][i, :p["months"]] = vendors
+        for vname, table in p["pricing"].items():
+            if table not in pricing_ids:
+                pricing_ids[table] = len(pricing)
+                pricing.append(table)
+            P["pricing_id"][i, :p["months"]][vendors == vname] = pricing_ids[table]
+    P["pricing"] = pricing
+    return P
+
+def _patient_arrays(P, exact=True):
+    """
+    Solve the patient recurrence for every scenario and state at once.
+
+    Returns (new, attrition, total) arrays shaped (scenarios, months, states),
+    covering P's month window (see _slice_months).
+
+    exact=True steps month by month, matching the loop engine's integer
+    truncation: in compiled code when Numba is installed (_patient_steps_jit),
+    otherwise with NumPy across the whole block (_patient_steps_numpy). The
+    two agree bit for bit. exact=False solves the untruncated recurrence
+    with no month loop (_patient_arrays_relaxed).
+    """
+    if not exact:
+        return _patient_arrays_relaxed(P)
+    if _patient_kernel is not None and P["initial"].dtype.kind in "iu":
+        return _patient_steps_jit(P)
+    return _patient_steps_numpy(P)
 
-    df = pd.DataFrame(rows)
-    df["Year"] = (df["Month"] - 1)//12 + 1
+def _patient_steps_numpy(P):
+    """
+    NumPy month loop of _patient_arrays, vectorized over scenarios and
+    states. Steps only until every state has settled (see _settled), then
+    fills the rest of the horizon in closed form.
+    """
+    n, n_states = P["n"], P["n_states"]
+    first_month = P.get("first_month", 1)
+    months = P["months"] - first_month + 1
+    start, initial, caps = P["start"][:, 0], P["initial"][:, 0], P["cap"][:, 0]
+    attrition_rate = P["attrition"][:, :, 0]   # (scenarios, months)
+    market_target = P["market_target"][:, :, 0]
+
+    new = np.zeros((n, months, n_states), dtype=np.int64)
+    attr = np.zeros((n, months, n_states), dtype=np.int64)
+    total = np.zeros((n, months, n_states), dtype=np.int64)
+    current = P.get("opening_patients", np.zeros((n, n_states), dtype=np.int64))
+    settled_from = _steady_from(P, first_month)
+    for i in range(months):
+        m = first_month + i
+        if _settled(P, current, m, settled_from[:, i]):
+            _fill_settled(P, current, m, i, new, attr, total)
+            break
+        launch = start == m
+        running = start < m
+        attr_m = (current * attrition_rate[:, i, None]).astype(np.int64)
+        new_m = np.broadcast_to(P["fixed"][:, i], (n, n_states))
+        steady = P["steady"][:, i, 0]
+        if steady.any():
+            steady_new = np.where(current >= market_target, attr_m,
+                                  np.where(current > market_target * 0.8,
+                                           P["near_target"][:, i], P["full"][:, i]))
+            steady_new = np.maximum(steady_new, attr_m)
+            new_m = np.where(steady[:, None], steady_new, new_m)
+        grown = np.maximum(np.minimum(current - attr_m + new_m, caps), 0)
+
+        new[:, i] = np.where(launch, initial, np.where(running, new_m, 0))
+        attr[:, i] = np.where(running, attr_m, 0)
+        current = np.where(launch, initial, np.where(running, grown, 0))
+        total[:, i] = current
+    return new, attr, total
+
+def _patient_steps(start, initial, caps, attrition, target, fixed, steady, full, near,
+                   opening, first_month, new, attr, total):
+    """
+    Scalar form of _patient_steps_numpy, one (scenario, state) lane at a
+    time, written for Numba (see _patient_kernel). Fills new/attr/total.
+    """
+    n, months, n_states = total.shape
+    for j in range(n):
+        for s in range(n_states):
+            current = opening[j, s]
+            for i in range(months):
+                m = first_month + i
+                if start[j, s] == m:
+                    new[j, i, s] = initial[j, s]
+                    current = initial[j, s]
+                elif start[j, s] < m:
+                    attr_m = np.int64(current * attrition[j, i])
+                    if steady[j, i]:
+                        if current >= target[j]:
+                            new_m = attr_m
+                        elif current > target[j] * 0.8:
+                            new_m = near[j, i, s]
+                        else:
+                            new_m = full[j, i, s]
+                        new_m = max(new_m, attr_m)
+                    else:
+                        new_m = fixed[j, i]
+                    new[j, i, s] = new_m
+                    attr[j, i, s] = attr_m
+                    current = max(min(current - attr_m + new_m, caps[j, s]), 0)
+                else:
+                    current = 0
+                total[j, i, s] = current
+
+# Numba is optional: without it _patient_arrays uses the NumPy loop
+try:
+    from numba import njit
+except ImportError:
+    _patient_kernel = None
+else:
+    _patient_kernel = njit(cache=True, nogil=True)(_patient_steps)
+
+def _patient_steps_jit(P, kernel=None):
+    """_patient_arrays through the compiled kernel (or `kernel`, e.g. _patient_steps itself)."""
+    n, n_states = P["n"], P["n_states"]
+    first_month = P.get("first_month", 1)
+    months = P["months"] - first_month + 1
+    new = np.zeros((n, months, n_states), dtype=np.int64)
+    attr = np.zeros((n, months, n_states), dtype=np.int64)
+    total = np.zeros((n, months, n_states), dtype=np.int64)
+    opening = P.get("opening_patients", np.zeros((n, n_states), dtype=np.int64))
+    (kernel or _patient_kernel)(
+        P["start"][:, 0].astype(np.int64), P["initial"][:, 0].astype(np.int64),
+        P["cap"][:, 0].astype(np.int64), np.ascontiguousarray(P["attrition"][:, :, 0], dtype=np.float64),
+        P["market_target"][:, 0, 0], np.ascontiguousarray(P["fixed"][:, :, 0]),
+        np.ascontiguousarray(P["steady"][:, :, 0]), P["full"], P["near_target"],
+        np.asarray(opening, dtype=np.int64), first_month, new, attr, total)
+    return new, attr, total
+
+# Once steady-state intake applies for good, a running state whose patient
+# count has reached the market target (intake only replaces attrition) or
+# its cap (intake always at least replaces attrition, the cap clips the rest)
+# keeps that count for the rest of the horizon.
+
+def _steady_from(P, first_month):
+    """(scenarios, months): steady-state intake holds from this month to the horizon."""
+    month_idx = np.arange(first_month, P["months"] + 1)
+    steady = P["steady"][:, :, 0] | (month_idx[None, :] > P["horizon"][:, None])
+    return np.flip(np.logical_and.accumulate(np.flip(steady, axis=1), axis=1), axis=1)
+
+def _settled(P, current, m, steady_from):
+    """Whether every state keeps `current` patients from month m to its horizon."""
+    start = P["start"][:, 0]
+    launched = start < m
+    at_limit = (current >= P["market_target"][:, :, 0]) | (current >= P["cap"][:, 0])
+    never = start > P["horizon"][:, None]
+    return bool(np.all((launched & at_limit & steady_from[:, None]) | never))
+
+def _fill_settled(P, current, m, i, new, attr, total):
+    """Closed-form months m.. (index i..) for settled states: constant totals, intake replacing attrition."""
+    running = (P["start"][:, 0] < m)[:, None, :]
+    held = np.where(running, current[:, None, :], 0)
+    attr_tail = (held * P["attrition"][:, i:, :]).astype(np.int64)
+    market_target = P["market_target"]
+    intake = np.where(held > market_target * 0.8, P["near_target"][:, i:], P["full"][:, i:])
+    new_tail = np.where(held >= market_target, attr_tail, np.maximum(intake, attr_tail))
+    total[:, i:] = held
+    attr[:, i:] = attr_tail
+    new[:, i:] = np.where(running, new_tail, 0)
+
+def _affine_scan(alpha, beta, opening):
+    """
+    x[t] = alpha[t] * x[t-1] + beta[t] along axis 1, with x[-1] = opening.
+
+    Closed form: within a run of nonzero alpha, x[t] = g[t] * sum(beta[k] / g[k])
+    with g the running product of alpha; a zero alpha restarts the run at beta.
+    """
+    n, months, n_states = alpha.shape
+    a = np.concatenate([np.zeros((n, 1, n_states)), alpha], axis=1)
+    b = np.concatenate([np.asarray(opening, dtype=float)[:, None, :], beta], axis=1)
+    restart = a == 0
+    log_g = np.cumsum(np.log(np.where(restart, 1.0, a)), axis=1)
+    run_start = np.maximum.accumulate(
+        np.where(restart, np.arange(months + 1)[None, :, None], 0), axis=1)
+    log_g -= np.take_along_axis(log_g, run_start, axis=1)
+    weighted = b * np.exp(-log_g)
+    acc = np.cumsum(weighted, axis=1)
+    acc -= np.take_along_axis(acc - weighted, run_start, axis=1)
+    return (np.exp(log_g) * acc)[:, 1:]
+
+def _patient_arrays_relaxed(P):
+    """
+    Tolerance mode of _patient_arrays: the recurrence without integer
+    truncation, solved with no month loop.
+
+    Each month is affine in the previous total, x' = alpha * x + beta, with a
+    regime (fixed or steady intake, holding at the target, clipped at the
+    cap, launch) chosen from the previous total. Guess the totals, pick
+    regimes, solve all months with _affine_scan and repeat until the regimes
+    stop changing; each pass fixes at least one more month, and in practice
+    it takes a handful, because a state that settles (see _settled) stays
+    held. Counts are rounded to whole patients, so results
+    track the exact engine to within a few patients per state, not bit for bit.
+    """
+    first_month = P.get("first_month", 1)
+    months = P["months"] - first_month + 1
+    m_col = np.arange(first_month, P["months"] + 1)[None, :, None]
+    start, initial, caps = P["start"], P["initial"], P["cap"]
+    launch = m_col == start
+    running = m_col > start
+    rate = P["attrition"]
+    target = P["market_target"]
+    steady = P["steady"]
+    settles = running & _steady_from(P, first_month)[:, :, None]
+    opening = P.get("opening_patients", np.zeros((P["n"], P["n_states"])))
+
+    previous = np.zeros(launch.shape)
+    regime = None
+    for _ in range(months + 1):
+        intake = np.where(previous > target * 0.8, P["near_target"], P["full"])
+        alpha = np.broadcast_to(1 - rate, launch.shape)
+        beta = np.where(steady, intake, P["fixed"])
+        clipped = alpha * previous + beta >= caps
+        # settling is absorbing (see _settled): held from the month the
+        # target is reached, or from the month after the cap clips
+        capped = np.logical_or.accumulate(settles & clipped, axis=1)
+        hold = (np.logical_or.accumulate(settles & (previous >= target), axis=1)
+                | np.pad(capped[:, :-1], ((0, 0), (1, 0), (0, 0))))
+        clipped &= ~hold
+        alpha = np.where(hold, 1.0, alpha)
+        beta = np.where(hold, 0.0, beta)
+        alpha = np.where(clipped | ~running, 0.0, alpha)
+        beta = np.where(launch, initial, np.where(~running, 0.0, np.where(clipped, caps, beta)))
+        alpha = np.broadcast_to(alpha, launch.shape)
+        beta = np.broadcast_to(beta, launch.shape)
+        if regime is not None and np.array_equal(regime, (hold, clipped)):
+            break
+        regime = (hold, clipped)
+        x = _affine_scan(alpha, beta, opening)
+        previous = np.concatenate([np.asarray(opening, dtype=float)[:, None, :], x[:, :-1]], axis=1)
+
+    total = np.rint(x).astype(np.int64)
+    attr = np.where(running, np.rint(rate * previous), 0).astype(np.int64)
+    # a month that opens at the target (held or not) only replaces attrition
+    at_target = hold | (previous >= target)
+    intake = np.where(steady, np.where(at_target, attr, np.maximum(intake, attr)), P["fixed"])
+    new = np.where(launch, initial, np.where(running, intake, 0)).astype(np.int64)
+    return new, attr, total
+
+# ---------------------------------------------------------------------------
+# Projection graph
+#
+# Every line of the numpy engine is a named node with declared inputs, from
+# the stacked (scenarios, months, states) grids up to the output columns
+# (row-level arrays named like PROJECTION_COLUMNS). A _ProjectionGrid
+# evaluates nodes on first access and memoizes them, so asking for a few
+# columns only computes their subgraph.
+#
+# States interact only through a few company-wide lines: the monthly
+# software fee (paid once), director and regional costs (driven by the
+# active state count), and working capital and cash (chained across every
+# row). Nodes marked per_state depend on one state at a time, so they can
+# run on state chunks in parallel (see _projection_grids).
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class _Node:
+    fn: object
+    outputs: Tuple[str, ...]
+    deps: Tuple[str, ...]
+    per_state: bool
+
+_GRID_NODES: Dict[str, _Node] = {}
+
+def _grid_node(*outputs, deps=(), per_state=False):
+    """Register fn(P, G) as the node computing `outputs` (a tuple when several)."""
+    def register(fn):
+        node = _Node(fn, outputs, tuple(deps), per_state)
+        for name in outputs:
+            _GRID_NODES[name] = node
+        return fn
+    return register
+
+def _grid_closure(names):
+    """Every node name needed to evaluate `names`, dependencies included."""
+    seen, stack = set(), list(names)
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(_GRID_NODES[name].deps)
+    return seen
+
+class _ProjectionGrid:
+    """Lazy, memoizing view of the projection graph over one stacked batch."""
+
+    def __init__(self, P, exact=True, values=None):
+        self.P = P
+        self.exact = exact
+        self._values = dict(values or {})
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            node = _GRID_NODES[name]
+            out = node.fn(self.P, self)
+            self._values.update(zip(node.outputs, out if len(node.outputs) > 1 else (out,)))
+        return self._values[name]
+
+    def rows(self, a):
+        """Row-level values (run_projection row order) of a broadcastable grid."""
+        ni, mi, si = self["rows"]
+        return np.broadcast_to(a, self["active"].shape)[ni, mi, si]
+
+def _evaluate_nodes(P, exact, names):
+    """{name: value} for `names` on a fresh grid (a picklable executor task)."""
+    G = _ProjectionGrid(P, exact)
+    return {name: G[name] for name in names}
+
+def _projection_grids(P, exact=True, executor=None, outputs=None, workers=None):
+    """
+    The projection graph over a stacked batch, evaluated lazily.
+
+    executor: optional concurrent.futures Executor (thread or process pool)
+    that evaluates the per-state nodes `outputs` needs (default: every
+    output column) up front, split into `workers` chunks of states
+    (default os.cpu_count()).
+    """
+    G = _ProjectionGrid(P, exact)
+    if executor is None or P["n_states"] < 2:
+        return G
+    # State labels come from P, not from a node
+    targets = [name for name in outputs or PROJECTION_COLUMNS if name != "State"]
+    names = sorted(name for name in _grid_closure(targets) if _GRID_NODES[name].per_state)
+    workers = workers or os.cpu_count() or 1
+    bounds = np.linspace(0, P["n_states"], min(workers, P["n_states"]) + 1).astype(int)
+    chunks = [_slice_states(P, lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    parts = list(executor.map(_evaluate_nodes, chunks, [exact] * len(chunks), [names] * len(chunks)))
+    return _ProjectionGrid(P, exact, {name: np.concatenate([part[name] for part in parts], axis=-1)
+                                      for name in names})
+
+def _slice_states(P, lo, hi):
+    """Restrict a stacked batch to state slots lo..hi-1."""
+    Q = dict(P)
+    for key in _STATE_KEYS + _MONTH_STATE_KEYS:
+        Q[key] = P[key][:, :, lo:hi]
+    Q["state_names"] = P["state_names"][:, lo:hi]
+    if "opening_patients" in P:
+        Q["opening_patients"] = P["opening_patients"][:, lo:hi]
+    Q["n_states"] = hi - lo
+    return Q
+
+def _month_column(P):
+    return np.arange(P.get("first_month", 1), P["months"]+1)[None, :, None]
+
+# --- per-state lines ---
+
+@_grid_node("new", "attr", "total", per_state=True)
+def _patients_node(P, G):
+    return _patient_arrays(P, G.exact)
+
+@_grid_node("by_code", deps=("new", "total"), per_state=True)
+def _by_code_node(P, G):
+    return _revenue_by_code(P["billing_coef"], P["billing_per_active"], P["gpci"][:, 0], G["total"], G["new"])
+
+@_grid_node("net", deps=("by_code",), per_state=True)
+def _net_node(P, G):
+    # summed in code order, like the loop
+    return G["by_code"].sum(axis=0) * P["collection"]
+
+@_grid_node("platform", deps=("total",), per_state=True)
+def _platform_node(P, G):
+    total = G["total"]
+    pmpm = np.zeros(total.shape)
+    for k, table in enumerate(P["pricing"]):
+        rows_k = P["pricing_id"] == k
+        pmpm[rows_k] = table.lookup(total[rows_k])
+    return np.where(P["own"], P["own_platform"], pmpm * total)
+
+@_grid_node("hardware", deps=("new", "attr"), per_state=True)
+def _hardware_node(P, G):
+    new, attr = G["new"], G["attr"]
+    recovered = (attr * P["recovery_rate"]).astype(np.int64)
+    net_new_devices = np.maximum(0, new - recovered)
+    new_device_cost = P["kit"] * net_new_devices
+    refurb_costs = P["refurb_cost"] * np.minimum(recovered, new)
+    logistics_costs = P["logistics_cost"] * (new + attr)
+    tcm_offset = new * 193.50 * P["collection"]
+    hardware_gross = new_device_cost + refurb_costs + logistics_costs
+    vendor_hardware = np.maximum(0, hardware_gross - tcm_offset)
+    return np.where(P["own"], P["own_hardware_unit_cost"] * new, vendor_hardware)
+
+@_grid_node("overhead", deps=("total", "net"), per_state=True)
+def _overhead_node(P, G):
+    m_col, total = _month_column(P), G["total"]
+    executive_costs = (((m_col >= 24) & (total > 3000)) * 20000 +
+                       ((m_col >= 30) & (total > 5000)) * 22000 +
+                       ((m_col >= 36) & (total > 8000)) * 18000)
+    marketing_budget = G["net"] * P["marketing_pct"]
+    overhead_before_cap = P["overhead_base"] + (P["overhead_per_patient"] * total) + executive_costs + marketing_budget
+    return np.minimum(overhead_before_cap, P["overhead_cap"])
+
+@_grid_node("patient_staffing", deps=("total",), per_state=True)
+def _patient_staffing_node(P, G):
+    total = G["total"]
+    return P["clinical_pmpm"] * total + P["family_pmpm"] * total + P["admin_pmpm"] * total
+
+@_grid_node("manager_costs", deps=("total",), per_state=True)
+def _manager_costs_node(P, G):
+    patients_per_manager = P["patients_per_manager"]
+    managers_needed = np.maximum(1, (G["total"] + patients_per_manager - 1) // patients_per_manager)
+    return P["manager_salary"] * managers_needed
+
+@_grid_node("state_setup_costs", per_state=True)
+def _state_setup_node(P, G):
+    launch = _month_column(P) == P["start"]
+    return np.where(launch & ~P["home_market"], P["state_setup_cost"], 0)
+
+@_grid_node("rpm_minutes_demand", deps=("total",), per_state=True)
+def _rpm_minutes_node(P, G):
+    return G["total"] * P["rpm_minutes_per_patient"]
+
+# --- company-wide lines ---
+
+@_grid_node("active")
+def _active_node(P, G):
+    m_col = _month_column(P)
+    return (m_col >= P["start"]) & (m_col <= P["horizon"][:, None, None])
+
+@_grid_node("n_active", deps=("active",))
+def _n_active_node(P, G):
+    return G["active"].sum(axis=2, keepdims=True)
+
+@_grid_node("software_fee", deps=("active", "total"))
+def _software_fee_node(P, G):
+    # once per month, on the first active state with patients
+    payer = G["active"] & (G["total"] > 0) & (P["fee"] > 0) & ~P["own"]
+    first_payer = payer & (np.cumsum(payer, axis=2) == 1)
+    return np.where(first_payer, P["fee"], 0.0)
+
+@_grid_node("staffing", deps=("patient_staffing", "n_active"))
+def _staffing_node(P, G):
+    # see _calculate_enhanced_staffing_costs
+    n_active = G["n_active"]
+    states_per_director = P["states_per_director"]
+    directors_needed = np.maximum(1, (n_active + states_per_director - 1) // states_per_director)
+    excess_states = np.maximum(0, n_active - 3 * directors_needed)
+    director_monthly = (directors_needed * P["director_base"] +
+                        excess_states * P["director_additional"]) / 12
+    return (G["patient_staffing"] + director_monthly) * P["ai_efficiency"]
+
+@_grid_node("regional_costs", deps=("n_active", "manager_costs"))
+def _regional_costs_node(P, G):
+    n_active = G["n_active"]
+    return (P["head_of_state_salary"] * n_active + G["manager_costs"] +
+            P["licensing_monthly"] * n_active)
+
+@_grid_node("dev_capex")
+def _dev_capex_node(P, G):
+    return P["dev_capex"]
+
+@_grid_node("infrastructure_capex")
+def _infrastructure_capex_node(P, G):
+    return P["infra_capex"]
+
+@_grid_node("total_costs", deps=("platform", "hardware", "software_fee", "overhead", "staffing",
+                                 "regional_costs", "state_setup_costs", "dev_capex", "infrastructure_capex"))
+def _total_costs_node(P, G):
+    return (G["platform"] + G["hardware"] + G["software_fee"] + G["overhead"] + G["staffing"] +
+            G["regional_costs"] + G["state_setup_costs"] + G["dev_capex"] + G["infrastructure_capex"])
+
+@_grid_node("ebitda", deps=("net", "total_costs"))
+def _ebitda_node(P, G):
+    return G["net"] - G["total_costs"]
+
+@_grid_node("accounts_receivable", deps=("net",))
+def _accounts_receivable_node(P, G):
+    return G["net"] * P["ar_months"]
+
+@_grid_node("accounts_payable", deps=("total_costs",))
+def _accounts_payable_node(P, G):
+    return G["total_costs"] * 0.75
+
+@_grid_node("staff_minutes_capacity")
+def _staff_minutes_node(P, G):
+    return P["staff_fte"] * P["staff_minutes"]
+
+# --- rows and the cash ledger ---
+
+@_grid_node("rows", deps=("active",))
+def _rows_node(P, G):
+    # (scenario, month, state) index of every output row, month-major
+    return np.nonzero(G["active"])
+
+@_grid_node("Net Working Capital", "Change in NWC", "Free Cash Flow", "cash",
+            deps=("rows", "accounts_receivable", "accounts_payable", "ebitda",
+                  "dev_capex", "infrastructure_capex"))
+def _cash_flows(P, G):
+    """
+    Row-level NWC, its change and free cash flow plus the company cash ledger.
+
+    Working capital changes chain across consecutive rows (month-major,
+    states in input order) within each scenario, exactly as the loop does.
+    cash is shaped (scenarios, months).
+    """
+    ni, mi, si = G["rows"]
+    nwc = G.rows(G["accounts_receivable"]) - G.rows(G["accounts_payable"])
+    prev = np.concatenate(([0.0], nwc[:-1]))
+    first_rows = np.r_[True, ni[1:] != ni[:-1]] if len(ni) else np.zeros(0, dtype=bool)
+    opening_nwc = P.get("opening_nwc", np.zeros(P["n"]))
+    prev[first_rows] = opening_nwc[ni[first_rows]]    # first row of each scenario
+    change_in_nwc = nwc - prev
+    capex = G.rows(G["dev_capex"]) + G.rows(G["infrastructure_capex"])
+    free_cash_flow = G.rows(G["ebitda"]) - capex - change_in_nwc
+
+    shape = G["active"].shape
+    fcf_grid = np.zeros(shape)
+    fcf_grid[ni, mi, si] = free_cash_flow
+    # sequential sums (cumsum) keep the loop's addition order
+    month_fcf = np.cumsum(fcf_grid, axis=2)[:, :, -1] if shape[2] else np.zeros(shape[:2])
+    opening = P.get("opening_cash", P["initial_cash"][:, 0, 0])[:, None]
+    cash = np.cumsum(np.concatenate((opening, month_fcf), axis=1), axis=1)[:, 1:]
+    return nwc, change_in_nwc, free_cash_flow, cash
+
+# --- output columns (row level) ---
+
+def _row_column(name, line):
+    @_grid_node(name, deps=("rows", line))
+    def column(P, G):
+        return G.rows(G[line])
+
+for _name, _line in {
+    "New Patients": "new", "Total Patients": "total",
+    "Total Revenue": "net", "Total Costs": "total_costs", "EBITDA": "ebitda",
+    "Platform Cost": "platform", "Hardware Cost": "hardware", "Software Fee": "software_fee",
+    "Overhead": "overhead", "Staffing Cost": "staffing",
+    "Dev Capex": "dev_capex", "Infrastructure Capex": "infrastructure_capex",
+    "Accounts Receivable": "accounts_receivable", "Accounts Payable": "accounts_payable",
+    "RPM_Minutes_Demand": "rpm_minutes_demand", "Staff_Minutes_Capacity": "staff_minutes_capacity",
+}.items():
+    _row_column(_name, _line)
+
+@_grid_node("Month", deps=("rows",))
+def _month_rows_node(P, G):
+    return G["rows"][1] + P.get("first_month", 1)
+
+@_grid_node("VendorActive", deps=("rows",))
+def _vendor_rows_node(P, G):
+    ni, mi, _ = G["rows"]
+    vendor_rows = P["vendor"][ni, mi]
+    vendor_codes = np.zeros(len(ni), dtype=np.int16)
+    for k, name in enumerate(VENDOR_NAMES):
+        vendor_codes[vendor_rows == name] = k
+    return vendor_codes
+
+@_grid_node("Phase", deps=("rows", "Month"))
+def _phase_rows_node(P, G):
+    month_rows = G["Month"]
+    home_phase = np.select([month_rows <= 6, month_rows <= 12, month_rows <= 24], [0, 1, 2], 3)
+    return np.where(G.rows(P["home_market"]), home_phase, PHASE_NAMES.index("Multi-State"))
+
+@_grid_node("Cash Balance", deps=("rows", "cash"))
+def _cash_rows_node(P, G):
+    ni, mi, _ = G["rows"]
+    return G["cash"][ni, mi]
+
+@_grid_node("Inventory", deps=("rows",))
+def _inventory_rows_node(P, G):
+    return np.zeros(len(G["rows"][0]))
+
+@_grid_node("Per-Patient Revenue", "Per-Patient Cost", "Per-Patient Margin",
+            deps=("Total Patients", "Total Revenue", "Total Costs", "Dev Capex"))
+def _per_patient_node(P, G):
+    total_rows = G["Total Patients"]
+    has_pts = total_rows != 0
+    per_rev = np.divide(G["Total Revenue"], total_rows, out=np.zeros(len(total_rows)), where=has_pts)
+    per_cost = np.divide(G["Total Costs"] - G["Dev Capex"], total_rows,
+                         out=np.zeros(len(total_rows)), where=has_pts)
+    return per_rev, per_cost, per_rev - per_cost
+
+@_grid_node("collection_rows", deps=("rows",))
+def _collection_rows_node(P, G):
+    return G.rows(P["collection"])
+
+def _code_column(code):
+    @_grid_node("Rev_" + code, deps=("rows", "by_code", "collection_rows"))
+    def column(P, G):
+        return G.rows(G["by_code"][P["billing_codes"].index(code)]) * G["collection_rows"]
+
+for _code in _REPORTED_CODES:
+    _code_column(_code)
+del _name, _line, _code
+
+def _batch_state_names(P):
+    """State labels of a stacked batch, in first-seen order."""
+    names = P["state_names"].ravel()
+    return list(dict.fromkeys(names[names != None]))
+
+def _grids_to_columns(P, G, scenario_ids=None, state_names=None, columns=None):
+    """
+    Flatten the grids into the run_projection row layout as ProjectionColumns.
+    state_names fixes the State categories (default: the batch's own states).
+    columns limits the output to Month, State and those columns (default: all).
+    """
+    ni, _, si = G["rows"]
+    if state_names is None:
+        state_names = _batch_state_names(P)
+    if P["n"] == 1:
+        state_codes = si
+    else:
+        lookup = {name: k for k, name in enumerate(state_names)}
+        code_grid = np.array([[lookup.get(name, -1) for name in row] for row in P["state_names"]])
+        state_codes = code_grid[ni, si]
+
+    out = {"State": state_codes}
+    for name in PROJECTION_COLUMNS if columns is None else ["Month"] + list(columns):
+        if name != "State":
+            out[name] = G[name]
+    if scenario_ids is not None:
+        scenario_ids = np.asarray(scenario_ids, dtype=object)[ni]
+    return _projection_columns(out, state_names, scenario_ids)
+
+def _grids_to_frame(P, G, scenario_ids=None, state_names=None):
+    """_grids_to_columns as a DataFrame."""
+    return _grids_to_columns(P, G, scenario_ids, state_names).to_frame()
+
+def _grids_to_array(P, G):
+    """Company-wide monthly totals, shaped (scenarios, months, BATCH_ARRAY_METRICS)."""
+    active = G["active"]
+    fcf_grid = np.zeros(active.shape)
+    fcf_grid[G["rows"]] = G["Free Cash Flow"]
+    per_row = {
+        "New Patients": G["new"], "Total Patients": G["total"],
+        "Total Revenue": G["net"], "Total Costs": G["total_costs"],
+        "EBITDA": G["ebitda"], "Free Cash Flow": fcf_grid,
+    }
+    out = np.full(active.shape[:2] + (len(BATCH_ARRAY_METRICS),), np.nan)
+    for k, metric in enumerate(BATCH_ARRAY_METRICS):
+        if metric == "Cash Balance":
+            out[:, :, k] = G["cash"]
+        else:
+            out[:, :, k] = np.where(active, per_row[metric], 0).sum(axis=2)
+    beyond = np.arange(P.get("first_month", 1), P["months"]+1)[None, :] > P["horizon"][:, None]
+    out[beyond] = np.nan
+    return out
+
+def _run_projection_numpy(
+    states, gpci, homes, rates, util, settings, exact=True, executor=None, columns=None, workers=None,
+):
+    """Vectorized engine behind run_projection(engine="numpy")."""
+    P = _stack_scenarios([_compile_scenario(states, gpci, rates, util, settings)])
+    G = _projection_grids(P, exact, executor, columns and ["Month"] + columns, workers)
+    return _grids_to_columns(P, G, columns=columns)
+
+def _scenario_args(scenario):
+    """Accept a dict with run_projection keyword names or a positional tuple."""
+    if isinstance(scenario, dict):
+        return (scenario["states"], scenario["gpci"], scenario["rates"],
+                scenario["util"], scenario["settings"])
+    states, gpci, _homes, rates, util, settings = scenario
+    return states, gpci, rates, util, settings
+
+def run_projection_batch(scenarios, output="frame", chunk_size=500, exact=True, executor=None, workers=None):
+    """
+    Evaluate many scenarios in one vectorized pass.
+
+    scenarios: a list of scenarios, or a dict of {scenario_id: scenario}.
+        Each scenario is either a dict with keys states/gpci/homes/rates/util/
+        settings or a tuple in run_projection argument order.
+    output:
+      - "frame": long-format DataFrame, the run_projection columns with a
+        leading "Scenario" column (list position or dict key).
+      - "array": ndarray shaped (scenarios, months, len(BATCH_ARRAY_METRICS))
+        of company-wide monthly totals; months past a scenario's horizon are NaN.
+    chunk_size: scenarios evaluated per pass, bounding peak memory.
+    exact: as in run_projection; exact=False trades bit-for-bit patient
+        counts for the closed-form solve.
+    executor, workers: as in run_projection.
+
+    Each scenario's rows are identical to run_projection on the same inputs.
+    """
+    if isinstance(scenarios, dict):
+        ids, items = list(scenarios.keys()), list(scenarios.values())
+    else:
+        items = list(scenarios)
+        ids = list(range(len(items)))
+    if output not in ("frame", "array"):
+        raise ValueError(f"Unknown batch output: {output!r}")
+
+    compiled = [_compile_scenario(*_scenario_args(sc)) for sc in items]
+    # one State category set for the whole batch, so chunks concatenate as categoricals
+    state_names = list(dict.fromkeys(name for p in compiled for name in p["state_names"]))
+    parts = []
+    for lo in range(0, len(compiled), chunk_size):
+        P = _stack_scenarios(compiled[lo:lo+chunk_size])
+        G = _projection_grids(P, exact, executor, workers=workers)
+        if output == "frame":
+            parts.append(_grids_to_frame(P, G, ids[lo:lo+chunk_size], state_names))
+        else:
+            parts.append(_grids_to_array(P, G))
+
+    if output == "frame":
+        if not parts:
+            return pd.DataFrame(columns=["Scenario"] + PROJECTION_COLUMNS + ["Year"])
+        return pd.concat(parts, ignore_index=True)
+    if not parts:
+        return np.empty((0, 0, len(BATCH_ARRAY_METRICS)))
+    months = max(a.shape[1] for a in parts)
+    return np.concatenate([np.pad(a, ((0, 0), (0, months - a.shape[1]), (0, 0)),
+                                  constant_values=np.nan) for a in parts])
+
+# ---------------------------------------------------------------------------
+# Incremental recompute
+#
+# Most interactive edits (own_infrastructure_month, migration_month, late
+# launch months, ...) leave the early months untouched. IncrementalProjection
+# remembers the last run's compiled inputs and per-month checkpoints and, on
+# the next run, re-evaluates only from the first month the change can reach.
+# ---------------------------------------------------------------------------
+
+# Monthly parameters that only act in owned-infrastructure months
+_OWN_INFRA_KEYS = ("own_platform", "own_hardware_unit_cost")
+
+def _first_affected_month(old, new):
+    """
+    Earliest month whose output can differ between two compiled scenarios
+    (see _compile_scenario), or None when the inputs are equivalent.
+    """
+    if old["state_names"] != new["state_names"]:
+        return 1
+    horizon = min(old["months"], new["months"])
+    first = horizon + 1 if old["months"] != new["months"] else None
+
+    def earliest(month):
+        nonlocal first
+        first = month if first is None else min(first, month)
+
+    for key in _SCALAR_KEYS + ["billing_codes", "billing_per_active"]:
+        if old[key] != new[key]:
+            return 1
+    for key in _STATE_KEYS:
+        a, b = np.asarray(old[key]), np.asarray(new[key])
+        changed = np.flatnonzero(a != b)
+        if len(changed):
+            starts = np.minimum(np.asarray(old["start"])[changed], np.asarray(new["start"])[changed])
+            earliest(max(1, int(starts.min())))
+    own = np.asarray(old["own"][:horizon]) | np.asarray(new["own"][:horizon])
+    for key in _MONTH_KEYS + _MONTH_STATE_KEYS + ["vendor", "billing_coef"]:
+        a, b = np.asarray(old[key][:horizon]), np.asarray(new[key][:horizon])
+        changed = (a != b).reshape(horizon, -1).any(axis=1)
+        if key in _OWN_INFRA_KEYS:
+            changed &= own
+        changed = np.flatnonzero(changed)
+        if len(changed):
+            earliest(int(changed[0]) + 1)
+    for vname in set(old["pricing"]) & set(new["pricing"]):
+        if old["pricing"][vname] != new["pricing"][vname]:
+            used = np.flatnonzero(np.asarray(new["vendor"][:horizon]) == vname)
+            if len(used):
+                earliest(int(used[0]) + 1)
+    return first
+
+def _slice_months(P, first_month, opening_patients, opening_nwc, opening_cash):
+    """Restrict a stacked batch to months first_month.. and seed it with checkpoint state."""
+    Q = dict(P)
+    k = first_month - 1
+    for key in _MONTH_KEYS + _MONTH_STATE_KEYS + ["vendor", "pricing_id", "billing_coef"]:
+        Q[key] = P[key][:, k:]
+    Q["first_month"] = first_month
+    Q["opening_patients"] = opening_patients
+    Q["opening_nwc"] = opening_nwc
+    Q["opening_cash"] = opening_cash
+    return Q
+
+def _checkpoints(P, G):
+    """
+    Per-month loop state after each month of a single-scenario run: patient
+    counts per state, the last row's net working capital (prev_total_nwc),
+    closing cash, staff FTE and whether the one-time dev capex has been spent.
+    """
+    mi, nwc, cash = G["rows"][1], G["Net Working Capital"], G["cash"]
+    first_month = P.get("first_month", 1)
+    months = P["months"] - first_month + 1
+    # nwc of the last row at or before each month; the opening value until the first row
+    last_row = np.searchsorted(mi, np.arange(months), side="right") - 1
+    carried = np.concatenate((P.get("opening_nwc", np.zeros(1))[:1], nwc))
+    return {
+        "patients": G["total"][0],
+        "prev_total_nwc": carried[last_row + 1],
+        "cash": cash[0],
+        "staff_fte": P["staff_fte"][0, :, 0],
+        "dev_capex_done": np.cumsum(P["dev_capex"][0, :, 0] > 0) > 0,
+    }
+
+class IncrementalProjection:
+    """
+    Stateful run_projection (numpy engine) that resumes from checkpoints.
+
+    Each run() compares its inputs with the previous call's and recomputes
+    only months at or after the first one the change can influence; earlier
+    rows are reused as-is. Results are identical to a full run_projection.
+    `last_first_month` records where the latest run resumed (None = no change,
+    1 = full recompute).
+    """
+
+    def __init__(self):
+        self._compiled = None
+        self._df = None
+        self._ckpt = None
+        self.last_first_month = None
+
+    def run(self, states, gpci, homes, rates, util, settings):
+        compiled = _compile_scenario(states, gpci, rates, util, settings)
+        first = 1 if self._compiled is None else _first_affected_month(self._compiled, compiled)
+        months = compiled["months"]
+        self.last_first_month = first
+
+        if first is None:
+            df = self._df
+        elif first > months:
+            # horizon shortened, nothing else changed
+            df = self._df[self._df["Month"] <= months].reset_index(drop=True)
+            self._ckpt = {k: v[:months] for k, v in self._ckpt.items()}
+        else:
+            P = _stack_scenarios([compiled])
+            if first > 1:
+                k = first - 2   # checkpoint index of the month before `first`
+                P = _slice_months(P, first,
+                                  opening_patients=self._ckpt["patients"][k][None, :],
+                                  opening_nwc=np.array([self._ckpt["prev_total_nwc"][k]]),
+                                  opening_cash=np.array([self._ckpt["cash"][k]]))
+            G = _projection_grids(P)
+            tail = _grids_to_frame(P, G)
+            ckpt = _checkpoints(P, G)
+            if first > 1:
+                head = self._df[self._df["Month"] < first]
+                if not len(tail):
+                    df = head.reset_index(drop=True)
+                elif not len(head):
+                    df = tail
+                else:
+                    df = pd.concat([head, tail], ignore_index=True)
+                ckpt = {key: np.concatenate([self._ckpt[key][:first-1], v]) for key, v in ckpt.items()}
+            else:
+                df = tail
+            self._ckpt = ckpt
+
+        self._compiled = compiled
+        self._df = df
+        return df.copy()
+
+# ---------------------------------------------------------------------------
+# Projection cache
+#
+# Streamlit reruns the whole app script on every widget interaction, tab
+# switch and download click. The cache lives at module level, so it survives
+# reruns (the imported model module stays loaded) and behaves the same from
+# plain scripts.
+# ---------------------------------------------------------------------------
+
+def _canonical(obj):
+    """JSON-ready canonical form: mappings sorted by key, numpy scalars unwrapped."""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted(_canonical(v) for v in obj)
+    if isinstance(obj, np.ndarray):
+        return _canonical(obj.tolist())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+def scenario_fingerprint(states, gpci, homes, rates, util, settings, engine="numpy"):
+    """
+    Stable hash of a run_projection input set.
+
+    State order is part of the key (it decides row order); every other mapping
+    is compared by content regardless of insertion order.
+    """
+    payload = {
+        "states": [[name, _canonical(conf)] for name, conf in states.items()],
+        "gpci": _canonical(gpci), "homes": _canonical(homes),
+        "rates": _canonical(rates), "util": _canonical(util),
+        "settings": _canonical(settings), "engine": engine,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=repr, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class ProjectionCache:
+    """
+    LRU cache of projection DataFrames keyed by scenario_fingerprint.
+
+    Entries are evicted least-recently-used first once the stored frames
+    exceed max_bytes (or max_entries, if set). Callers always receive a copy,
+    so mutating a returned frame never corrupts the cache.
+    """
+
+    def __init__(self, max_bytes=256 * 1024**2, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (DataFrame, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy()
+
+    def put(self, key, df):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return   # never fits; don't flush everything else for it
+            self._entries[key] = (df.copy(), nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def resize(self, max_bytes=None, max_entries=None):
+        """Change the ceilings (max_entries=None means no entry limit) and evict down to them."""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self.max_entries = max_entries
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self):
+        while self._entries and (self._bytes > self.max_bytes or
+                                 (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+projection_cache = ProjectionCache()
+
+def run_projection_cached(
+    states, gpci, homes, rates, util, settings, engine="numpy", session=None,
+):
+    """
+    run_projection, memoized in projection_cache by scenario fingerprint.
+
+    On a miss, an IncrementalProjection `session` (numpy engine only) resumes
+    from the last run's checkpoints instead of recomputing every month.
+    """
+    key = scenario_fingerprint(states, gpci, homes, rates, util, settings, engine)
+    df = projection_cache.get(key)
+    if df is None:
+        if session is not None and engine == "numpy":
+            df = session.run(states, gpci, homes, rates, util, settings)
+        else:
+            df = run_projection(states, gpci, homes, rates, util, settings, engine=engine)
+        projection_cache.put(key, df)
     return df
 
 # Legacy single-state model for backward compatibility
@@ -793,4 +2664,77 @@ def summarize(df):
         "Cumulative EBITDA": float(df["EBITDA"].sum()),
         "Ending Cash": float(df["Cash Balance"].iloc[-1])
     }])
-    return {"kpi": kpi}
\ No newline at end of file
+    return {"kpi": kpi}
+
+
+# P&L line items in statement order; a breakdown line is kept only when it
+# has a positive total over the horizon
+PNL_REVENUE_LINES = ["Rev_99454", "Rev_99457", "Rev_99458", "Rev_99453", "Rev_99490",
+                     "Rev_99439", "Rev_99495", "Rev_99496", "Rev_99091"]
+PNL_EXPENSE_LINES = ["Staffing Cost", "Platform Cost", "Hardware Cost", "Overhead"]
+
+def build_pnl(results):
+    """
+    Company-wide monthly P&L from run_projection results, as numbers.
+
+    One row per line item (index "Line Item": Total Revenue, the revenue
+    codes, Total Costs, the expense lines, EBITDA, EBITDA Margin as a
+    fraction, Total Patients, Revenue/Patient, Cash Balance) and one column
+    per month. Ratios are NaN where undefined. Formatting is left to the
+    caller (see pnl_table.pnl_styler).
+    """
+    lines = ["Total Revenue", "Total Costs", "EBITDA", "Total Patients"]
+    breakdown = [c for c in PNL_REVENUE_LINES + PNL_EXPENSE_LINES if c in results.columns]
+    grouped = results.groupby("Month", sort=True)
+    monthly = grouped[lines + breakdown].sum()
+    monthly["Cash Balance"] = grouped["Cash Balance"].first()   # company-wide
+
+    revenue, patients = monthly["Total Revenue"], monthly["Total Patients"]
+    monthly["EBITDA Margin"] = (monthly["EBITDA"] / revenue).where(revenue > 0)
+    monthly["Revenue/Patient"] = (revenue / patients).where(patients > 0)
+
+    def shown(codes):
+        return [c for c in codes if c in breakdown and monthly[c].sum() > 0]
+
+    order = (["Total Revenue"] + shown(PNL_REVENUE_LINES) + ["Total Costs"] + shown(PNL_EXPENSE_LINES) +
+             ["EBITDA", "EBITDA Margin", "Total Patients", "Revenue/Patient", "Cash Balance"])
+    pnl = monthly[order].T
+    pnl.index.name = "Line Item"
+    return pnl
+
+# Chart revenue categories: billing codes summed into each category. Codes
+# without a Rev_<code> column in the results count as zero.
+REVENUE_CATEGORIES = {
+    "RPM": ["99454", "99457", "99458"],
+    "CCM": ["99490", "99439", "99487", "99489"],
+    "TCM": ["99495", "99496"],
+    "Setup": ["99453"],
+    "Data Review": ["99091"],
+    "PCM": ["99426", "99427"],
+}
+
+def revenue_categories(results):
+    """
+    Revenue per REVENUE_CATEGORIES category for each row of run_projection
+    results, as a DataFrame on the same index (one column per category).
+    """
+    out = {}
+    for category, codes in REVENUE_CATEGORIES.items():
+        present = [c for c in ("Rev_" + code for code in codes) if c in results.columns]
+        out[category] = results[present].sum(axis=1) if present else 0.0
+    return pd.DataFrame(out, index=results.index)
+
+def phase_intervals(results):
+    """
+    Consecutive runs of the company phase, one row per run (Phase, Start, End).
+
+    A month's phase is the latest of its rows' phases in PHASE_NAMES order,
+    so any expansion-state row makes it "Multi-State".
+    """
+    codes = pd.Categorical(results["Phase"], categories=PHASE_NAMES).codes
+    monthly = pd.Series(codes, index=results["Month"].to_numpy()).groupby(level=0).max()
+    months, phase = monthly.index.to_numpy(), monthly.to_numpy()
+    starts = np.flatnonzero(np.r_[True, phase[1:] != phase[:-1]])
+    ends = np.r_[starts[1:], len(phase)] - 1
+    return pd.DataFrame({"Phase": np.asarray(PHASE_NAMES, dtype=object)[phase[starts]],
+                         "Start": months[starts], "End": months[ends]})
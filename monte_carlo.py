@@ -0,0 +1,156 @@
+"""
+Monte Carlo simulation over the full operating model.
+
+Each draw perturbs billing rates, utilization, attrition and capture rates,
+then runs the complete projection. Draws are evaluated in chunks with
+model.run_projection_batch (one vectorized pass per chunk) and chunks are
+spread across a process pool. Percentile bands of patients, EBITDA and cash
+are streamed back after every finished chunk so the UI can redraw while the
+simulation is still running.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import model
+
+MC_METRICS = ["Total Patients", "Total Revenue", "EBITDA", "Cash Balance"]
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def default_mc_distributions():
+    """
+    Sampling assumptions per input, grouped like the scenario dicts.
+
+    - "normal": base value * (1 + N(0, rel_sd)), clipped to [min, max]
+    - "triangular": absolute low / mode / high (ignores the base value)
+    """
+    util_keys = ["rpm_setup", "rpm_16day", "rpm_20min", "rpm_40min", "md_99091",
+                 "ccm_99490", "ccm_99439", "tcm_99495", "tcm_99496"]
+    return {
+        "util": {
+            **{k: {"dist": "normal", "rel_sd": 0.10, "min": 0.0, "max": 1.0} for k in util_keys},
+            "collection_rate": {"dist": "normal", "rel_sd": 0.03, "min": 0.80, "max": 1.0},
+        },
+        "rates": {
+            code: {"dist": "normal", "rel_sd": 0.05, "min": 0.0, "max": None}
+            for code in ["99453", "99454", "99457", "99458", "99091", "99490", "99439", "99495", "99496"]
+        },
+        "settings": {
+            "monthly_attrition": {"dist": "triangular", "low": 0.02, "mode": 0.03, "high": 0.05},
+            "initial_capture_rate": {"dist": "normal", "rel_sd": 0.15, "min": 0.2, "max": 1.0},
+            "target_capture_rate": {"dist": "normal", "rel_sd": 0.10, "min": 0.5, "max": 1.5},
+        },
+    }
+
+
+def _draw(rng, spec, base, n):
+    if spec["dist"] == "triangular":
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], n)
+    values = base * (1 + rng.normal(0.0, spec["rel_sd"], n))
+    return np.clip(values, spec.get("min"), spec.get("max"))
+
+
+def sample_scenarios(base, distributions, n, rng):
+    """
+    n perturbed copies of a base scenario (dict with states/gpci/homes/rates/
+    util/settings keys), drawing every input once per scenario from rng.
+    Each copy also gets its own settings["variation_seed"].
+    """
+    draws = {}
+    for group, specs in distributions.items():
+        for key, spec in specs.items():
+            base_value = base[group][key]["rate"] if group == "rates" else base[group].get(key, 0.0)
+            draws[(group, key)] = _draw(rng, spec, base_value, n)
+
+    # independent, reproducible intake-variation stream per draw
+    variation_seeds = rng.integers(0, 2**63, size=n)
+
+    scenarios = []
+    for i in range(n):
+        sc = {"states": base["states"], "gpci": base["gpci"], "homes": base["homes"],
+              "rates": {code: dict(r) for code, r in base["rates"].items()}, "util": dict(base["util"]),
+              "settings": dict(base["settings"])}
+        for (group, key), values in draws.items():
+            if group == "rates":
+                sc["rates"][key]["rate"] = float(values[i])
+            else:
+                sc[group][key] = float(values[i])
+        sc["settings"]["variation_seed"] = int(variation_seeds[i])
+        scenarios.append(sc)
+    return scenarios
+
+
+def _simulate_chunk(base, distributions, seed_seq, n):
+    """Worker: sample n draws and return their (n, months, MC_METRICS) outputs."""
+    rng = np.random.default_rng(seed_seq)
+    scenarios = sample_scenarios(base, distributions, n, rng)
+    cube = model.run_projection_batch(scenarios, output="array", chunk_size=n)
+    idx = [model.BATCH_ARRAY_METRICS.index(m) for m in MC_METRICS]
+    return cube[:, :, idx]
+
+
+def percentile_bands(cube, percentiles=DEFAULT_PERCENTILES):
+    """{metric: DataFrame indexed by Month with one P<k> column per percentile}."""
+    months = np.arange(1, cube.shape[1] + 1)
+    bands = {}
+    for k, metric in enumerate(MC_METRICS):
+        values = np.nanpercentile(cube[:, :, k], percentiles, axis=0)
+        bands[metric] = pd.DataFrame(values.T, index=pd.Index(months, name="Month"),
+                                     columns=[f"P{p}" for p in percentiles])
+    return bands
+
+
+def run_monte_carlo(base, n_draws=10_000, distributions=None, seed=42, workers=None,
+                    chunk_size=500, percentiles=DEFAULT_PERCENTILES):
+    """
+    Generator over simulation progress.
+
+    Yields a dict after every finished chunk:
+      {"done": draws finished, "total": n_draws, "bands": percentile_bands(...),
+       "draws": (done, months, MC_METRICS) array of raw outputs}
+    The last yielded value covers all draws. Chunks use independent child
+    seeds of `seed`, so results do not depend on worker count or completion
+    order. workers=1 (or a platform without process support) runs in-process.
+    """
+    distributions = distributions or default_mc_distributions()
+    sizes = [min(chunk_size, n_draws - lo) for lo in range(0, n_draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or os.cpu_count() or 1
+    finished = {}
+
+    def progress():
+        cube = np.concatenate([finished[i] for i in sorted(finished)])
+        return {"done": len(cube), "total": n_draws,
+                "bands": percentile_bands(cube, percentiles), "draws": cube}
+
+    pool = None
+    if workers > 1 and len(sizes) > 1:
+        try:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(sizes)))
+        except (OSError, NotImplementedError):
+            pool = None
+
+    if pool is None:
+        for i, (seed_seq, n) in enumerate(zip(seeds, sizes)):
+            finished[i] = _simulate_chunk(base, distributions, seed_seq, n)
+            yield progress()
+        return
+
+    with pool:
+        futures = {pool.submit(_simulate_chunk, base, distributions, seed_seq, n): i
+                   for i, (seed_seq, n) in enumerate(zip(seeds, sizes))}
+        for future in as_completed(futures):
+            finished[futures[future]] = future.result()
+            yield progress()
+
+
+def monte_carlo_bands(base, n_draws=10_000, **kwargs):
+    """Run the whole simulation and return the final progress dict."""
+    result = None
+    for result in run_monte_carlo(base, n_draws, **kwargs):
+        pass
+    return result
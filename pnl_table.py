@@ -0,0 +1,178 @@
+"""
+Monthly P&L statement shown (and exported) by app_multistate
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from model import build_pnl
+
+REVENUE_LINES = {
+    'Rev_99454': '📱 Device Supply (99454)',
+    'Rev_99457': '🩺 RPM Management (99457)',
+    'Rev_99458': '⚕️ Additional RPM (99458)',
+    'Rev_99453': '🎯 Setup & Education (99453)',
+    'Rev_99490': '🏥 CCM Base (99490)',
+    'Rev_99439': '➕ Additional CCM (99439)',
+    'Rev_99495': '🔄 TCM Moderate (99495)',
+    'Rev_99496': '🔄 TCM High (99496)',
+    'Rev_99091': '📊 Data Review (99091)'
+}
+
+EXPENSE_LINES = {
+    'Staffing Cost': '👥 Staffing',
+    'Platform Cost': '💻 Platform/Tech',
+    'Hardware Cost': '📱 Hardware/Devices',
+    'Overhead': '🏢 Overhead'
+}
+
+
+# Statement layout: (label, build_pnl line) per row; None marks a blank row
+def _statement_rows(pnl):
+    lines = list(pnl.index)
+    rows = [('💰 REVENUE', 'Total Revenue')]
+    rows += [(REVENUE_LINES[code], code) for code in REVENUE_LINES if code in lines]
+    rows += [('', None), ('💼 EXPENSES', 'Total Costs')]
+    rows += [(EXPENSE_LINES[name], name) for name in EXPENSE_LINES if name in lines]
+    rows += [('', None), ('📊 EBITDA', 'EBITDA'), ('   EBITDA Margin', 'EBITDA Margin'),
+             ('', None), ('🏥 METRICS', None),
+             ('   Total Patients', 'Total Patients'), ('   Revenue/Patient', 'Revenue/Patient')]
+    return rows
+
+
+def build_pnl_table(results):
+    """
+    Company-wide monthly P&L from run_projection results.
+
+    Returns (pnl_df, monthly_pnl): the statement as numbers (a "Line Item"
+    label column, an always-blank "Type" column kept for the export layout,
+    then one "Month N" column per month; blank and section rows are NaN),
+    and the monthly totals it was built from. Format it for display with
+    pnl_styler.
+    """
+    pnl = build_pnl(results)
+    rows = _statement_rows(pnl)
+    values = pnl.reindex([line for _, line in rows]).to_numpy()
+    pnl_df = pd.DataFrame(values, columns=[f"Month {int(m)}" for m in pnl.columns])
+    pnl_df.insert(0, 'Line Item', [label for label, _ in rows])
+    pnl_df.insert(1, 'Type', "")
+
+    monthly_pnl = pnl.loc[['Total Revenue', 'EBITDA', 'Total Patients', 'Total Costs', 'Cash Balance']].T
+    monthly_pnl['Total Patients'] = monthly_pnl['Total Patients'].astype('int64')
+    monthly_pnl.columns.name = None
+    return pnl_df, monthly_pnl.reset_index()
+
+
+def _dollars(x):
+    return f"${x:,.0f}"
+
+
+def _dollars_or_dash(x):
+    return f"${x:,.0f}" if x > 0 else "-"
+
+
+# Display format per statement label (breakdown lines show "-" for zero months)
+_ROW_FORMATS = {
+    '💰 REVENUE': (_dollars, ""), '💼 EXPENSES': (_dollars, ""), '📊 EBITDA': (_dollars, ""),
+    '   EBITDA Margin': ("{:.1%}", "-"),
+    '   Total Patients': ("{:,.0f}", ""),
+    '   Revenue/Patient': ("${:.0f}", "-"),
+    **{label: (_dollars_or_dash, "-") for label in list(REVENUE_LINES.values()) + list(EXPENSE_LINES.values())},
+}
+
+
+def pnl_styler(pnl_df):
+    """Styler that formats build_pnl_table's numeric statement at render time."""
+    months = [c for c in pnl_df.columns if c not in ('Line Item', 'Type')]
+    styler = pnl_df.style.format(na_rep="", subset=months)
+    labels = pnl_df['Line Item']
+    for label, (formatter, na_rep) in _ROW_FORMATS.items():
+        rows = labels.index[labels == label]
+        if len(rows):
+            styler = styler.format(formatter, na_rep=na_rep, subset=pd.IndexSlice[rows, months])
+    return styler
+
+
+def _sheet_rows(df):
+    """Header plus data rows of df as plain Python values (NaN becomes an empty cell)."""
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+            values = values.astype(object).where(values.notna(), None)
+            columns.append(values.tolist())
+        else:
+            data = values.to_numpy()
+            col = data.tolist()
+            if data.dtype.kind == 'f' and np.isnan(data).any():
+                col = [None if v != v else v for v in col]
+            columns.append(col)
+    yield [str(name) for name in df.columns]
+    yield from zip(*columns)
+
+
+def pnl_excel_bytes(pnl_df, monthly_pnl, results):
+    """
+    Excel workbook with the P&L, monthly summary and detailed results sheets.
+
+    Written with openpyxl's write-only (streaming) workbook: rows go straight
+    to the file instead of a cell-by-cell in-memory sheet.
+    """
+    workbook = Workbook(write_only=True)
+    for title, df in [('P&L Statement', pnl_df), ('Monthly Summary', monthly_pnl),
+                      ('Detailed Results', results)]:
+        sheet = workbook.create_sheet(title)
+        for row in _sheet_rows(df):
+            sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Download payloads, built on first request and kept per projection result.
+# Streamlit reruns the app on every interaction; the cache lives at module
+# level so repeated clicks (and reruns) reuse the same bytes.
+_EXPORT_CACHE = OrderedDict()
+_EXPORT_CACHE_SIZE = 16
+_EXPORT_LOCK = threading.Lock()
+
+
+def results_fingerprint(results):
+    """Content hash of a run_projection frame."""
+    hashed = pd.util.hash_pandas_object(results, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes() + str(list(results.columns)).encode()).hexdigest()
+
+
+def pnl_export(kind, pnl_df, monthly_pnl, results):
+    """
+    Download payload for the P&L export buttons, built once per result.
+
+    kind: 'xlsx' (pnl_excel_bytes), 'pnl_csv' or 'monthly_csv'. pnl_df and
+    monthly_pnl are the build_pnl_table output for `results`, so the cache
+    is keyed on the results fingerprint. Meant for st.download_button's
+    callable data, which only runs when the button is clicked.
+    """
+    key = (kind, results_fingerprint(results))
+    with _EXPORT_LOCK:
+        if key in _EXPORT_CACHE:
+            _EXPORT_CACHE.move_to_end(key)
+            return _EXPORT_CACHE[key]
+    if kind == 'xlsx':
+        payload = pnl_excel_bytes(pnl_df, monthly_pnl, results)
+    elif kind in ('pnl_csv', 'monthly_csv'):
+        buffer = StringIO()
+        (pnl_df if kind == 'pnl_csv' else monthly_pnl).to_csv(buffer, index=False)
+        payload = buffer.getvalue()
+    else:
+        raise ValueError(f"Unknown export kind: {kind!r}")
+    with _EXPORT_LOCK:
+        _EXPORT_CACHE[key] = payload
+        while len(_EXPORT_CACHE) > _EXPORT_CACHE_SIZE:
+            _EXPORT_CACHE.popitem(last=False)
+    return payload
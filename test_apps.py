@@ -0,0 +1,24 @@
+"""
+Smoke test: run the Streamlit dashboards headless (AppTest) on their default
+inputs and check that every tab renders without an exception or error box
+"""
+
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+HERE = Path(__file__).parent
+APPS = ["app_multistate.py", "app_simple.py", "app_single_state.py", "app_beautiful.py"]
+
+print("APP SMOKE TEST: default inputs, all tabs")
+print("=" * 70)
+
+for app in APPS:
+    at = AppTest.from_file(str(HERE / app), default_timeout=180).run()
+    exceptions = [e.value for e in at.exception]
+    errors = [e.value for e in at.error]
+    assert not exceptions, f"{app}: {exceptions}"
+    assert not errors, f"{app}: {errors}"
+    print(f"{app:<24} {len(at.get('plotly_chart')):>2} charts, {len(at.dataframe):>2} tables ✅")
+
+print("✅ Dashboards render without errors")
@@ -15,7 +15,8 @@ states_fl = {
 gpci_fl = {"Florida": 1.05}
 homes_fl = {"Florida": 60}
 
-df_fl = model.run_projection(states_fl, gpci_fl, homes_fl, model.default_rates(), model.default_util(), settings)
+df_fl = model.run_projection(states_fl, gpci_fl, homes_fl, model.default_rates(), model.default_util(), settings,
+                              columns=['Total Patients', 'Total Revenue'])
 
 print("\nFlorida Growth (first 12 months):")
 for m in range(1, 13):
@@ -32,7 +33,8 @@ states_va = {
 gpci_va = {"Virginia": 1.00}
 homes_va = {"Virginia": 100}
 
-df_va = model.run_projection(states_va, gpci_va, homes_va, model.default_rates(), model.default_util(), settings)
+df_va = model.run_projection(states_va, gpci_va, homes_va, model.default_rates(), model.default_util(), settings,
+                              columns=['Total Patients', 'Total Revenue'])
 
 print("\nVirginia Growth (first 12 months):")
 for m in range(1, 13):
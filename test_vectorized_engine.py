@@ -0,0 +1,249 @@
+"""
+Check that the NumPy engine reproduces the reference loop engine exactly
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import model
+
+GPCI = {"Virginia": 1.00, "Florida": 1.05, "Texas": 1.03, "New York": 1.08, "California": 1.10}
+HOMES = {"Virginia": 40, "Florida": 60, "Texas": 80, "New York": 50, "California": 70}
+
+scenarios = {
+    'Virginia only': ({"Virginia": {"start_month": 1, "initial_patients": 100}}, {}),
+    'Default rollout': (model.default_multi_state_config(), {}),
+    'Aggressive + Ora migration': (model.default_multi_state_config(), {
+        'hill_valley_monthly_discharges': 1100, 'target_capture_rate': 0.95,
+        'growth_multiplier': 1.6, 'monthly_attrition': 0.025,
+        'migration_month': 18, 'enhanced_billing': True,
+    }),
+    '120 months, own infrastructure': (model.default_multi_state_config(), {
+        'months': 120, 'own_infrastructure_month': 61, 'initial_vendor': 'CareSimple',
+    }),
+    'Theoretical billing codes': (model.default_multi_state_config(), {
+        'include_theoretical': True, 'enhanced_billing': True,
+    }),
+    'Scheduled attrition and costs': (model.default_multi_state_config(), {
+        'months': 72,
+        'monthly_attrition': model.Schedule.ramp({1: 0.04, 36: 0.025}),
+        'clinical_staff_pmpm': model.Schedule.annual(21.43, 0.03),
+        'overhead_base': model.Schedule.step({1: 50000, 25: 65000}),
+    }),
+}
+
+print("ENGINE PARITY: python loop vs numpy")
+print("=" * 70)
+
+for name, (states, overrides) in scenarios.items():
+    settings = model.default_settings()
+    settings.update(overrides)
+    args = (states, GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+
+    t0 = time.perf_counter()
+    df_loop = model.run_projection(*args, engine="python")
+    t1 = time.perf_counter()
+    df_np = model.run_projection(*args, engine="numpy")
+    t2 = time.perf_counter()
+
+    pd.testing.assert_frame_equal(df_loop, df_np, rtol=0, atol=0)
+    print(f"{name:<32} rows={len(df_np):>4}  loop={1000*(t1-t0):7.1f}ms  numpy={1000*(t2-t1):6.1f}ms  ✅")
+
+print("=" * 70)
+print("✅ Engines agree exactly on every scenario")
+
+print("\nBATCH PARITY: run_projection_batch vs one call per scenario")
+print("=" * 70)
+
+batch = {}
+for name, (states, overrides) in scenarios.items():
+    settings = model.default_settings()
+    settings.update(overrides)
+    batch[name] = dict(states=states, gpci=GPCI, homes=HOMES, rates=model.default_rates(),
+                       util=model.default_util(), settings=settings)
+
+t0 = time.perf_counter()
+long_df = model.run_projection_batch(batch)
+cube = model.run_projection_batch(batch, output="array")
+t1 = time.perf_counter()
+
+cash_idx = model.BATCH_ARRAY_METRICS.index("Cash Balance")
+for i, (name, sc) in enumerate(batch.items()):
+    single = model.run_projection(sc["states"], GPCI, HOMES, sc["rates"], sc["util"], sc["settings"])
+    rows = long_df[long_df["Scenario"] == name].drop(columns="Scenario").reset_index(drop=True)
+    # batch State categories span every scenario in the batch; compare labels
+    pd.testing.assert_frame_equal(single, rows, rtol=0, atol=0, check_categorical=False)
+    month_cash = single.groupby("Month")["Cash Balance"].first()
+    assert (cube[i, month_cash.index - 1, cash_idx] == month_cash.to_numpy()).all()
+    print(f"{name:<32} rows={len(rows):>4}  ✅")
+
+print(f"Batch of {len(batch)} scenarios: {1000*(t1-t0):.1f}ms, array shape {cube.shape}")
+print("✅ Batch rows match single runs exactly")
+
+print("\nINCREMENTAL RECOMPUTE: IncrementalProjection vs full runs")
+print("=" * 70)
+
+session = model.IncrementalProjection()
+states = model.default_multi_state_config()
+settings = model.default_settings()
+settings['months'] = 120
+edits = [
+    ('initial run', {}),
+    ('no change', {}),
+    ('own_infrastructure_month 61 -> 90', {'own_infrastructure_month': 90}),
+    ('migration_month None -> 48', {'migration_month': 48}),
+    ('growth_multiplier 1.3 -> 1.5', {'growth_multiplier': 1.5}),
+    ('months 120 -> 96', {'months': 96}),
+    ('monthly_attrition 3% -> 2.5%', {'monthly_attrition': 0.025}),
+]
+for name, change in edits:
+    settings.update(change)
+    args = (states, GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+    t0 = time.perf_counter()
+    df_inc = session.run(*args)
+    t1 = time.perf_counter()
+    pd.testing.assert_frame_equal(df_inc, model.run_projection(*args, engine="python"), rtol=0, atol=0)
+    print(f"{name:<36} resumed at month {str(session.last_first_month):>4}  {1000*(t1-t0):6.1f}ms  ✅")
+
+print("✅ Incremental runs match full recomputes exactly")
+
+print("\nPARAMETER VALIDATION: compile_params rejects unusable settings")
+print("=" * 70)
+
+for key, value in [('months', 0), ('monthly_attrition', 1.5), ('initial_vendor', 'Nobody'),
+                   ('patients_per_manager', 0), ('migration_month', 0)]:
+    bad = {**model.default_settings(), key: value}
+    try:
+        model.compile_params(bad, model.default_util(), model.default_rates())
+    except ValueError as e:
+        print(f"{key} = {value!r:<10} ✅ {e}")
+    else:
+        raise AssertionError(f"{key} = {value!r} was accepted")
+
+params = model.compile_params(model.default_settings(), model.default_util(), model.default_rates())
+try:
+    params.months = 12
+except (AttributeError, TypeError):
+    print("✅ ModelParams is frozen")
+else:
+    raise AssertionError("ModelParams accepted an assignment")
+
+unpriced = {**model.default_rates(), "99999": {"rate": 50.0, "multiplier": 1.0, "type": "monthly"}}
+skipped = model.compile_params(model.default_settings(), model.default_util(), unpriced)
+assert not skipped.billing_coef[:, skipped.billing_codes.index("99999")].any()
+print("✅ A rates code with no utilization rate is skipped")
+
+print("\nPARALLEL STATE PHASE: executor vs serial")
+print("=" * 70)
+
+with ThreadPoolExecutor(max_workers=3) as pool:
+    for name, (states, overrides) in scenarios.items():
+        settings = model.default_settings()
+        settings.update(overrides)
+        args = (states, GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+        threaded = model.run_projection(*args, executor=pool, workers=3)
+        pd.testing.assert_frame_equal(model.run_projection(*args), threaded, rtol=0, atol=0)
+        print(f"{name:<32} ✅")
+
+print("✅ Per-state chunks on a thread pool match the serial run exactly")
+
+print("\nCOLUMN SUBSETS: run_projection(columns=...) vs the full frame")
+print("=" * 70)
+
+states, overrides = scenarios['120 months, own infrastructure']
+settings = {**model.default_settings(), **overrides}
+args = (states, GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+full = model.run_projection(*args)
+for columns in [["Total Patients"], ["Cash Balance"], ["Per-Patient Margin", "Rev_99457"], ["Phase"]]:
+    expected = full[["Month", "State"] + columns + ["Year"]]
+    for engine in ["numpy", "python"]:
+        pd.testing.assert_frame_equal(model.run_projection(*args, engine=engine, columns=columns), expected,
+                                      rtol=0, atol=0)
+    print(f"{', '.join(columns):<32} ✅")
+
+print("✅ Column subsets match the full projection")
+
+print("\nPROJECTION CUBE: memoized rollups vs groupby on the frame")
+print("=" * 70)
+
+cube = model.run_projection(*args, output="cube")
+pd.testing.assert_frame_equal(cube.to_frame(), full, rtol=0, atol=0)
+monthly = full.groupby("Month").agg({"Total Revenue": "sum", "EBITDA": "sum", "Cash Balance": "first"})
+pd.testing.assert_frame_equal(cube.by_month()[monthly.columns], monthly, rtol=1e-12, atol=1e-6)
+final = full[full["Month"] == 120].groupby("State", observed=True)[["Total Revenue", "Total Patients"]].sum()
+pd.testing.assert_frame_equal(cube.by_state(120)[final.columns], final, rtol=1e-12, atol=1e-6,
+                              check_dtype=False, check_index_type=False)
+yearly = full.groupby("Year")[["Free Cash Flow", "Total Revenue"]].sum()
+pd.testing.assert_frame_equal(cube.by_year()[yearly.columns], yearly, rtol=1e-12, atol=1e-6, check_index_type=False)
+assert (cube.by_quarter()["Cash Balance"].to_numpy() == cube.by_month()["Cash Balance"].to_numpy()[2::3]).all()
+assert cube.by_year() is cube.by_year()
+pd.testing.assert_frame_equal(model.ProjectionCube.from_frame(full).by_year(), cube.by_year())
+print("✅ Cube rollups match the DataFrame groupbys")
+
+print("\nTOLERANCE MODE: exact=False vs the exact engine")
+print("=" * 70)
+
+tolerance_scenarios = {**scenarios, 'Market cap 8,000': (model.default_multi_state_config(), {'max_patients': 8000})}
+for name, (states, overrides) in tolerance_scenarios.items():
+    settings = model.default_settings()
+    settings.update(overrides)
+    args = (states, GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+    exact = model.run_projection(*args)
+    relaxed = model.run_projection(*args, exact=False)
+    worst = {}
+    for column in ["Total Patients", "New Patients", "Total Revenue", "Cash Balance"]:
+        gap = (relaxed[column] - exact[column]).abs()
+        worst[column] = (gap / exact[column].abs().clip(lower=1)).max()
+        assert worst[column] < 0.01, f"{name}: {column} off by {worst[column]:.2%}"
+    print(f"{name:<32} " + "  ".join(f"{rel:.2%}" for rel in worst.values()) + "  ✅")
+
+print("✅ Tolerance mode stays within 1% of the exact patients, intake, revenue and cash")
+
+print("\nCHART HELPERS: revenue categories and phase intervals")
+print("=" * 70)
+
+categories = model.revenue_categories(full)
+rev_columns = [c for c in full.columns if c.startswith("Rev_")]
+assert ((categories.sum(axis=1) - full[rev_columns].sum(axis=1)).abs() < 1e-6).all()
+phases = model.phase_intervals(full)
+assert phases["Start"].iloc[0] == 1 and phases["End"].iloc[-1] == 120
+assert (phases["Start"].to_numpy()[1:] == phases["End"].to_numpy()[:-1] + 1).all()
+home = full[full["State"] == "Virginia"]
+for phase, start, end in zip(*model.phase_intervals(home).to_dict("list").values()):
+    assert set(home[home["Month"].between(start, end)]["Phase"]) == {phase}
+print("✅ Category columns add up to the code revenue and phase runs tile the horizon")
+
+print("\nDECIMATION: chart series at a point budget")
+print("=" * 70)
+
+settings = {**model.default_settings(), "months": 240}
+args = (model.default_multi_state_config(), GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+long_cube = model.run_projection(*args, output="cube")
+for method in ["minmax", "lttb"]:
+    for metric in ["Cash Balance", "EBITDA", "Total Patients"]:
+        full = long_cube.series(metric)
+        short = long_cube.series(metric, 60, method=method)
+        assert len(short) <= 60 and short.index[0] == 1 and short.index[-1] == 240
+        assert (short == full[short.index]).all()
+        if method == "minmax":
+            assert short.min() == full.min() and short.max() == full.max()
+    print(f"{method:<8} 240 months -> {len(short)} points ✅")
+assert long_cube.series("EBITDA", 60) is long_cube.series("EBITDA", 60)
+print("✅ Decimated series keep the end points, and min/max buckets keep troughs and peaks")
+
+print("\nINTAKE VARIATION: per-state streams")
+print("=" * 70)
+
+settings = {**model.default_settings(), "hill_valley_monthly_discharges": 400, "months": 72}
+with_ca = model.default_multi_state_config()
+without_ca = {name: conf for name, conf in with_ca.items() if name != "California"}
+reordered = dict(reversed(list(without_ca.items())))
+runs = [model.run_projection(states, GPCI, HOMES, model.default_rates(), model.default_util(), settings)
+        for states in [with_ca, without_ca, reordered]]
+for state in without_ca:
+    intake = [run[run["State"] == state]["New Patients"].to_numpy() for run in runs]
+    assert (intake[0] == intake[1]).all() and (intake[1] == intake[2]).all(), state
+    print(f"{state:<12} same intake with California added and states reordered ✅")
+print("✅ A state's intake variation doesn't depend on the other states")
@@ -4,6 +4,9 @@ import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from model import ProjectionCube
+from monte_carlo import MC_METRICS, run_monte_carlo
+
 # Ora Living Brand Colors
 ORA_COLORS = {
     'primary_dark': '#200E1B',
@@ -13,13 +16,17 @@ ORA_COLORS = {
     'orange': '#DF9039',
 }
 
-def show_valuation_analysis(df):
+def show_valuation_analysis(df, scenario):
     """
     Comprehensive valuation analysis for Ora Living including:
     - DCF Analysis
     - Comparable Company Analysis  
     - Healthcare Tech Multiples
     - Sensitivity Analysis
+
+    scenario: the model inputs behind df (dict with states/gpci/homes/rates/
+    util/settings) that the Monte Carlo simulation reruns. Required: pass
+    None explicitly to show the tab without the simulation.
     """
     
     st.markdown('<div class="section-header">💰 Valuation Analysis</div>', unsafe_allow_html=True)
@@ -42,7 +49,7 @@ def show_valuation_analysis(df):
         show_healthtech_multiples()
         
     with val_tab4:
-        show_sensitivity_analysis(df)
+        show_sensitivity_analysis(df, scenario)
 
 def show_dcf_analysis(df):
     """Discounted Cash Flow valuation analysis"""
@@ -67,21 +74,16 @@ def show_dcf_analysis(df):
     with col2:
         st.markdown("**Free Cash Flow Projections**")
         
-        # Extract FCF from model
+        # Extract FCF from model (model years with rows, up to the forecast period)
+        by_year = ProjectionCube.from_frame(df).by_year()
         annual_data = []
-        for year in range(1, projection_years + 1):
-            year_months = [i for i in range((year-1)*12 + 1, year*12 + 1) if i <= len(df)]
-            if year_months:
-                year_df = df[df['Month'].isin(year_months)]
-                fcf = year_df['Free Cash Flow'].sum()
-                revenue = year_df['Total Revenue'].sum()
-                ebitda = year_df['EBITDA'].sum()
-                annual_data.append({
-                    'Year': year,
-                    'Revenue': revenue,
-                    'EBITDA': ebitda,
-                    'Free Cash Flow': fcf
-                })
+        for year in by_year.index[by_year.index <= projection_years]:
+            annual_data.append({
+                'Year': year,
+                'Revenue': by_year.at[year, 'Total Revenue'],
+                'EBITDA': by_year.at[year, 'EBITDA'],
+                'Free Cash Flow': by_year.at[year, 'Free Cash Flow']
+            })
         
         fcf_df = pd.DataFrame(annual_data)
         
@@ -349,8 +351,8 @@ def show_healthtech_multiples():
         - **Adjustment**: {net_adjustment:+.1f}%
         """)
 
-def show_sensitivity_analysis(df):
-    """Sensitivity analysis for key valuation drivers"""
+def show_sensitivity_analysis(df, scenario):
+    """Sensitivity analysis for key valuation drivers (see show_valuation_analysis for scenario)"""
     
     st.markdown("### 📈 Valuation Sensitivity Analysis")
     
@@ -390,11 +392,11 @@ def show_sensitivity_analysis(df):
         }
         
         scenario_results = []
-        for scenario, params in scenarios.items():
+        for case, params in scenarios.items():
             adjusted_revenue = base_annual_revenue * params['revenue_factor']
             valuation = adjusted_revenue * params['multiple_factor']
             scenario_results.append({
-                'Scenario': scenario,
+                'Scenario': case,
                 'Annual Revenue': f"${adjusted_revenue:,.0f}",
                 'Multiple': f"{params['multiple_factor']:.1f}x",
                 'Valuation': f"${valuation:,.0f}",
@@ -404,28 +406,35 @@ def show_sensitivity_analysis(df):
         scenario_df = pd.DataFrame(scenario_results)
         st.dataframe(scenario_df, use_container_width=True, hide_index=True)
     
-    # Monte Carlo simulation parameters
-    st.markdown("### 🎲 Monte Carlo Valuation Simulation")
-    
-    if st.button("Run Monte Carlo Simulation (1000 iterations)"):
-        # Simulation parameters
-        n_simulations = 1000
-        
-        # Random variables
-        np.random.seed(42)
-        revenue_multipliers = np.random.normal(1.0, 0.25, n_simulations)  # 25% std dev
-        multiples = np.random.normal(base_revenue_multiple, 1.5, n_simulations)  # 1.5x std dev
-        
-        # Calculate valuations
-        valuations = []
-        for i in range(n_simulations):
-            sim_revenue = base_annual_revenue * max(0.3, revenue_multipliers[i])  # Floor at 30%
-            sim_multiple = max(1.0, multiples[i])  # Floor at 1x
-            valuation = sim_revenue * sim_multiple
-            valuations.append(valuation)
-        
-        valuations = np.array(valuations)
-        
+    # Monte Carlo simulation over the full operating model
+    st.markdown("### 🎲 Monte Carlo Simulation")
+
+    if scenario is None:
+        st.warning("Monte Carlo simulation unavailable: this page did not pass the model inputs "
+                   "behind these results, so there is nothing to rerun.")
+        return
+
+    n_simulations = st.select_slider("Draws", options=[1000, 2500, 5000, 10000], value=5000)
+    st.caption("Each draw perturbs billing rates, utilization, collection, attrition and capture "
+               "rates, then runs the full projection.")
+
+    if st.button(f"Run Monte Carlo Simulation ({n_simulations:,} draws)"):
+        progress_bar = st.progress(0.0)
+        chart_slot = st.empty()
+
+        result = None
+        for result in run_monte_carlo(scenario, n_draws=n_simulations, seed=42):
+            progress_bar.progress(result["done"] / result["total"],
+                                  text=f"{result['done']:,} / {result['total']:,} draws")
+            chart_slot.plotly_chart(_percentile_band_figure(result["bands"]), use_container_width=True)
+
+        # Valuation: trailing-12-month revenue of each draw x a sampled multiple
+        draws = result["draws"]
+        trailing_revenue = np.nansum(draws[:, -12:, MC_METRICS.index("Total Revenue")], axis=1)
+        rng = np.random.default_rng(42)
+        multiples = np.maximum(1.0, rng.normal(base_revenue_multiple, 1.5, len(trailing_revenue)))
+        valuations = trailing_revenue * multiples
+
         # Results
         col1, col2, col3 = st.columns(3)
         
@@ -463,8 +472,28 @@ def show_sensitivity_analysis(df):
         st.plotly_chart(fig, use_container_width=True)
         
         # Key statistics
+        final_cash = draws[:, -1, MC_METRICS.index("Cash Balance")]
         st.markdown("**Distribution Statistics:**")
         st.write(f"- **Standard Deviation**: ${np.std(valuations):,.0f}")
         st.write(f"- **Coefficient of Variation**: {np.std(valuations)/np.mean(valuations):.1%}")
         st.write(f"- **Probability > $5M**: {np.sum(valuations > 5000000)/len(valuations):.1%}")
-        st.write(f"- **Probability > $10M**: {np.sum(valuations > 10000000)/len(valuations):.1%}")
\ No newline at end of file
+        st.write(f"- **Probability > $10M**: {np.sum(valuations > 10000000)/len(valuations):.1%}")
+        st.write(f"- **Probability of negative ending cash**: {np.mean(final_cash < 0):.1%}")
+
+def _percentile_band_figure(bands):
+    """Fan chart (P5-P95, P25-P75, median) of cash, EBITDA and patients by month."""
+    fig = make_subplots(rows=1, cols=3, subplot_titles=("Cash Balance ($M)", "Monthly EBITDA ($M)", "Total Patients"))
+    for col, (metric, scale) in enumerate([("Cash Balance", 1e6), ("EBITDA", 1e6), ("Total Patients", 1)], start=1):
+        band = bands[metric] / scale
+        months = band.index
+        for lo, hi, opacity in [("P5", "P95", 0.15), ("P25", "P75", 0.35)]:
+            fig.add_trace(go.Scatter(x=months, y=band[hi], mode='lines', line=dict(width=0),
+                                     showlegend=False, hoverinfo='skip'), row=1, col=col)
+            fig.add_trace(go.Scatter(x=months, y=band[lo], mode='lines', line=dict(width=0),
+                                     fill='tonexty', fillcolor=f'rgba(0, 183, 216, {opacity})',
+                                     name=f"{lo}-{hi}", showlegend=(col == 1)), row=1, col=col)
+        fig.add_trace(go.Scatter(x=months, y=band["P50"], mode='lines', name='Median',
+                                 line=dict(color=ORA_COLORS['primary_dark'], width=2),
+                                 showlegend=(col == 1)), row=1, col=col)
+    fig.update_layout(height=350, font=dict(family="Inter"), margin=dict(t=40, b=20))
+    return fig